@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Benchmark package for pytest-rabbitmq."""
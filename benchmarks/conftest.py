@@ -0,0 +1,111 @@
+"""Benchmarks main conftest file.
+
+Benchmarks run against locally installed RabbitMQ, configured the same way
+as for tests, e.g. with ``--rabbitmq-server`` and ``--rabbitmq-ctl``.
+
+Each benchmark is measured ``RABBITMQ_BENCHMARK_ROUNDS`` times (5 by default),
+after an unmeasured warm-up round. Results, along with the environment they
+were measured in, are written as JSON to ``RABBITMQ_BENCHMARK_OUTPUT``
+(``benchmark-results.json`` by default).
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+import pika
+import pytest
+
+from pytest_rabbitmq.factories.process import get_config
+from pytest_rabbitmq.plugin import *  # noqa: F403
+
+ROUNDS = int(os.environ.get("RABBITMQ_BENCHMARK_ROUNDS", "5"))
+OUTPUT = Path(os.environ.get("RABBITMQ_BENCHMARK_OUTPUT", "benchmark-results.json"))
+
+
+class BenchmarkResults:
+    """Samples of every benchmark run in the session."""
+
+    def __init__(self, environment: Dict[str, Any]) -> None:
+        """Initialize results, with environment benchmarks run in."""
+        self.environment = environment
+        self.results: List[Dict[str, Any]] = []
+
+    def record(self, name: str, samples: List[float], **params: Any) -> Dict[str, Any]:
+        """Record seconds each round took, along with their statistics."""
+        result = {
+            "name": name,
+            "params": params,
+            "rounds": len(samples),
+            "samples": samples,
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "mean": statistics.mean(samples),
+            "max": max(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        }
+        self.results.append(result)
+        return result
+
+    def measure(
+        self,
+        name: str,
+        func: Callable[[Any], None],
+        setup: Optional[Callable[[], Any]] = None,
+        rounds: int = ROUNDS,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """Measure func, after a warm-up round.
+
+        :param name: name of the benchmark
+        :param func: measured function, called with what setup returned
+        :param setup: unmeasured preparation, run before each round
+        :param rounds: number of measured rounds
+        :param params: parameters benchmark was run with
+        """
+        samples = []
+        for round_number in range(rounds + 1):
+            state = setup() if setup else None
+            started_at = time.perf_counter()
+            func(state)
+            elapsed = time.perf_counter() - started_at
+            if round_number:
+                samples.append(elapsed)
+        return self.record(name, samples, **params)
+
+    def write(self, path: Path) -> None:
+        """Write results to a JSON file."""
+        data = {"environment": self.environment, "results": self.results}
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def _rabbitmq_version(ctl: str) -> Optional[str]:
+    """Return version of RabbitMQ installed, as reported by rabbitmqctl."""
+    try:
+        return subprocess.check_output([ctl, "version"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@pytest.fixture(scope="session")
+def benchmark(request: pytest.FixtureRequest) -> Generator[BenchmarkResults, None, None]:
+    """Collect benchmark results, and write them out at the end of the session."""
+    environment = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pika": pika.__version__,
+        "rabbitmq": _rabbitmq_version(get_config(request)["ctl"]),
+        "rounds": ROUNDS,
+    }
+    results = BenchmarkResults(environment)
+    yield results
+    results.write(OUTPUT)
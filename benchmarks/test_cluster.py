@@ -0,0 +1,59 @@
+"""Benchmarks of RabbitMQ cluster formation and recovery."""
+
+from typing import Any, Dict, Generator, List
+
+import pytest
+
+from benchmarks.conftest import ROUNDS, BenchmarkResults
+from pytest_rabbitmq.factories.cluster import RabbitMqCluster, create_cluster
+
+
+@pytest.mark.parametrize("nodes", [2, 3])
+def test_cluster_formation(
+    benchmark: BenchmarkResults,
+    request: pytest.FixtureRequest,
+    tmp_path_factory: pytest.TempPathFactory,
+    nodes: int,
+) -> None:
+    """Boot nodes concurrently and join them into a cluster, as the cluster fixture does."""
+    phases: Dict[str, List[float]] = {"boot": [], "join": [], "total": []}
+    # first round warms up file system caches
+    for round_number in range(ROUNDS + 1):
+        cluster = create_cluster(request, tmp_path_factory, nodes, {})
+        try:
+            cluster.form()
+        finally:
+            cluster.stop()
+        if round_number:
+            phases["boot"].append(cluster.formation_phases["boot"])
+            phases["join"].append(cluster.formation_phases["join"])
+            phases["total"].append(sum(cluster.formation_phases.values()))
+    for phase, samples in phases.items():
+        benchmark.record("cluster_formation", samples, nodes=nodes, phase=phase)
+
+
+@pytest.fixture(scope="module")
+def benchmark_cluster(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Generator[RabbitMqCluster, None, None]:
+    """Cluster of 3 nodes, for recovery benchmarks to stop and restart its members."""
+    cluster = create_cluster(request, tmp_path_factory, 3, {})
+    try:
+        cluster.form()
+        yield cluster
+    finally:
+        cluster.stop()
+
+
+@pytest.mark.parametrize("stop", ["stop", "kill"])
+def test_cluster_node_restart(
+    benchmark: BenchmarkResults, benchmark_cluster: RabbitMqCluster, stop: str
+) -> None:
+    """Restart a member stopped gracefully or killed, until it's back in the cluster."""
+    stop_node = benchmark_cluster.stop_node if stop == "stop" else benchmark_cluster.kill_node
+
+    def restart(_state: Any) -> None:
+        benchmark_cluster.restart_node(2)
+
+    benchmark.measure("cluster_node_restart", restart, setup=lambda: stop_node(2), stop=stop)
+    assert len(benchmark_cluster.running_nodes()) == len(benchmark_cluster)
@@ -0,0 +1,76 @@
+"""Benchmarks of RabbitMQ node startup and client connection."""
+
+from pathlib import Path
+from typing import Any, List
+from uuid import uuid4
+
+import pytest
+from pika import BlockingConnection, ConnectionParameters
+from pika.credentials import PlainCredentials
+
+from benchmarks.conftest import ROUNDS, BenchmarkResults
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.process import ProcessOptions, create_executor, stop_executor
+
+
+def _executor(request: pytest.FixtureRequest, tmpdir: Path, mnesia_cache: bool) -> RabbitMqExecutor:
+    """Create executor for a new node, on random ports."""
+    options: ProcessOptions = {
+        "port": None,
+        "distribution_port": None,
+        "node": f"rabbitmq-bench-{uuid4().hex[:8]}",
+        "mnesia_cache": mnesia_cache,
+    }
+    return create_executor(request, tmpdir, options)
+
+
+@pytest.mark.parametrize("mnesia_cache", [False, True], ids=["cold", "mnesia_cache"])
+def test_fresh_node_start(
+    benchmark: BenchmarkResults,
+    request: pytest.FixtureRequest,
+    tmp_path_factory: pytest.TempPathFactory,
+    mnesia_cache: bool,
+) -> None:
+    """Start a node with a new data directory, as each test session does."""
+    samples: List[float] = []
+    # first round warms up the mnesia cache, and file system caches
+    for round_number in range(ROUNDS + 1):
+        executor = _executor(request, tmp_path_factory.mktemp("bench"), mnesia_cache)
+        executor.start()
+        if round_number:
+            samples.append(executor.boot_phases["ready"])
+        stop_executor(executor)
+    benchmark.record("node_start", samples, data_directory="fresh", mnesia_cache=mnesia_cache)
+
+
+def test_restarted_node_start(
+    benchmark: BenchmarkResults,
+    request: pytest.FixtureRequest,
+    tmp_path_factory: pytest.TempPathFactory,
+) -> None:
+    """Start a node again, on the data directory it already initialised."""
+    executor = _executor(request, tmp_path_factory.mktemp("bench"), False)
+
+    def start(_state: Any) -> None:
+        executor.start()
+
+    try:
+        benchmark.measure(
+            "node_start", start, setup=lambda: stop_executor(executor), data_directory="reused"
+        )
+    finally:
+        stop_executor(executor)
+
+
+def test_connect(benchmark: BenchmarkResults, rabbitmq_proc: RabbitMqExecutor) -> None:
+    """Open and close a client connection, as each client fixture does."""
+    parameters = ConnectionParameters(
+        host=rabbitmq_proc.host,
+        port=rabbitmq_proc.port,
+        credentials=PlainCredentials("guest", "guest"),
+    )
+
+    def connect(_state: Any) -> None:
+        BlockingConnection(parameters).close()
+
+    benchmark.measure("connect", connect, rounds=ROUNDS * 20)
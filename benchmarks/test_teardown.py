@@ -0,0 +1,50 @@
+"""Benchmarks of clearing the broker after a test, as it holds more and more entities."""
+
+from typing import Callable
+
+import pytest
+from pika import BlockingConnection, ConnectionParameters
+from pika.credentials import PlainCredentials
+
+from benchmarks.conftest import BenchmarkResults
+from pytest_rabbitmq.factories.client import clear_declared, clear_rabbitmq
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.tracking import TrackingConnection
+
+STRATEGIES = {"clear_rabbitmq": clear_rabbitmq, "clear_declared": clear_declared}
+
+
+@pytest.mark.parametrize("entities", [10, 100, 1000, 10000])
+@pytest.mark.parametrize("strategy", list(STRATEGIES))
+def test_clear(
+    benchmark: BenchmarkResults,
+    rabbitmq_proc: RabbitMqExecutor,
+    strategy: str,
+    entities: int,
+) -> None:
+    """Clear queues and exchanges, half of the entities each, bound one to one."""
+    clear: Callable[[RabbitMqExecutor, BlockingConnection], None] = STRATEGIES[strategy]
+    connection = TrackingConnection(
+        ConnectionParameters(
+            host=rabbitmq_proc.host,
+            port=rabbitmq_proc.port,
+            credentials=PlainCredentials("guest", "guest"),
+        )
+    )
+
+    def declare() -> None:
+        channel = connection.channel()
+        for index in range(entities // 2):
+            channel.exchange_declare(f"bench-exchange-{index}", "direct")
+            channel.queue_declare(f"bench-queue-{index}")
+            channel.queue_bind(f"bench-queue-{index}", f"bench-exchange-{index}", "key")
+        channel.close()
+        rabbitmq_proc.invalidate_entities()
+
+    def measured(_state: None) -> None:
+        clear(rabbitmq_proc, connection)
+
+    try:
+        benchmark.measure("clear", measured, setup=declare, strategy=strategy, entities=entities)
+    finally:
+        connection.close()
@@ -0,0 +1,63 @@
+"""Benchmarks of publishing and consuming messages over client fixture's connection."""
+
+from typing import Any
+
+import pytest
+from pika import BlockingConnection
+
+from benchmarks.conftest import BenchmarkResults
+
+MESSAGES = 10000
+BODY = b"x" * 1024
+
+
+@pytest.mark.parametrize("confirms", [False, True], ids=["no_confirms", "confirms"])
+def test_publish(benchmark: BenchmarkResults, rabbitmq: BlockingConnection, confirms: bool) -> None:
+    """Publish messages to a queue, one by one."""
+    channel = rabbitmq.channel()
+    channel.queue_declare("bench-publish")
+    if confirms:
+        channel.confirm_delivery()
+
+    def publish(_state: Any) -> None:
+        for _ in range(MESSAGES):
+            channel.basic_publish("", "bench-publish", BODY)
+        # wait for the broker to take all of them in
+        channel.queue_declare("bench-publish", passive=True)
+
+    result = benchmark.measure(
+        "publish",
+        publish,
+        setup=lambda: channel.queue_purge("bench-publish"),
+        messages=MESSAGES,
+        body_size=len(BODY),
+        confirms=confirms,
+    )
+    result["messages_per_second"] = MESSAGES / result["median"]
+
+
+@pytest.mark.parametrize("prefetch", [1, 100, 1000])
+def test_consume(benchmark: BenchmarkResults, rabbitmq: BlockingConnection, prefetch: int) -> None:
+    """Consume messages from a queue, acknowledging each."""
+    channel = rabbitmq.channel()
+    channel.queue_declare("bench-consume")
+    channel.basic_qos(prefetch_count=prefetch)
+
+    def fill() -> None:
+        channel.queue_purge("bench-consume")
+        for _ in range(MESSAGES):
+            channel.basic_publish("", "bench-consume", BODY)
+
+    def consume(_state: Any) -> None:
+        consumed = 0
+        for method, _properties, _body in channel.consume("bench-consume"):
+            channel.basic_ack(method.delivery_tag)
+            consumed += 1
+            if consumed == MESSAGES:
+                break
+        channel.cancel()
+
+    result = benchmark.measure(
+        "consume", consume, setup=fill, messages=MESSAGES, body_size=len(BODY), prefetch=prefetch
+    )
+    result["messages_per_second"] = MESSAGES / result["median"]
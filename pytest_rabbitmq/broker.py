@@ -0,0 +1,1052 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Lightweight AMQP 0-9-1 broker, served from Python threads.
+
+Covers what most tests need from RabbitMQ: exchanges of direct, fanout,
+topic and headers type, queues, bindings, publishing, getting and consuming
+messages, acknowledgements and publisher confirms. Frames are encoded
+and decoded with pika's own codecs.
+
+Everything lives in memory, and nothing is persisted. Not covered are,
+among others: transactions, dead lettering, TTLs, queue length limits,
+priorities, policies, users and permissions.
+"""
+
+import logging
+import re
+import socket
+import threading
+from collections import deque
+from queue import SimpleQueue
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from pika import frame, spec
+
+from pytest_rabbitmq.timing import recorder
+
+logger = logging.getLogger("pytest-rabbitmq")
+
+EXCHANGE_TYPES = ("direct", "fanout", "topic", "headers")
+
+_DEFAULT_EXCHANGES = {
+    "": "direct",
+    "amq.direct": "direct",
+    "amq.fanout": "fanout",
+    "amq.topic": "topic",
+    "amq.headers": "headers",
+    "amq.match": "headers",
+}
+
+_SERVER_PROPERTIES = {
+    "product": "pytest-rabbitmq",
+    "capabilities": {
+        "publisher_confirms": True,
+        "exchange_exchange_bindings": True,
+        "basic.nack": True,
+        "consumer_cancel_notify": True,
+        "per_consumer_qos": True,
+    },
+}
+
+FRAME_MAX = 131072
+
+# reply codes, as defined by AMQP 0-9-1
+NOT_FOUND = 404
+ACCESS_REFUSED = 403
+RESOURCE_LOCKED = 405
+PRECONDITION_FAILED = 406
+CONNECTION_FORCED = 320
+NOT_ALLOWED = 530
+COMMAND_INVALID = 503
+CHANNEL_ERROR = 504
+NOT_IMPLEMENTED = 540
+INTERNAL_ERROR = 541
+NO_ROUTE = 312
+
+
+class AMQPChannelError(Exception):
+    """Error closing the channel it occurred on."""
+
+    def __init__(self, reply_code: int, reply_text: str) -> None:
+        """Initialize error with AMQP reply code and text."""
+        super().__init__(reply_code, reply_text)
+        self.reply_code = reply_code
+        self.reply_text = reply_text
+
+
+class AMQPConnectionError(AMQPChannelError):
+    """Error closing the whole connection."""
+
+
+class Message:
+    """Published message."""
+
+    __slots__ = ("exchange", "routing_key", "properties", "body", "redelivered")
+
+    def __init__(
+        self, exchange: str, routing_key: str, properties: spec.BasicProperties, body: bytes
+    ) -> None:
+        """Initialize message."""
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.properties = properties
+        self.body = body
+        self.redelivered = False
+
+
+class Consumer:
+    """Consumer subscribed to a queue."""
+
+    def __init__(
+        self, tag: str, queue: "Queue", channel: "ServerChannel", no_ack: bool, exclusive: bool
+    ) -> None:
+        """Initialize consumer."""
+        self.tag = tag
+        self.queue = queue
+        self.channel = channel
+        self.no_ack = no_ack
+        self.exclusive = exclusive
+
+
+class Queue:
+    """Queue of messages, with consumers subscribed to it."""
+
+    def __init__(
+        self,
+        name: str,
+        durable: bool,
+        auto_delete: bool,
+        owner: Optional["ServerConnection"],
+        arguments: Dict[str, Any],
+    ) -> None:
+        """Initialize empty queue."""
+        self.name = name
+        self.durable = durable
+        self.auto_delete = auto_delete
+        self.owner = owner
+        self.arguments = arguments
+        self.messages: Deque[Message] = deque()
+        self.consumers: Deque[Consumer] = deque()
+
+
+class Binding:
+    """Binding of a queue or exchange to source exchange."""
+
+    __slots__ = ("destination_kind", "destination", "routing_key", "arguments")
+
+    def __init__(
+        self, destination_kind: str, destination: str, routing_key: str, arguments: Dict[str, Any]
+    ) -> None:
+        """Initialize binding."""
+        self.destination_kind = destination_kind
+        self.destination = destination
+        self.routing_key = routing_key
+        self.arguments = arguments
+
+    def matches(self, exchange_type: str, routing_key: str, headers: Dict[str, Any]) -> bool:
+        """Check whether message routed by exchange of given type matches binding."""
+        if exchange_type == "fanout":
+            return True
+        if exchange_type == "direct":
+            return self.routing_key == routing_key
+        if exchange_type == "topic":
+            return topic_matches(self.routing_key, routing_key)
+        return headers_match(self.arguments, headers)
+
+
+class Exchange:
+    """Exchange routing messages to bound queues and exchanges."""
+
+    def __init__(
+        self, name: str, exchange_type: str, durable: bool, auto_delete: bool, internal: bool
+    ) -> None:
+        """Initialize exchange with no bindings."""
+        self.name = name
+        self.type = exchange_type
+        self.durable = durable
+        self.auto_delete = auto_delete
+        self.internal = internal
+        self.bindings: List[Binding] = []
+
+
+class VirtualHost:
+    """Exchanges and queues of a single virtual host."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize virtual host, with predeclared exchanges."""
+        self.name = name
+        self.exchanges: Dict[str, Exchange] = {
+            exchange: Exchange(exchange, exchange_type, True, False, False)
+            for exchange, exchange_type in _DEFAULT_EXCHANGES.items()
+        }
+        self.queues: Dict[str, Queue] = {}
+
+
+_TOPIC_PATTERNS: Dict[str, "re.Pattern[str]"] = {}
+
+
+def topic_matches(binding_key: str, routing_key: str) -> bool:
+    """Match routing key against topic binding key, with ``*`` and ``#`` wildcards."""
+    pattern = _TOPIC_PATTERNS.get(binding_key)
+    if pattern is None:
+        parts = []
+        for word in binding_key.split("."):
+            if word == "#":
+                parts.append(r"(?:[^.]*(?:\.[^.]*)*)?")
+            elif word == "*":
+                parts.append(r"[^.]*")
+            else:
+                parts.append(re.escape(word))
+        regex = r"\.".join(parts)
+        # '#' may match zero words, along with the dot separating it
+        regex = regex.replace(r"\.(?:[^.]*(?:\.[^.]*)*)?", r"(?:\.[^.]*)*")
+        regex = regex.replace(r"(?:[^.]*(?:\.[^.]*)*)?\.", r"(?:[^.]*\.)*")
+        pattern = _TOPIC_PATTERNS[binding_key] = re.compile(f"^{regex}$")
+    return bool(pattern.match(routing_key))
+
+
+def headers_match(arguments: Dict[str, Any], headers: Dict[str, Any]) -> bool:
+    """Match message headers against headers binding arguments."""
+    expected = {key: value for key, value in arguments.items() if not key.startswith("x-")}
+    matched = (key in headers and headers[key] == value for key, value in expected.items())
+    if arguments.get("x-match", "all") == "any":
+        return any(matched)
+    return all(matched)
+
+
+def _closing_ids(method: Any) -> Tuple[int, int]:
+    """Class and method id of the method that caused closing."""
+    if method is None:
+        return 0, 0
+    return method.INDEX >> 16, method.INDEX & 0xFFFF
+
+
+class ServerChannel:
+    """Broker side of an AMQP channel."""
+
+    def __init__(self, number: int, connection: "ServerConnection") -> None:
+        """Initialize open channel."""
+        self.number = number
+        self.connection = connection
+        self.broker = connection.broker
+        self.closing = False
+        self.confirm = False
+        self.published = 0
+        self.prefetch_count = 0
+        self.consumers: Dict[str, Consumer] = {}
+        self.unacked: Dict[int, Tuple[Queue, Message, Optional[Consumer]]] = {}
+        self.delivery_tag = 0
+        self._publish: Optional[spec.Basic.Publish] = None
+        self._properties: Optional[spec.BasicProperties] = None
+        self._body_size = 0
+        self._body: List[bytes] = []
+
+    @property
+    def vhost(self) -> VirtualHost:
+        """Virtual host the channel's connection is opened to."""
+        vhost = self.connection.vhost
+        assert vhost
+        return vhost
+
+    def send(self, method: Any) -> None:
+        """Send method frame over this channel."""
+        self.connection.send_method(self.number, method)
+
+    def can_deliver(self, consumer: Consumer) -> bool:
+        """Check whether prefetch limit allows delivering to consumer."""
+        if consumer.no_ack or not self.prefetch_count:
+            return True
+        return len(self.unacked) < self.prefetch_count
+
+    def deliver(self, consumer: Consumer, queue: Queue, message: Message) -> None:
+        """Deliver message to consumer subscribed over this channel."""
+        self.delivery_tag += 1
+        if not consumer.no_ack:
+            self.unacked[self.delivery_tag] = (queue, message, consumer)
+        self.connection.send_content(
+            self.number,
+            spec.Basic.Deliver(
+                consumer.tag,
+                self.delivery_tag,
+                message.redelivered,
+                message.exchange,
+                message.routing_key,
+            ),
+            message,
+        )
+
+    def handle(self, received: frame.Frame) -> None:
+        """Handle frame received on this channel."""
+        if isinstance(received, frame.Method):
+            method = received.method
+            if self.closing:
+                if isinstance(method, spec.Channel.CloseOk):
+                    self.connection.forget_channel(self.number)
+                elif isinstance(method, spec.Channel.Close):
+                    self.send(spec.Channel.CloseOk())
+                return
+            try:
+                self.handle_method(method)
+            except AMQPConnectionError:
+                raise
+            except AMQPChannelError as error:
+                self.close(error.reply_code, error.reply_text, method)
+        elif isinstance(received, frame.Header):
+            if self._publish is None:
+                raise AMQPConnectionError(COMMAND_INVALID, "unexpected content header")
+            self._properties = received.properties
+            self._body_size = received.body_size
+            if not self._body_size:
+                self._published()
+        elif isinstance(received, frame.Body):
+            if self._publish is None:
+                raise AMQPConnectionError(COMMAND_INVALID, "unexpected content body")
+            self._body.append(received.fragment)
+            if sum(len(fragment) for fragment in self._body) >= self._body_size:
+                self._published()
+
+    def handle_method(self, method: Any) -> None:
+        """Handle method received on this channel."""
+        class_name, method_name = method.NAME.lower().split(".")
+        handler = getattr(self, f"on_{method_name}_{class_name}", None)
+        if handler is None:
+            raise AMQPConnectionError(NOT_IMPLEMENTED, f"{method.NAME} is not implemented")
+        with self.broker.lock:
+            handler(method)
+
+    def close(self, reply_code: int, reply_text: str, method: Any = None) -> None:
+        """Close channel because of an error."""
+        self.release()
+        self.closing = True
+        class_id, method_id = _closing_ids(method)
+        self.send(spec.Channel.Close(reply_code, reply_text, class_id, method_id))
+
+    def release(self) -> None:
+        """Cancel consumers, and requeue unacknowledged messages."""
+        with self.broker.lock:
+            for consumer in list(self.consumers.values()):
+                self.broker.remove_consumer(consumer)
+            self.consumers.clear()
+            self._requeue(list(self.unacked))
+
+    def _requeue(self, delivery_tags: Iterable[int]) -> None:
+        """Put messages back at the front of their queues, in original order."""
+        queues: Dict[int, Queue] = {}
+        for delivery_tag in sorted(delivery_tags, reverse=True):
+            queue, message, _consumer = self.unacked.pop(delivery_tag)
+            message.redelivered = True
+            queue.messages.appendleft(message)
+            queues[id(queue)] = queue
+        for queue in queues.values():
+            self.broker.dispatch(queue)
+
+    def _settled(self, delivery_tag: int, multiple: bool) -> List[int]:
+        """Delivery tags settled by ack, nack or reject."""
+        if multiple:
+            return [tag for tag in self.unacked if delivery_tag == 0 or tag <= delivery_tag]
+        if delivery_tag not in self.unacked:
+            raise AMQPChannelError(PRECONDITION_FAILED, f"unknown delivery tag {delivery_tag}")
+        return [delivery_tag]
+
+    def _queue(self, name: str) -> Queue:
+        """Get queue declared in channel's virtual host."""
+        queue = self.vhost.queues.get(name)
+        if queue is None:
+            raise AMQPChannelError(NOT_FOUND, f"NOT_FOUND - no queue '{name}'")
+        if queue.owner is not None and queue.owner is not self.connection:
+            raise AMQPChannelError(
+                RESOURCE_LOCKED, f"RESOURCE_LOCKED - queue '{name}' is exclusive"
+            )
+        return queue
+
+    def _exchange(self, name: str) -> Exchange:
+        """Get exchange declared in channel's virtual host."""
+        exchange = self.vhost.exchanges.get(name)
+        if exchange is None:
+            raise AMQPChannelError(NOT_FOUND, f"NOT_FOUND - no exchange '{name}'")
+        return exchange
+
+    # channel class
+
+    def on_close_channel(self, method: spec.Channel.Close) -> None:
+        """Close channel on client's request."""
+        self.release()
+        self.send(spec.Channel.CloseOk())
+        self.connection.forget_channel(self.number)
+
+    def on_flow_channel(self, method: spec.Channel.Flow) -> None:
+        """Acknowledge flow control, without pausing deliveries."""
+        self.send(spec.Channel.FlowOk(method.active))
+
+    # exchange class
+
+    def on_declare_exchange(self, method: spec.Exchange.Declare) -> None:
+        """Declare exchange."""
+        exchange = self.vhost.exchanges.get(method.exchange)
+        if method.passive:
+            if exchange is None:
+                raise AMQPChannelError(NOT_FOUND, f"NOT_FOUND - no exchange '{method.exchange}'")
+        elif exchange is None:
+            if method.exchange.startswith("amq."):
+                raise AMQPChannelError(
+                    ACCESS_REFUSED, f"ACCESS_REFUSED - exchange name '{method.exchange}' reserved"
+                )
+            if method.type not in EXCHANGE_TYPES:
+                raise AMQPConnectionError(
+                    COMMAND_INVALID, f"COMMAND_INVALID - unknown exchange type '{method.type}'"
+                )
+            self.vhost.exchanges[method.exchange] = Exchange(
+                method.exchange, method.type, method.durable, method.auto_delete, method.internal
+            )
+        elif exchange.type != method.type:
+            raise AMQPChannelError(
+                PRECONDITION_FAILED,
+                f"PRECONDITION_FAILED - inequivalent arg 'type' for exchange '{method.exchange}'",
+            )
+        if not method.nowait:
+            self.send(spec.Exchange.DeclareOk())
+
+    def on_delete_exchange(self, method: spec.Exchange.Delete) -> None:
+        """Delete exchange, along with its bindings."""
+        if method.exchange.startswith("amq.") or not method.exchange:
+            raise AMQPChannelError(
+                ACCESS_REFUSED, f"ACCESS_REFUSED - exchange '{method.exchange}' is reserved"
+            )
+        self.broker.delete_exchange(self.vhost, method.exchange)
+        if not method.nowait:
+            self.send(spec.Exchange.DeleteOk())
+
+    def on_bind_exchange(self, method: spec.Exchange.Bind) -> None:
+        """Bind exchange to another."""
+        source = self._exchange(method.source)
+        self._exchange(method.destination)
+        source.bindings.append(
+            Binding("exchange", method.destination, method.routing_key, method.arguments or {})
+        )
+        if not method.nowait:
+            self.send(spec.Exchange.BindOk())
+
+    def on_unbind_exchange(self, method: spec.Exchange.Unbind) -> None:
+        """Remove binding between exchanges."""
+        self._unbind(
+            "exchange", method.destination, method.source, method.routing_key, method.arguments
+        )
+        if not method.nowait:
+            self.send(spec.Exchange.UnbindOk())
+
+    def _unbind(
+        self,
+        kind: str,
+        destination: str,
+        source: str,
+        routing_key: str,
+        arguments: Optional[Dict[str, Any]],
+    ) -> None:
+        """Remove matching binding, if there is one."""
+        exchange = self.vhost.exchanges.get(source)
+        if exchange is None:
+            return
+        exchange.bindings = [
+            binding
+            for binding in exchange.bindings
+            if (
+                binding.destination_kind,
+                binding.destination,
+                binding.routing_key,
+                binding.arguments,
+            )
+            != (kind, destination, routing_key, arguments or {})
+        ]
+
+    # queue class
+
+    def on_declare_queue(self, method: spec.Queue.Declare) -> None:
+        """Declare queue, generating its name if none was given."""
+        name = method.queue or f"amq.gen-{uuid4().hex}"
+        queue = self.vhost.queues.get(name)
+        if method.passive:
+            queue = self._queue(name)
+        elif queue is None:
+            if name.startswith("amq.") and method.queue:
+                raise AMQPChannelError(
+                    ACCESS_REFUSED, f"ACCESS_REFUSED - queue name '{name}' contains reserved prefix"
+                )
+            queue = self.vhost.queues[name] = Queue(
+                name,
+                method.durable,
+                method.auto_delete,
+                self.connection if method.exclusive else None,
+                method.arguments or {},
+            )
+            # every queue is bound to the default exchange, with its name
+            self.vhost.exchanges[""].bindings.append(Binding("queue", name, name, {}))
+        else:
+            queue = self._queue(name)
+        if not method.nowait:
+            self.send(spec.Queue.DeclareOk(name, len(queue.messages), len(queue.consumers)))
+
+    def on_bind_queue(self, method: spec.Queue.Bind) -> None:
+        """Bind queue to exchange."""
+        self._queue(method.queue)
+        exchange = self._exchange(method.exchange)
+        if not exchange.name:
+            raise AMQPChannelError(
+                ACCESS_REFUSED, "ACCESS_REFUSED - can not bind to default exchange"
+            )
+        exchange.bindings.append(
+            Binding("queue", method.queue, method.routing_key or "", method.arguments or {})
+        )
+        if not method.nowait:
+            self.send(spec.Queue.BindOk())
+
+    def on_unbind_queue(self, method: spec.Queue.Unbind) -> None:
+        """Remove binding of queue to exchange."""
+        self._unbind(
+            "queue", method.queue, method.exchange, method.routing_key or "", method.arguments
+        )
+        self.send(spec.Queue.UnbindOk())
+
+    def on_purge_queue(self, method: spec.Queue.Purge) -> None:
+        """Remove all ready messages from queue."""
+        queue = self._queue(method.queue)
+        count = len(queue.messages)
+        queue.messages.clear()
+        if not method.nowait:
+            self.send(spec.Queue.PurgeOk(count))
+
+    def on_delete_queue(self, method: spec.Queue.Delete) -> None:
+        """Delete queue."""
+        queue = self.vhost.queues.get(method.queue)
+        count = 0
+        if queue is not None:
+            queue = self._queue(method.queue)
+            if method.if_unused and queue.consumers:
+                raise AMQPChannelError(PRECONDITION_FAILED, "PRECONDITION_FAILED - queue in use")
+            if method.if_empty and queue.messages:
+                raise AMQPChannelError(PRECONDITION_FAILED, "PRECONDITION_FAILED - queue not empty")
+            count = len(queue.messages)
+            self.broker.delete_queue(self.vhost, queue)
+        if not method.nowait:
+            self.send(spec.Queue.DeleteOk(count))
+
+    # basic class
+
+    def on_qos_basic(self, method: spec.Basic.Qos) -> None:
+        """Set prefetch limit of the channel."""
+        self.prefetch_count = method.prefetch_count
+        self.send(spec.Basic.QosOk())
+        for consumer in self.consumers.values():
+            self.broker.dispatch(consumer.queue)
+
+    def on_consume_basic(self, method: spec.Basic.Consume) -> None:
+        """Subscribe consumer to a queue."""
+        queue = self._queue(method.queue)
+        tag = method.consumer_tag or f"amq.ctag-{uuid4().hex}"
+        if tag in self.consumers:
+            raise AMQPConnectionError(NOT_ALLOWED, f"NOT_ALLOWED - reused consumer tag '{tag}'")
+        if any(consumer.exclusive for consumer in queue.consumers) or (
+            method.exclusive and queue.consumers
+        ):
+            raise AMQPChannelError(
+                ACCESS_REFUSED, f"ACCESS_REFUSED - queue '{queue.name}' in exclusive use"
+            )
+        consumer = Consumer(tag, queue, self, method.no_ack, method.exclusive)
+        self.consumers[tag] = consumer
+        queue.consumers.append(consumer)
+        if not method.nowait:
+            self.send(spec.Basic.ConsumeOk(tag))
+        self.broker.dispatch(queue)
+
+    def on_cancel_basic(self, method: spec.Basic.Cancel) -> None:
+        """Cancel consumer."""
+        consumer = self.consumers.pop(method.consumer_tag, None)
+        if consumer is not None:
+            self.broker.remove_consumer(consumer)
+        if not method.nowait:
+            self.send(spec.Basic.CancelOk(method.consumer_tag))
+
+    def on_publish_basic(self, method: spec.Basic.Publish) -> None:
+        """Start receiving published message, its content follows."""
+        self._publish = method
+        self._properties = None
+        self._body_size = 0
+        self._body = []
+
+    def _published(self) -> None:
+        """Route message, once its whole content was received."""
+        method, self._publish = self._publish, None
+        assert method and self._properties is not None
+        message = Message(
+            method.exchange, method.routing_key, self._properties, b"".join(self._body)
+        )
+        self._body = []
+        try:
+            with self.broker.lock:
+                self._route(method, message)
+        except AMQPChannelError as error:
+            self.close(error.reply_code, error.reply_text, method)
+
+    def _route(self, method: spec.Basic.Publish, message: Message) -> None:
+        """Route published message and confirm it, if requested."""
+        exchange = self._exchange(method.exchange)
+        if self.confirm:
+            self.published += 1
+        queues = self.broker.route(self.vhost, exchange, message)
+        if not queues and method.mandatory:
+            self.connection.send_content(
+                self.number,
+                spec.Basic.Return(NO_ROUTE, "NO_ROUTE", message.exchange, message.routing_key),
+                message,
+            )
+        for queue in queues:
+            queue.messages.append(message)
+            self.broker.dispatch(queue)
+        if self.confirm:
+            self.send(spec.Basic.Ack(self.published, False))
+
+    def on_get_basic(self, method: spec.Basic.Get) -> None:
+        """Get single message from queue."""
+        queue = self._queue(method.queue)
+        if not queue.messages:
+            self.send(spec.Basic.GetEmpty())
+            return
+        message = queue.messages.popleft()
+        self.delivery_tag += 1
+        if not method.no_ack:
+            self.unacked[self.delivery_tag] = (queue, message, None)
+        self.connection.send_content(
+            self.number,
+            spec.Basic.GetOk(
+                self.delivery_tag,
+                message.redelivered,
+                message.exchange,
+                message.routing_key,
+                len(queue.messages),
+            ),
+            message,
+        )
+
+    def on_ack_basic(self, method: spec.Basic.Ack) -> None:
+        """Acknowledge delivered messages."""
+        settled = self._settled(method.delivery_tag, method.multiple)
+        queues = {}
+        for delivery_tag in settled:
+            queue, _message, _consumer = self.unacked.pop(delivery_tag)
+            queues[id(queue)] = queue
+        # consumers may have room for more messages now
+        for queue in queues.values():
+            self.broker.dispatch(queue)
+
+    def on_nack_basic(self, method: spec.Basic.Nack) -> None:
+        """Reject delivered messages, requeueing them if requested."""
+        settled = self._settled(method.delivery_tag, method.multiple)
+        if method.requeue:
+            self._requeue(settled)
+        else:
+            for delivery_tag in settled:
+                self.unacked.pop(delivery_tag)
+
+    def on_reject_basic(self, method: spec.Basic.Reject) -> None:
+        """Reject delivered message, requeueing it if requested."""
+        settled = self._settled(method.delivery_tag, False)
+        if method.requeue:
+            self._requeue(settled)
+        else:
+            self.unacked.pop(method.delivery_tag)
+
+    def on_recover_basic(self, method: spec.Basic.Recover) -> None:
+        """Redeliver all unacknowledged messages."""
+        self._requeue(list(self.unacked))
+        self.send(spec.Basic.RecoverOk())
+
+    # confirm class
+
+    def on_select_confirm(self, method: spec.Confirm.Select) -> None:
+        """Turn on publisher confirms."""
+        self.confirm = True
+        if not method.nowait:
+            self.send(spec.Confirm.SelectOk())
+
+
+class ServerConnection:
+    """Broker side of a client connection."""
+
+    def __init__(self, broker: "InProcessBroker", sock: socket.socket) -> None:
+        """Initialize connection, accepted on given socket."""
+        self.broker = broker
+        self.sock = sock
+        self.vhost: Optional[VirtualHost] = None
+        self.frame_max = FRAME_MAX
+        self.channels: Dict[int, ServerChannel] = {}
+        self.closing = False
+        # frames are written by a separate thread, so that delivering a message
+        # never blocks on a client that's busy writing to the broker itself
+        self._outbox: "SimpleQueue[Optional[bytes]]" = SimpleQueue()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._writer = threading.Thread(target=self._write, daemon=True)
+
+    def start(self) -> None:
+        """Start serving the connection."""
+        # reader joins writer once the client disconnects, which may be right away
+        self._writer.start()
+        self._reader.start()
+
+    def send_method(self, channel_number: int, method: Any) -> None:
+        """Queue method frame for sending."""
+        self._outbox.put(frame.Method(channel_number, method).marshal())
+
+    def send_content(self, channel_number: int, method: Any, message: Message) -> None:
+        """Queue method frame, followed by message's content."""
+        frames = [
+            frame.Method(channel_number, method).marshal(),
+            frame.Header(channel_number, len(message.body), message.properties).marshal(),
+        ]
+        chunk = self.frame_max - 8
+        for offset in range(0, len(message.body), chunk):
+            frames.append(
+                frame.Body(channel_number, message.body[offset : offset + chunk]).marshal()
+            )
+        self._outbox.put(b"".join(frames))
+
+    def forget_channel(self, number: int) -> None:
+        """Drop closed channel."""
+        self.channels.pop(number, None)
+
+    def force_close(self, reply_code: int, reply_text: str) -> None:
+        """Close connection on broker's initiative."""
+        if self.closing:
+            return
+        self.closing = True
+        self.send_method(0, spec.Connection.Close(reply_code, reply_text, 0, 0))
+
+    def _write(self) -> None:
+        """Send queued frames, until told to stop."""
+        while True:
+            data = self._outbox.get()
+            if data is None:
+                break
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                break
+
+    def _read(self) -> None:
+        """Receive and handle frames, until the connection gets closed."""
+        buffer = b""
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                while buffer:
+                    consumed, received = frame.decode_frame(buffer)
+                    if not consumed:
+                        break
+                    buffer = buffer[consumed:]
+                    if not self._handle(received):
+                        return
+        except OSError:
+            pass
+        except AMQPChannelError as error:
+            self.send_method(0, spec.Connection.Close(error.reply_code, error.reply_text, 0, 0))
+        except Exception as error:  # pylint:disable=broad-except
+            # close the connection, not to leave the client waiting for a reply that never comes
+            logger.exception("In-process broker failed to handle a frame")
+            self.send_method(
+                0, spec.Connection.Close(INTERNAL_ERROR, f"INTERNAL_ERROR - {error}", 0, 0)
+            )
+        finally:
+            self._cleanup()
+
+    def _handle(self, received: Any) -> bool:
+        """Handle received frame.
+
+        :returns: whether to carry on reading
+        """
+        if isinstance(received, frame.ProtocolHeader):
+            self.send_method(0, spec.Connection.Start(server_properties=_SERVER_PROPERTIES))
+            return True
+        if isinstance(received, frame.Heartbeat):
+            self._outbox.put(frame.Heartbeat().marshal())
+            return True
+        if received.channel_number == 0:
+            return self._handle_connection(received.method)
+        channel = self.channels.get(received.channel_number)
+        if channel is None:
+            if isinstance(received, frame.Method) and isinstance(
+                received.method, spec.Channel.Open
+            ):
+                self.channels[received.channel_number] = ServerChannel(
+                    received.channel_number, self
+                )
+                self.send_method(received.channel_number, spec.Channel.OpenOk())
+                return True
+            raise AMQPConnectionError(CHANNEL_ERROR, f"channel {received.channel_number} not open")
+        channel.handle(received)
+        return True
+
+    def _handle_connection(self, method: Any) -> bool:
+        """Handle method received on channel 0.
+
+        :returns: whether to carry on reading
+        """
+        if isinstance(method, spec.Connection.StartOk):
+            self.send_method(0, spec.Connection.Tune(2047, FRAME_MAX, 0))
+        elif isinstance(method, spec.Connection.TuneOk):
+            if method.frame_max:
+                self.frame_max = min(method.frame_max, FRAME_MAX)
+        elif isinstance(method, spec.Connection.Open):
+            with self.broker.lock:
+                self.vhost = self.broker.vhosts.get(method.virtual_host)
+            if self.vhost is None:
+                raise AMQPConnectionError(
+                    NOT_ALLOWED, f"NOT_ALLOWED - vhost {method.virtual_host} not found"
+                )
+            self.send_method(0, spec.Connection.OpenOk())
+        elif isinstance(method, spec.Connection.Close):
+            self.send_method(0, spec.Connection.CloseOk())
+            return False
+        elif isinstance(method, spec.Connection.CloseOk):
+            return False
+        return True
+
+    def _cleanup(self) -> None:
+        """Release channels, delete exclusive queues and close the socket."""
+        with self.broker.lock:
+            for channel in list(self.channels.values()):
+                channel.release()
+            self.channels.clear()
+            for vhost in self.broker.vhosts.values():
+                for queue in list(vhost.queues.values()):
+                    if queue.owner is self:
+                        self.broker.delete_queue(vhost, queue)
+            self.broker.connections.discard(self)
+        self._outbox.put(None)
+        self._writer.join(timeout=5)
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class InProcessBroker:
+    """AMQP 0-9-1 broker served from threads of the test process.
+
+    Mirrors the parts of :class:`RabbitMqExecutor` that client fixtures use,
+    so it can be used in place of a RabbitMQ node process.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Initialize broker.
+
+        :param host: host to listen on
+        :param port: port to listen on, a random free one when 0
+        """
+        self.host = host
+        self.port = port
+        self.vhost = "/"
+        """Virtual host client fixtures connect to."""
+        self.lock = threading.RLock()
+        self.vhosts: Dict[str, VirtualHost] = {"/": VirtualHost("/")}
+        self.connections: Set[ServerConnection] = set()
+        self._server: Optional[socket.socket] = None
+        self._acceptor: Optional[threading.Thread] = None
+
+    def start(self) -> "InProcessBroker":
+        """Start listening for connections."""
+        with recorder.measure("node.start"):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((self.host, self.port))
+            server.listen(128)
+        self.port = server.getsockname()[1]
+        self._server = server
+        self._acceptor = threading.Thread(
+            target=self._accept, name=f"amqp-broker-{self.port}", daemon=True
+        )
+        self._acceptor.start()
+        return self
+
+    def running(self) -> bool:
+        """Check whether broker listens for connections."""
+        return self._server is not None
+
+    def stop(self) -> "InProcessBroker":
+        """Stop listening, and drop all connections."""
+        with recorder.measure("node.stop"):
+            self._shutdown()
+        return self
+
+    def _shutdown(self) -> None:
+        """Close listening socket and client connections, and wait for acceptor thread."""
+        if self._server is not None:
+            # closing alone doesn't wake the thread blocked on accept()
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._acceptor is not None:
+            self._acceptor.join(timeout=5)
+            self._acceptor = None
+
+    def _accept(self) -> None:
+        """Accept connections until stopped."""
+        server = self._server
+        assert server
+        while True:
+            try:
+                sock, _address = server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = ServerConnection(self, sock)
+            with self.lock:
+                self.connections.add(connection)
+            connection.start()
+
+    def route(self, vhost: VirtualHost, exchange: Exchange, message: Message) -> List[Queue]:
+        """Find queues message published to exchange should end up in."""
+        headers = message.properties.headers or {}
+        queues: Dict[str, Queue] = {}
+        visited = set()
+        pending = [exchange]
+        while pending:
+            current = pending.pop()
+            visited.add(current.name)
+            for binding in current.bindings:
+                if not binding.matches(current.type, message.routing_key, headers):
+                    continue
+                if binding.destination_kind == "queue":
+                    queue = vhost.queues.get(binding.destination)
+                    if queue is not None:
+                        queues[queue.name] = queue
+                elif binding.destination not in visited:
+                    destination = vhost.exchanges.get(binding.destination)
+                    if destination is not None:
+                        pending.append(destination)
+        return list(queues.values())
+
+    def dispatch(self, queue: Queue) -> None:
+        """Deliver ready messages to consumers with room for them, round robin."""
+        while queue.messages and queue.consumers:
+            for _ in range(len(queue.consumers)):
+                consumer = queue.consumers[0]
+                queue.consumers.rotate(-1)
+                if consumer.channel.can_deliver(consumer):
+                    break
+            else:
+                return
+            consumer.channel.deliver(consumer, queue, queue.messages.popleft())
+
+    def remove_consumer(self, consumer: Consumer) -> None:
+        """Unsubscribe consumer, deleting auto-delete queue after its last consumer."""
+        queue = consumer.queue
+        if consumer in queue.consumers:
+            queue.consumers.remove(consumer)
+        if queue.auto_delete and not queue.consumers:
+            for vhost in self.vhosts.values():
+                if vhost.queues.get(queue.name) is queue:
+                    self.delete_queue(vhost, queue)
+
+    def delete_queue(self, vhost: VirtualHost, queue: Queue) -> None:
+        """Delete queue, its bindings, and cancel its consumers."""
+        vhost.queues.pop(queue.name, None)
+        for exchange in vhost.exchanges.values():
+            exchange.bindings = [
+                binding
+                for binding in exchange.bindings
+                if (binding.destination_kind, binding.destination) != ("queue", queue.name)
+            ]
+        for consumer in list(queue.consumers):
+            queue.consumers.remove(consumer)
+            consumer.channel.consumers.pop(consumer.tag, None)
+            consumer.channel.send(spec.Basic.Cancel(consumer.tag))
+
+    def delete_exchange(self, vhost: VirtualHost, name: str) -> None:
+        """Delete exchange, and bindings to it."""
+        vhost.exchanges.pop(name, None)
+        for exchange in vhost.exchanges.values():
+            exchange.bindings = [
+                binding
+                for binding in exchange.bindings
+                if (binding.destination_kind, binding.destination) != ("exchange", name)
+            ]
+
+    def list_exchanges(self, vhost: Optional[str] = None, max_age: float = 0.0) -> List[str]:
+        """Get names of exchanges declared in virtual host, defaults to broker's one.
+
+        Exchanges are always listed straight from memory, max_age is ignored.
+        """
+        with self.lock:
+            return [name for name in self.vhosts[vhost or self.vhost].exchanges if name]
+
+    def list_queues(self, vhost: Optional[str] = None, max_age: float = 0.0) -> List[str]:
+        """Get names of queues declared in virtual host, defaults to broker's one.
+
+        Queues are always listed straight from memory, max_age is ignored.
+        """
+        with self.lock:
+            return list(self.vhosts[vhost or self.vhost].queues)
+
+    def invalidate_entities(self) -> None:
+        """Do nothing, entities are always listed straight from memory."""
+
+    def import_definitions(
+        self, definitions: Optional[Dict[str, Any]] = None, vhost: Optional[str] = None
+    ) -> None:
+        """Do nothing, broker loads no definitions."""
+
+    def add_vhost(self, vhost: str, user: str = "guest") -> None:
+        """Create virtual host.
+
+        :param vhost: name of virtual host to create
+        :param user: ignored, there are no permissions to grant
+        """
+        with self.lock:
+            self.vhosts.setdefault(vhost, VirtualHost(vhost))
+
+    def delete_vhost(self, vhost: str) -> None:
+        """Delete virtual host, closing connections to it."""
+        with self.lock:
+            removed = self.vhosts.pop(vhost, None)
+            connections = [
+                connection for connection in self.connections if connection.vhost is removed
+            ]
+        for connection in connections:
+            connection.force_close(CONNECTION_FORCED, "CONNECTION_FORCED - vhost deleted")
+
+    def delete_vhost_later(self, vhost: str) -> None:
+        """Delete virtual host, which is immediate for in-memory broker."""
+        self.delete_vhost(vhost)
+
+    def reset_vhost(self, vhost: Optional[str] = None) -> None:
+        """Remove everything from virtual host, by recreating it."""
+        vhost = vhost or self.vhost
+        self.delete_vhost(vhost)
+        self.add_vhost(vhost)
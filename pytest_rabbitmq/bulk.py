@@ -0,0 +1,198 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Deleting or purging many entities at once, without a round trip per entity."""
+
+import time
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple
+
+from pika import BlockingConnection
+from pika.exceptions import ChannelClosedByBroker
+
+from pytest_rabbitmq.channels import AsyncConnection
+
+# reply code of a queue exclusive to another connection
+RESOURCE_LOCKED = 405
+
+
+class DeletionFailure(NamedTuple):
+    """Entity the broker refused to delete (or purge), along with its reason."""
+
+    kind: str
+    name: str
+    reply_code: int
+    reply_text: str
+
+
+class _Batch:
+    """Operations issued over a single channel, replied to in order."""
+
+    def __init__(self, deletions: List[Tuple[str, str]]) -> None:
+        self.deletions = deletions
+        self.confirmed = 0
+        self.finished = False
+        self.opened = False
+        self.channel: Any = None
+        self.failure: Optional[DeletionFailure] = None
+        self.failure_to_open: Optional[Exception] = None
+
+    @property
+    def unconfirmed(self) -> List[Tuple[str, str]]:
+        """Deletions with no reply yet."""
+        return self.deletions[self.confirmed :]
+
+    def on_open(self, channel: Any) -> None:
+        """Issue all operations at once, pika sends the next as soon as a reply comes."""
+        self.channel = channel
+        self.opened = True
+        for kind, name in self.deletions:
+            if kind == "exchange":
+                channel.exchange_delete(name, callback=self.on_delete_ok)
+            elif kind == "queue_purge":
+                channel.queue_purge(name, callback=self.on_delete_ok)
+            else:
+                channel.queue_delete(name, callback=self.on_delete_ok)
+
+    def on_delete_ok(self, _frame: Any) -> None:
+        """Count confirmed operation, and close the channel after the last one."""
+        self.confirmed += 1
+        if self.confirmed == len(self.deletions):
+            self.channel.close()
+
+    def on_close(self, _channel: Any, reason: Exception) -> None:
+        """Record operation that got the channel closed by the broker, if any.
+
+        Channel closed before it opened records why, as no operation was issued.
+        """
+        if not self.opened:
+            self.failure_to_open = reason
+        elif self.unconfirmed:
+            kind, name = self.unconfirmed[0]
+            self.failure = DeletionFailure(
+                kind, name, getattr(reason, "reply_code", 0), getattr(reason, "reply_text", "")
+            )
+        self.finished = True
+
+
+def bulk_delete(
+    connection: AsyncConnection,
+    deletions: Iterable[Tuple[str, str]],
+    max_channels: int = 32,
+    timeout: float = 30.0,
+) -> List[DeletionFailure]:
+    """Delete exchanges and queues, spread over many channels working at the same time.
+
+    Deleting one by one waits a round trip to the broker for each entity.
+    Here deletions are spread over up to ``max_channels`` channels, opened
+    and used concurrently, so teardown takes a round trip per
+    ``max_channels`` entities instead. AMQP allows one pending request per
+    channel, so each channel sends its next deletion as soon as the previous
+    one is confirmed.
+
+    A refused deletion closes only its channel. It's reported, and deletions
+    queued behind it get retried over fresh channels. A channel that didn't
+    open at all, e.g. over a closed connection, fails the whole call instead.
+
+    :param connection: asynchronous connection to delete entities over
+    :param deletions: kind (``exchange``, ``queue``, or ``queue_purge`` to only
+        purge the queue) and name of each entity
+    :param max_channels: maximum number of channels to use at once
+    :param timeout: seconds to wait for all deletions to be confirmed
+    :returns: deletions refused by the broker, or not confirmed in time
+    :raises Exception: reason the broker gave for not opening a channel
+    """
+    pending = list(deletions)
+    failures: List[DeletionFailure] = []
+    deadline = time.monotonic() + timeout
+    while pending:
+        channels = min(max_channels, len(pending))
+        batches = [_Batch(pending[index::channels]) for index in range(channels)]
+        for batch in batches:
+            connection.channel(batch.on_open, batch.on_close)
+        if not connection.run_until(lambda: all(batch.finished for batch in batches), deadline):
+            for batch in batches:
+                if not batch.finished:
+                    failures.extend(
+                        DeletionFailure(kind, name, 0, "timed out")
+                        for kind, name in batch.unconfirmed
+                    )
+                    if batch.channel is not None and batch.channel.is_open:
+                        batch.channel.close()
+            return failures
+        pending = []
+        for batch in batches:
+            if batch.failure_to_open is not None:
+                raise batch.failure_to_open
+            if batch.failure:
+                failures.append(batch.failure)
+                pending.extend(batch.unconfirmed[1:])
+    return failures
+
+
+def bulk_purge(
+    connection: AsyncConnection,
+    queues: Iterable[str],
+    max_channels: int = 32,
+    timeout: float = 30.0,
+) -> List[DeletionFailure]:
+    """Purge messages from queues, spread over many channels, like :func:`bulk_delete`.
+
+    :param connection: asynchronous connection to purge queues over
+    :param queues: names of queues to purge
+    :param max_channels: maximum number of channels to use at once
+    :param timeout: seconds to wait for all purges to be confirmed
+    :returns: purges refused by the broker, or not confirmed in time,
+        as failures of ``queue_purge`` kind
+    """
+    return bulk_delete(
+        connection, [("queue_purge", queue) for queue in queues], max_channels, timeout
+    )
+
+
+def retry_locked(
+    connection: BlockingConnection, failures: Iterable[DeletionFailure]
+) -> List[DeletionFailure]:
+    """Retry deletions (or purges) refused as the queue is exclusive to given connection.
+
+    Bulk operations work over a connection of their own, while an exclusive
+    queue can be deleted only over the connection that declared it.
+    Those get retried over it, one at a time.
+
+    :param connection: connection the test declared entities over
+    :param failures: deletions refused by the broker
+    :returns: deletions still refused
+    """
+    remaining: List[DeletionFailure] = []
+    channel = None
+    for failure in failures:
+        if failure.reply_code != RESOURCE_LOCKED or not connection.is_open:
+            remaining.append(failure)
+            continue
+        if channel is None or not channel.is_open:
+            channel = connection.channel()
+        try:
+            if failure.kind == "queue_purge":
+                channel.queue_purge(failure.name)
+            else:
+                channel.queue_delete(failure.name)
+        except ChannelClosedByBroker as error:
+            remaining.append(
+                failure._replace(reply_code=error.reply_code, reply_text=error.reply_text)
+            )
+    if channel is not None and channel.is_open:
+        channel.close()
+    return remaining
@@ -0,0 +1,128 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Asynchronous connection, to work with many channels at once."""
+
+import time
+from types import TracebackType
+from typing import Any, Callable, Optional, Type
+
+from pika import ConnectionParameters, SelectConnection
+from pika.channel import Channel
+from pika.exceptions import AMQPConnectionError
+
+
+class AsyncConnection:
+    """Pika's asynchronous connection, driven from blocking code.
+
+    Blocking connection waits for every channel to open, and every request on it
+    to be answered, one at a time. Asynchronous connection does not, so many
+    channels can work at the same time. Its I/O loop runs only while
+    :meth:`run_until` waits for the work to be done.
+
+    It's a connection of its own, next to the blocking one the test uses.
+    """
+
+    def __init__(self, parameters: ConnectionParameters, timeout: float = 30.0) -> None:
+        """Open connection, waiting for it to be ready.
+
+        :param parameters: parameters to connect with
+        :param timeout: seconds to wait for the connection to open
+        :raises AMQPConnectionError: when connection couldn't be opened in time
+        """
+        self.error: Optional[BaseException] = None
+        self.connection = SelectConnection(
+            parameters,
+            on_open_error_callback=self._on_open_error,
+            on_close_callback=self._on_close,
+        )
+        # I/O loop's start would activate it, polling here instead
+        self.connection.ioloop.activate_poller()
+        self.run_until(lambda: self.connection.is_open, time.monotonic() + timeout)
+        if not self.connection.is_open:
+            error = self.error or AMQPConnectionError("Connection didn't open in time")
+            self.close()
+            raise error
+
+    def _on_open_error(self, _connection: Any, error: BaseException) -> None:
+        """Record why connection didn't open."""
+        self.error = error
+
+    def _on_close(self, _connection: Any, reason: BaseException) -> None:
+        """Record why connection got closed."""
+        self.error = reason
+
+    def channel(
+        self, on_open: Callable[[Channel], None], on_close: Callable[[Channel, Exception], None]
+    ) -> Channel:
+        """Open a channel, without waiting for it to open.
+
+        The close callback is registered before the channel opens, so a channel
+        the broker refused to open gets reported right away, instead of
+        never calling back at all.
+
+        :param on_open: called with the channel, once it's open
+        :param on_close: called with the channel, and reason, once it gets closed,
+            whether it opened or not
+        :returns: channel, not open yet
+        """
+        channel = self.connection.channel(on_open_callback=on_open)
+        channel.add_on_close_callback(on_close)
+        return channel
+
+    def run_until(self, condition: Callable[[], bool], deadline: float) -> bool:
+        """Handle I/O and callbacks, until condition holds or deadline passes.
+
+        :param condition: checked after each batch of events handled
+        :param deadline: time, as in :func:`time.monotonic`, to stop waiting at
+        :returns: whether the condition holds
+        """
+        ioloop = self.connection.ioloop
+        # wakes the poll up once deadline passes
+        timer = ioloop.call_later(max(deadline - time.monotonic(), 0), lambda: None)
+        try:
+            while not condition() and not self.connection.is_closed:
+                if time.monotonic() >= deadline:
+                    break
+                ioloop.poll()
+                ioloop.process_timeouts()
+        finally:
+            ioloop.remove_timeout(timer)
+        return condition()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Close connection, waiting for the broker to confirm it.
+
+        :param timeout: seconds to wait for the broker
+        """
+        if not (self.connection.is_closed or self.connection.is_closing):
+            self.connection.close()
+        self.run_until(lambda: self.connection.is_closed, time.monotonic() + timeout)
+        self.connection.ioloop.close()
+
+    def __enter__(self) -> "AsyncConnection":
+        """Use connection as a context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close connection on leaving the context."""
+        self.close()
@@ -0,0 +1,127 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""RabbitMQ definitions: users, virtual hosts, permissions and topology, as JSON."""
+
+import hashlib
+import json
+from base64 import b64encode
+from pathlib import Path
+from typing import Any, Dict, Union
+
+Definitions = Union[Path, str, Dict[str, Any]]
+"""Definitions JSON file, or definitions themselves, as exported by RabbitMQ."""
+
+DEFAULT_USER = "guest"
+DEFAULT_VHOST = "/"
+
+VHOST_KEYS = ("policies", "parameters", "exchanges", "queues", "bindings")
+"""Definitions of things living within a virtual host."""
+
+
+def password_hash(password: str) -> str:
+    """Hash password the way RabbitMQ does by default, salted SHA-256.
+
+    Salt is derived from the password, so that definitions files written
+    for the same definitions are the same, and cached data directories
+    keyed by them get reused.
+    """
+    salt = hashlib.sha256(password.encode("utf-8")).digest()[:4]
+    return b64encode(salt + hashlib.sha256(salt + password.encode("utf-8")).digest()).decode()
+
+
+def load_definitions(definitions: Definitions) -> Dict[str, Any]:
+    """Return definitions, reading them from file if a path was given."""
+    if isinstance(definitions, dict):
+        return definitions
+    loaded: Dict[str, Any] = json.loads(Path(definitions).read_text(encoding="utf-8"))
+    return loaded
+
+
+def with_defaults(definitions: Dict[str, Any]) -> Dict[str, Any]:
+    """Add default user and virtual host, with permissions, unless defined already.
+
+    A node importing definitions on boot skips creating its default user and
+    virtual host, which client fixtures connect with.
+    """
+    definitions = dict(definitions)
+    vhosts = list(definitions.get("vhosts", []))
+    if not any(vhost.get("name") == DEFAULT_VHOST for vhost in vhosts):
+        vhosts.append({"name": DEFAULT_VHOST})
+    users = list(definitions.get("users", []))
+    if not any(user.get("name") == DEFAULT_USER for user in users):
+        users.append(
+            {
+                "name": DEFAULT_USER,
+                "password_hash": password_hash(DEFAULT_USER),
+                "hashing_algorithm": "rabbit_password_hashing_sha256",
+                "tags": "administrator",
+            }
+        )
+    permissions = list(definitions.get("permissions", []))
+    if not any(
+        permission.get("user") == DEFAULT_USER and permission.get("vhost") == DEFAULT_VHOST
+        for permission in permissions
+    ):
+        permissions.append(
+            {
+                "user": DEFAULT_USER,
+                "vhost": DEFAULT_VHOST,
+                "configure": ".*",
+                "write": ".*",
+                "read": ".*",
+            }
+        )
+    definitions.update(vhosts=vhosts, users=users, permissions=permissions)
+    return definitions
+
+
+def vhost_definitions(
+    definitions: Dict[str, Any], vhost: str, source: str = DEFAULT_VHOST
+) -> Dict[str, Any]:
+    """Return definitions of everything within source virtual host, moved to another one.
+
+    Users, virtual hosts and permissions are left out, they don't live
+    within a virtual host.
+
+    :param definitions: definitions, as exported by RabbitMQ
+    :param vhost: virtual host to move definitions to
+    :param source: virtual host to take definitions of
+    """
+    return {
+        key: [
+            {**entity, "vhost": vhost}
+            for entity in definitions.get(key, [])
+            if entity.get("vhost") == source
+        ]
+        for key in VHOST_KEYS
+    }
+
+
+def write_definitions(directory: Path, definitions: Definitions) -> Path:
+    """Write definitions, with defaults added, for a node to import on boot.
+
+    :param directory: directory to write ``definitions.json`` to
+    :param definitions: definitions file, or definitions themselves
+    :returns: path to written file
+    """
+    definitions_file = directory / "definitions.json"
+    definitions_file.write_text(
+        json.dumps(with_defaults(load_definitions(definitions)), sort_keys=True),
+        encoding="utf-8",
+    )
+    return definitions_file
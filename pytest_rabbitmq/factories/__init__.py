@@ -16,7 +16,21 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
 """RabbitMQ factory package."""
+from pytest_rabbitmq.factories.async_client import async_rabbitmq
 from pytest_rabbitmq.factories.client import rabbitmq
-from pytest_rabbitmq.factories.process import rabbitmq_proc
+from pytest_rabbitmq.factories.cluster import rabbitmq_cluster
+from pytest_rabbitmq.factories.inprocess import rabbitmq_inprocess_proc
+from pytest_rabbitmq.factories.messages import rabbitmq_messages
+from pytest_rabbitmq.factories.process import rabbitmq_proc, rabbitmq_proc_group
+from pytest_rabbitmq.factories.rollback import rabbitmq_rollback
 
-__all__ = ("rabbitmq", "rabbitmq_proc")
+__all__ = (
+    "async_rabbitmq",
+    "rabbitmq",
+    "rabbitmq_cluster",
+    "rabbitmq_inprocess_proc",
+    "rabbitmq_messages",
+    "rabbitmq_proc",
+    "rabbitmq_proc_group",
+    "rabbitmq_rollback",
+)
@@ -0,0 +1,153 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Asyncio RabbitMQ client fixture factory.
+
+Requires ``aio-pika`` and ``pytest-asyncio``, installed along with
+the ``async`` extra: ``pip install pytest-rabbitmq[async]``.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, List, Optional, Tuple
+
+from pytest_rabbitmq.factories.dependencies import depends_on
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.timing import recorder
+
+if TYPE_CHECKING:
+    from aio_pika.abc import AbstractConnection
+
+logger = logging.getLogger("pytest-rabbitmq")
+
+AsyncTeardown = Callable[[RabbitMqExecutor, "AbstractConnection"], Awaitable[None]]
+
+
+async def _delete_concurrently(
+    connection: "AbstractConnection", deletions: List[Tuple[str, str]], concurrency: int
+) -> None:
+    """Delete entities over several channels at once.
+
+    A channel handles one request at a time, so deletions are spread
+    over up to ``concurrency`` channels. Entities the broker refused to delete
+    get logged, without stopping the cleanup, like :func:`clear_rabbitmq` does.
+    Refusal closes the channel, so deletions queued behind it go over a fresh one.
+
+    :param connection: connection to delete entities over
+    :param deletions: kind (``exchange`` or ``queue``) and name of each entity
+    :param concurrency: maximum number of channels to use
+    """
+    if not deletions:
+        return
+    from aio_pika.exceptions import AMQPError  # pylint:disable=import-outside-toplevel
+
+    async def delete(batch: List[Tuple[str, str]]) -> None:
+        channel: Any = None
+        try:
+            for kind, name in batch:
+                if channel is None or channel.is_closed:
+                    channel = await connection.channel()
+                try:
+                    if kind == "exchange":
+                        await channel.exchange_delete(name)
+                    else:
+                        await channel.queue_delete(name)
+                except AMQPError as exc:
+                    logger.warning(f"Could not clear {kind} {name}: {exc}")
+        finally:
+            if channel is not None and not channel.is_closed:
+                await channel.close()
+
+    step = min(concurrency, len(deletions))
+    results = await asyncio.gather(
+        *(delete(deletions[index::step]) for index in range(step)), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.warning(f"Could not clear entities: {result!r}")
+
+
+async def async_clear_rabbitmq(
+    process: RabbitMqExecutor, rabbitmq_connection: "AbstractConnection", concurrency: int = 8
+) -> None:
+    """Clear queues and exchanges from given rabbitmq process, without blocking the event loop.
+
+    Exchanges and queues are listed in worker threads, and deleted concurrently.
+
+    :param process: rabbitmq process
+    :param rabbitmq_connection: aio-pika connection to rabbitmq
+    :param concurrency: maximum number of channels to delete entities over
+    """
+    loop = asyncio.get_running_loop()
+    exchanges, queues = await asyncio.gather(
+        loop.run_in_executor(None, process.list_exchanges),
+        loop.run_in_executor(None, process.list_queues),
+    )
+    # names starting with "amq." are reserved, see clear_rabbitmq
+    deletions = [("exchange", name) for name in exchanges if not name.startswith("amq.")]
+    deletions += [("queue", name) for name in queues if not name.startswith("amq.")]
+    await _delete_concurrently(rabbitmq_connection, deletions, concurrency)
+
+
+def async_rabbitmq(
+    process_fixture_name: str,
+    teardown: Optional[AsyncTeardown] = None,
+) -> Callable[..., AsyncGenerator["AbstractConnection", None]]:
+    """Asyncio client fixture factory for RabbitMQ.
+
+    Yields an aio-pika connection, so async tests can publish and consume
+    without blocking the event loop. Fixture is defined with
+    ``pytest_asyncio.fixture``, and runs in the test's event loop.
+
+    :param str process_fixture_name: name of RabbitMQ process variable
+        returned by rabbitmq_proc
+    :param callable teardown: custom coroutine function that clears rabbitmq.
+        Defaults to :func:`async_clear_rabbitmq`.
+    :returns: RabbitMQ connection fixture
+    """
+    import aio_pika  # pylint:disable=import-outside-toplevel
+    import pytest_asyncio  # pylint:disable=import-outside-toplevel
+
+    @depends_on(process_fixture_name)
+    async def async_rabbitmq_factory(**fixtures: Any) -> AsyncGenerator["AbstractConnection", None]:
+        """Asyncio client fixture for RabbitMQ.
+
+        :param fixtures: process fixture, by its name
+        :returns: instance of :class:`aio_pika.abc.AbstractConnection`
+        """
+        process: RabbitMqExecutor = fixtures[process_fixture_name]
+        with recorder.measure("connection.open"):
+            connection = await aio_pika.connect(
+                host=process.host,
+                port=process.port,
+                login="guest",
+                password="guest",
+                virtualhost=process.vhost,
+            )
+
+        yield connection
+        try:
+            with recorder.measure("teardown.custom" if teardown else "teardown.clear"):
+                await (teardown or async_clear_rabbitmq)(process, connection)
+        finally:
+            with recorder.measure("connection.close"):
+                await connection.close()
+
+    fixture: Callable[..., AsyncGenerator["AbstractConnection", None]] = pytest_asyncio.fixture(
+        async_rabbitmq_factory
+    )
+    return fixture
@@ -16,8 +16,11 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
 """RabbitMQ client fixture factory."""
+
 import logging
-from typing import Callable, Generator
+from typing import Any, Callable, Dict, FrozenSet, Generator, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+from weakref import WeakKeyDictionary
 
 import pytest
 from pika import BlockingConnection, ConnectionParameters
@@ -25,20 +28,69 @@ from pika.credentials import PlainCredentials
 from pika.exceptions import ChannelClosed
 from pytest import FixtureRequest
 
+from pytest_rabbitmq.bulk import DeletionFailure, bulk_delete, bulk_purge, retry_locked
+from pytest_rabbitmq.channels import AsyncConnection
+from pytest_rabbitmq.factories.dependencies import depends_on
 from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.pool import ConnectionPool, PooledConnection, PooledTrackingConnection
+from pytest_rabbitmq.timing import recorder
+from pytest_rabbitmq.tracking import TrackingConnection
 
 logger = logging.getLogger("pytest-rabbitmq")
 
+client_parameters: "WeakKeyDictionary[BlockingConnection, ConnectionParameters]" = (
+    WeakKeyDictionary()
+)
+"""Parameters each connection yielded by a client fixture was opened with."""
+
+
+def connection_parameters(
+    process: RabbitMqExecutor, virtual_host: Optional[str] = None
+) -> ConnectionParameters:
+    """Parameters to connect to given rabbitmq process with, as guest.
+
+    :param RabbitMqExecutor process: rabbitmq process
+    :param str virtual_host: virtual host to connect to, defaults to process' one
+    """
+    return ConnectionParameters(
+        host=process.host,
+        port=process.port,
+        virtual_host=virtual_host or process.vhost,
+        credentials=PlainCredentials("guest", "guest"),
+    )
+
+
+def _bulk_clear(
+    process: RabbitMqExecutor,
+    rabbitmq_connection: BlockingConnection,
+    deletions: List[Tuple[str, str]],
+    purges: List[str],
+) -> None:
+    """Delete entities and purge queues over a connection of their own, logging failures.
+
+    Queues exclusive to the test's connection get deleted over it instead.
+    """
+    if not deletions and not purges:
+        return
+    failures: List[DeletionFailure] = []
+    with AsyncConnection(connection_parameters(process)) as connection:
+        failures += bulk_delete(connection, deletions)
+        failures += bulk_purge(connection, purges)
+    _log_failures(retry_locked(rabbitmq_connection, failures))
+
 
 def clear_rabbitmq(process: RabbitMqExecutor, rabbitmq_connection: BlockingConnection) -> None:
     """Clear queues and exchanges from given rabbitmq process.
 
+    Deletions are sent over several channels at once, see :func:`bulk_delete`,
+    on a connection of their own.
+    Entities the broker refused to delete get logged, without stopping the cleanup.
+
     :param RabbitMqExecutor process: rabbitmq process
     :param pika.connection.Connection rabbitmq_connection: connection to rabbitmq
 
     """
-    channel = rabbitmq_connection.channel()
-
+    deletions: List[Tuple[str, str]] = []
     for exchange in process.list_exchanges():
         if exchange.startswith("amq."):
             # ----------------------------------------------------------------
@@ -51,7 +103,7 @@ def clear_rabbitmq(process: RabbitMqExecutor, rabbitmq_connection: BlockingConne
             # exchange already exists. Error code: access-refused
             # ----------------------------------------------------------------
             continue
-        channel.exchange_delete(exchange)
+        deletions.append(("exchange", exchange))
 
     for queue_name in process.list_queues():
         if queue_name.startswith("amq."):
@@ -65,31 +117,154 @@ def clear_rabbitmq(process: RabbitMqExecutor, rabbitmq_connection: BlockingConne
             # exists. Error code: access-refused
             # ----------------------------------------------------------------
             continue
-        channel.queue_delete(queue_name)
+        deletions.append(("queue", queue_name))
+
+    _bulk_clear(process, rabbitmq_connection, deletions, [])
+
+
+def _log_failures(failures: List[DeletionFailure]) -> None:
+    """Log entities the broker refused to clear."""
+    for failure in failures:
+        logger.warning(
+            f"Could not clear {failure.kind} {failure.name}: "
+            f"{failure.reply_code} {failure.reply_text}"
+        )
+
+
+class Baseline(NamedTuple):
+    """Exchanges and queues that existed before the test."""
+
+    exchanges: FrozenSet[str]
+    queues: FrozenSet[str]
+
+
+def take_baseline(process: RabbitMqExecutor) -> Baseline:
+    """Snapshot exchanges and queues existing on given rabbitmq process.
+
+    :param RabbitMqExecutor process: rabbitmq process
+    """
+    return Baseline(frozenset(process.list_exchanges()), frozenset(process.list_queues()))
+
+
+def purge_rabbitmq(
+    process: RabbitMqExecutor,
+    rabbitmq_connection: BlockingConnection,
+    baseline: Baseline,
+) -> None:
+    """Bring rabbitmq process back to baseline, purging queues instead of deleting them.
+
+    Baseline exchanges and queues are kept, baseline queues get purged of
+    messages. Only entities created after the baseline get deleted.
+
+    Baseline entities deleted during the test get recreated, when the node
+    loaded definitions on boot, by importing them again.
+
+    .. note::
+
+        Bindings added between baseline entities are kept.
+
+    :param RabbitMqExecutor process: rabbitmq process
+    :param pika.connection.Connection rabbitmq_connection: connection to rabbitmq
+    :param Baseline baseline: exchanges and queues to keep
+    """
+    # always listed anew, entities might have been declared by other means than the client
+    queues = process.list_queues()
+    exchanges = process.list_exchanges()
+    deletions = [
+        ("exchange", exchange)
+        for exchange in exchanges
+        if exchange not in baseline.exchanges and not exchange.startswith("amq.")
+    ]
+    deletions += [
+        ("queue", queue)
+        for queue in queues
+        if queue not in baseline.queues and not queue.startswith("amq.")
+    ]
+    _bulk_clear(
+        process,
+        rabbitmq_connection,
+        deletions,
+        [queue for queue in queues if queue in baseline.queues],
+    )
+    if not (baseline.exchanges <= set(exchanges) and baseline.queues <= set(queues)):
+        process.import_definitions()
+
+
+def clear_declared(process: RabbitMqExecutor, rabbitmq_connection: BlockingConnection) -> None:
+    """Remove queues, exchanges and bindings declared over given connection.
+
+    Requires the connection to record declarations, see `track_declarations`
+    argument of the :func:`rabbitmq` factory. Nothing is listed on the broker,
+    so the cost depends only on what the test declared.
+
+    :param RabbitMqExecutor process: rabbitmq process
+    :param TrackingConnection rabbitmq_connection: connection to rabbitmq
+
+    """
+    if not isinstance(rabbitmq_connection, TrackingConnection):
+        raise TypeError(
+            "clear_declared requires a connection tracking declarations, "
+            "use rabbitmq(..., track_declarations=True)"
+        )
+    rabbitmq_connection.undo_declarations()
 
 
 def rabbitmq(
     process_fixture_name: str,
-    teardown: Callable[[RabbitMqExecutor, BlockingConnection], None] = clear_rabbitmq,
+    teardown: Optional[Callable[[RabbitMqExecutor, BlockingConnection], None]] = None,
+    track_declarations: bool = False,
+    isolate_vhost: bool = False,
+    pooled: bool = False,
+    purge: bool = False,
 ) -> Callable[[FixtureRequest], Generator[BlockingConnection, None, None]]:
     """Client fixture factory for RabbitMQ.
 
     :param str process_fixture_name: name of RabbitMQ process variable
         returned by rabbitmq_proc
-    :param callable teardown: custom callable that clears rabbitmq
+    :param callable teardown: custom callable that clears rabbitmq.
+        Defaults to :func:`clear_declared` when tracking declarations,
+        :func:`clear_rabbitmq` otherwise.
+    :param bool track_declarations: yield a connection recording every
+        exchange, queue and binding declared over its channels,
+        so teardown removes only those
+    :param bool isolate_vhost: connect each test to its own, freshly created
+        virtual host. Instead of clearing queues and exchanges one by one,
+        the whole virtual host gets deleted in the background after the test.
+        Topology from process' definitions gets imported into it first.
+    :param bool pooled: reuse connections between tests. After teardown,
+        channels left open get closed, and the connection is kept for the next
+        test, unless it turns out broken. Not available along with isolate_vhost,
+        as each test connects to a different virtual host then.
+    :param bool purge: keep exchanges and queues that existed before the first
+        test using the fixture, e.g. topology declared by a session fixture, and
+        only purge messages from those queues. Entities created during the test
+        get deleted. See :func:`purge_rabbitmq`.
 
     .. note::
 
         calls to rabbitmqctl might be as slow or even slower
-        as restarting process. To speed up, provide Your own teardown function,
+        as restarting process. To speed up, enable management plugin on
+        the process fixture, so queues and exchanges are listed over its
+        HTTP API, track declarations, isolate tests in their own virtual
+        hosts, or provide Your own teardown function,
         to remove queues and exchanges of your choosing, without querying
         rabbitmqctl underneath.
 
     :returns RabbitMQ connection
     """
+    if pooled and isolate_vhost:
+        raise ValueError("pooled connections can not be used along with isolate_vhost")
+    if purge and isolate_vhost:
+        raise ValueError("purge can not be used along with isolate_vhost")
+    pools: Dict[Tuple[str, int, str], ConnectionPool] = {}
+    # taken once per process, listing entities before every test would double the cost of purge
+    baselines: "WeakKeyDictionary[RabbitMqExecutor, Baseline]" = WeakKeyDictionary()
 
     @pytest.fixture
-    def rabbitmq_factory(request: FixtureRequest) -> Generator[BlockingConnection, None, None]:
+    @depends_on(process_fixture_name)
+    def rabbitmq_factory(
+        request: FixtureRequest, **fixtures: Any
+    ) -> Generator[BlockingConnection, None, None]:
         """Client fixture for RabbitMQ.
 
         #. Get module and config.
@@ -97,24 +272,68 @@ def rabbitmq(
 
         :param TCPExecutor rabbitmq_proc: tcp executor
         :param FixtureRequest request: fixture request object
+        :param fixtures: process fixture, by its name
         :rtype: pika.adapters.blocking_connection.BlockingConnection
         :returns: instance of :class:`BlockingConnection`
         """
-        # load required process fixture
-        process = request.getfixturevalue(process_fixture_name)
+        process: RabbitMqExecutor = fixtures[process_fixture_name]
 
-        credentials = PlainCredentials("guest", "guest")
-        parameters = ConnectionParameters(
-            host=process.host, port=process.port, virtual_host="/", credentials=credentials
-        )
-        connection = BlockingConnection(parameters)
+        virtual_host = process.vhost
+        if isolate_vhost:
+            virtual_host = f"pytest-{uuid4().hex}"
+            process.add_vhost(virtual_host)
+            process.import_definitions(vhost=virtual_host)
+        baseline = None
+        if purge:
+            baseline = baselines.get(process)
+            if baseline is None:
+                baseline = baselines[process] = take_baseline(process)
+
+        parameters = connection_parameters(process, virtual_host)
+        pool = None
+        with recorder.measure("connection.open"):
+            if pooled:
+                key = (process.host, process.port, virtual_host)
+                pool = pools.get(key)
+                if pool is None:
+                    pool = pools[key] = ConnectionPool(
+                        parameters,
+                        PooledTrackingConnection if track_declarations else PooledConnection,
+                    )
+                    request.config.add_cleanup(pool.close)
+                connection = pool.acquire()
+            else:
+                connection_class = TrackingConnection if track_declarations else BlockingConnection
+                connection = connection_class(parameters)
+        if isinstance(connection, TrackingConnection):
+            connection.on_change = process.invalidate_entities
+        client_parameters[connection] = parameters
 
         yield connection
-        teardown(process, connection)
+        if teardown:
+            with recorder.measure("teardown.custom"):
+                teardown(process, connection)
+        elif baseline is not None:
+            with recorder.measure("teardown.purge"):
+                purge_rabbitmq(process, connection, baseline)
+        elif track_declarations:
+            with recorder.measure("teardown.clear_declared"):
+                clear_declared(process, connection)
+        elif not isolate_vhost:
+            with recorder.measure("teardown.clear"):
+                clear_rabbitmq(process, connection)
+        process.invalidate_entities()
+        if pool:
+            with recorder.measure("connection.release"):
+                pool.release(connection)
+            return
         try:
-            connection.close()
+            with recorder.measure("connection.close"):
+                connection.close()
         except ChannelClosed as e:
             # at this stage this exception occurs when connection is being closed
             logger.warning(f"ChannelClosedException occured while closing connection {e}")
+        if isolate_vhost:
+            process.delete_vhost_later(virtual_host)
 
     return rabbitmq_factory
@@ -0,0 +1,232 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""RabbitMQ cluster fixture factory."""
+
+import json
+import logging
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, Optional
+from uuid import uuid4
+
+import pytest
+from pika import ConnectionParameters
+from pika.credentials import PlainCredentials
+from pytest import FixtureRequest, TempPathFactory
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.process import (
+    LOCAL_BACKEND,
+    ProcessOptions,
+    create_executor,
+    start_executors,
+    stop_executor,
+    stop_executors,
+)
+
+logger = logging.getLogger("pytest-rabbitmq")
+
+
+def full_node_name(node_name: str) -> str:
+    """Qualify node name with the short host name, as RabbitMQ does by default."""
+    if "@" in node_name:
+        return node_name
+    return f"{node_name}@{socket.gethostname().split('.')[0]}"
+
+
+class RabbitMqCluster:
+    """Nodes clustered together, running on the local machine.
+
+    First node is the seed, others joined its cluster.
+    """
+
+    def __init__(self, nodes: List[RabbitMqExecutor]) -> None:
+        """Initialize cluster.
+
+        :param nodes: executors of cluster's nodes, seed first
+        """
+        self.nodes = nodes
+        self.formation_phases: Dict[str, float] = {}
+        """Seconds spent booting nodes, and joining them into the cluster."""
+
+    def __len__(self) -> int:
+        """Return number of nodes."""
+        return len(self.nodes)
+
+    def __getitem__(self, index: int) -> RabbitMqExecutor:
+        """Return executor of node at index."""
+        return self.nodes[index]
+
+    def form(self) -> None:
+        """Boot all nodes concurrently, and join them to the seed node's cluster."""
+        started_at = time.monotonic()
+        start_executors({node.node_name: node for node in self.nodes})
+        booted_at = time.monotonic()
+        self.formation_phases["boot"] = booted_at - started_at
+        seed = full_node_name(self.nodes[0].node_name)
+        for node in self.nodes[1:]:
+            node.rabbitctl_output("stop_app")
+            node.rabbitctl_output("join_cluster", seed)
+            node.rabbitctl_output("start_app")
+        self.formation_phases["join"] = time.monotonic() - booted_at
+        logger.info(f"RabbitMQ cluster of {len(self)} nodes formed: {self.formation_phases}")
+
+    def connection_parameters(self, index: int = 0) -> ConnectionParameters:
+        """Return connection parameters for node at index."""
+        node = self.nodes[index]
+        return ConnectionParameters(
+            host=node.host,
+            port=node.port,
+            virtual_host=node.vhost,
+            credentials=PlainCredentials("guest", "guest"),
+        )
+
+    def all_connection_parameters(self) -> List[ConnectionParameters]:
+        """Return connection parameters for every node, e.g. for a client to fail over."""
+        return [self.connection_parameters(index) for index in range(len(self))]
+
+    def running_nodes(self, index: int = 0) -> List[str]:
+        """Return names of running cluster members, as seen by node at index."""
+        output = self.nodes[index].rabbitctl_output("cluster_status", "--formatter", "json")
+        return list(json.loads(output)["running_nodes"])
+
+    def stop_node(self, index: int) -> None:
+        """Stop node at index gracefully."""
+        stop_executor(self.nodes[index])
+
+    def kill_node(self, index: int) -> None:
+        """Kill node at index abruptly, as if the machine it ran on went away."""
+        self.nodes[index].kill(sig=signal.SIGKILL)
+
+    def restart_node(self, index: int) -> None:
+        """Start node at index again, it rejoins the cluster on boot."""
+        node = self.nodes[index]
+        if node.running():
+            stop_executor(node)
+        node.start()
+
+    def stop(self) -> None:
+        """Stop all running nodes."""
+        stop_executors({node.node_name: node for node in self.nodes})
+
+
+def create_cluster(
+    request: FixtureRequest,
+    tmp_path_factory: TempPathFactory,
+    nodes: int,
+    options: ProcessOptions,
+) -> RabbitMqCluster:
+    """Create executors of nodes meant to cluster, not started yet.
+
+    Every node gets random ports, its own name and data directory,
+    and the cookie shared by all of them.
+
+    :param request: fixture request object
+    :param tmp_path_factory: temporary path factory
+    :param nodes: number of nodes in the cluster
+    :param options: options of every node, as passed to process fixture factory
+    :returns: cluster to form
+    """
+    erlang_cookie = uuid4().hex.upper()
+    executors: List[RabbitMqExecutor] = []
+    used_ports: List[int] = []
+    for index in range(nodes):
+        tmpdir = tmp_path_factory.mktemp(f"pytest-rabbitmq-{request.fixturename}-{index}")
+        member_options: ProcessOptions = {
+            **options,
+            "port": None,
+            "distribution_port": None,
+            "node": f"rabbitmq-cluster-{uuid4().hex[:8]}-{index}",
+            "management_port": None,
+            "mnesia_cache": False,
+            # nodes join each other with rabbitmqctl, whatever backend the run uses
+            "backend": LOCAL_BACKEND,
+        }
+        executor = create_executor(
+            request, tmpdir, member_options, exclude_ports=used_ports, erlang_cookie=erlang_cookie
+        )
+        used_ports.extend([executor.port, executor.distribution_port])
+        if executor.management:
+            used_ports.append(executor.management.port)
+        executors.append(executor)
+    return RabbitMqCluster(executors)
+
+
+def rabbitmq_cluster(
+    nodes: int = 3,
+    server: Optional[str] = None,
+    host: Optional[str] = None,
+    ctl: Optional[str] = None,
+    plugindir: Optional[Path] = None,
+    management: Optional[bool] = None,
+    startup_timeout: Optional[float] = None,
+    readiness: Optional[str] = None,
+) -> Callable[[FixtureRequest, TempPathFactory], Generator[RabbitMqCluster, None, None]]:
+    """Fixture factory for a cluster of RabbitMQ nodes.
+
+    Nodes boot concurrently, on random ports, sharing an Erlang cookie,
+    and then join the first node's cluster with ``rabbitmqctl join_cluster``.
+    They always run as local processes, ``rabbitmq_backend`` doesn't apply.
+
+    :param nodes: number of nodes in the cluster
+    :param server: path to rabbitmq-server command
+    :param host: server host
+    :param ctl: path to rabbitmqctl file
+    :param plugindir: directory holding enabled plugins file
+    :param management: enable management plugin on every node
+    :param startup_timeout: seconds to wait for each node to become ready
+    :param readiness: how to tell each node is ready, see :func:`rabbitmq_proc`
+    :returns: pytest fixture with RabbitMQ cluster
+    """
+    assert nodes > 0, "cluster needs at least one node"
+
+    @pytest.fixture(scope="session")
+    def rabbitmq_cluster_fixture(
+        request: FixtureRequest, tmp_path_factory: TempPathFactory
+    ) -> Generator[RabbitMqCluster, None, None]:
+        """Fixture for a cluster of RabbitMQ nodes.
+
+        :param request: fixture request object
+        :param tmp_path_factory: temporary path factory
+        :returns: running RabbitMQ cluster
+        """
+        cluster = create_cluster(
+            request,
+            tmp_path_factory,
+            nodes,
+            {
+                "server": server,
+                "host": host,
+                "ctl": ctl,
+                "plugindir": plugindir,
+                "management": management,
+                "startup_timeout": startup_timeout,
+                "readiness": readiness,
+            },
+        )
+        try:
+            cluster.form()
+        except Exception:
+            cluster.stop()
+            raise
+        yield cluster
+        cluster.stop()
+
+    return rabbitmq_cluster_fixture
@@ -0,0 +1,132 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Running RabbitMQ in a container, kept warm between test sessions."""
+
+import hashlib
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from pytest_rabbitmq.factories.noproc import NoProcExecutor
+from pytest_rabbitmq.management import ManagementClient
+from pytest_rabbitmq.timing import recorder
+
+AMQP_PORT = 5672
+MANAGEMENT_PORT = 15672
+
+
+def container_name(image: str) -> str:
+    """Return name of the container run from given image, shared by test sessions."""
+    return f"pytest-rabbitmq-{hashlib.sha256(image.encode('utf-8')).hexdigest()[:12]}"
+
+
+class ContainerExecutor(NoProcExecutor):
+    """Executor for RabbitMQ running in a container.
+
+    The container is started once, and left running after tests, so that
+    following sessions (and pytest-xdist workers) attach to it right away
+    instead of waiting for the broker to boot. Like :class:`NoProcExecutor`,
+    each executor isolates its tests in its own virtual host.
+
+    Remove the container to have it started afresh, e.g.
+    ``docker rm --force pytest-rabbitmq-...``.
+    """
+
+    def __init__(
+        self,
+        image: str,
+        path: Path,
+        host: str = "127.0.0.1",
+        name: Optional[str] = None,
+        runtime: str = "docker",
+        timeout: float = 60,
+    ) -> None:  # pylint:disable=too-many-arguments
+        """Initialize executor.
+
+        :param image: image to run, with management plugin enabled,
+            as in ``rabbitmq:3-management``
+        :param path: directory for files the executor writes
+        :param host: host interface to publish container's ports on
+        :param name: name of the container, derived from image if not given
+        :param runtime: container runtime command, ``docker`` or compatible one
+        :param timeout: seconds to wait for the broker to accept connections
+        """
+        super().__init__(host, 0, runtime, path, timeout=timeout)
+        self.image = image
+        self.container_name = name or container_name(image)
+        self.runtime = runtime
+
+    def _container(self, *args: str) -> str:
+        """Run container runtime command, and return its output."""
+        command: List[str] = [self.runtime, *args]
+        return subprocess.check_output(command, stderr=subprocess.DEVNULL).decode("utf-8")
+
+    def _container_state(self) -> Optional[str]:
+        """Return whether container is running, ``true`` or ``false``, None if it's missing."""
+        try:
+            return self._container(
+                "inspect", "--format", "{{.State.Running}}", self.container_name
+            ).strip()
+        except subprocess.CalledProcessError:
+            return None
+
+    def _published_port(self, port: int) -> int:
+        """Return host port the container's port is published on."""
+        output = self._container("port", self.container_name, f"{port}/tcp")
+        return int(output.splitlines()[0].rsplit(":", 1)[1])
+
+    def start_container(self) -> None:
+        """Run the container, unless it's running already, and find its ports."""
+        state = self._container_state()
+        if state is None:
+            try:
+                self._container(
+                    "run",
+                    "--detach",
+                    "--name",
+                    self.container_name,
+                    "--publish",
+                    f"{self.host}::{AMQP_PORT}",
+                    "--publish",
+                    f"{self.host}::{MANAGEMENT_PORT}",
+                    self.image,
+                )
+            except subprocess.CalledProcessError:
+                # created meanwhile, e.g. by another pytest-xdist worker
+                state = self._container_state()
+                if state is None:
+                    raise
+        if state == "false":
+            self._container("start", self.container_name)
+        self.port = self._published_port(AMQP_PORT)
+        self.management = ManagementClient(self.host, self._published_port(MANAGEMENT_PORT))
+
+    def start(self) -> "ContainerExecutor":
+        """Start container if needed, wait for the broker, and create a virtual host for tests."""
+        with recorder.measure("container.start"):
+            self.start_container()
+        super().start()
+        return self
+
+    def rabbitctl_output(self, *args: str) -> str:
+        """Run rabbitmqctl within the container.
+
+        :param list args: list of additional args to query
+        """
+        with recorder.measure(f"rabbitmqctl.{args[0] if args else ''}"):
+            return self._container("exec", self.container_name, "rabbitmqctl", *args)
@@ -0,0 +1,51 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Fixtures depending on other fixtures, known only by name."""
+
+from inspect import Parameter, signature
+from typing import Any, Callable, TypeVar
+
+FixtureFunction = TypeVar("FixtureFunction", bound=Callable[..., Any])
+
+
+def depends_on(*fixture_names: str) -> Callable[[FixtureFunction], FixtureFunction]:
+    """Declare fixtures, named by factory's arguments, as arguments of decorated fixture.
+
+    Pytest tells what a fixture depends on from its signature. Fixture
+    factories learn names of fixtures to use only when called, so decorated
+    fixture gets them added to its signature, and receives their values as
+    keyword arguments. Unlike fixtures loaded with ``request.getfixturevalue``,
+    these are part of the closure of fixtures every test requests, which
+    e.g. tells warm up which nodes collected tests are going to use.
+
+    :param fixture_names: names of fixtures decorated fixture depends on
+    """
+
+    def decorate(func: FixtureFunction) -> FixtureFunction:
+        parameters = [
+            parameter
+            for parameter in signature(func).parameters.values()
+            if parameter.kind != Parameter.VAR_KEYWORD
+        ]
+        parameters += [Parameter(name, Parameter.KEYWORD_ONLY) for name in fixture_names]
+        func.__signature__ = signature(func).replace(  # type: ignore[attr-defined]
+            parameters=parameters
+        )
+        return func
+
+    return decorate
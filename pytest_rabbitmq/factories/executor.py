@@ -1,18 +1,109 @@
 """RabbitMQ Executor."""
 
-import re
+import json
+import logging
+import os
+import signal
 import subprocess
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
+from queue import SimpleQueue
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from urllib.parse import quote
 
 from mirakuru import TCPExecutor
+from mirakuru.base import ENV_UUID
+from mirakuru.exceptions import ProcessExitedWithError, TimeoutExpired
+from pika import BlockingConnection, ConnectionParameters
+from pika.credentials import PlainCredentials
+from pika.exceptions import AMQPError, ChannelClosedByBroker
+
+from pytest_rabbitmq.bulk import bulk_delete
+from pytest_rabbitmq.channels import AsyncConnection
+from pytest_rabbitmq.definitions import DEFAULT_VHOST, vhost_definitions
+from pytest_rabbitmq.logs import STARTUP_COMPLETE, LogFollower, LogTailer
+from pytest_rabbitmq.management import (
+    MANAGEMENT_PLUGIN,
+    ManagementClient,
+    ManagementError,
+    enable_plugins,
+)
+from pytest_rabbitmq.snapshot import (
+    DEFINITION_KEYS,
+    TOPOLOGY,
+    DefinitionsDiff,
+    diff_definitions,
+    management_deletion,
+    rabbitmqctl_deletion,
+    vhost_scoped,
+)
+from pytest_rabbitmq.timing import recorder
+
+logger = logging.getLogger("pytest-rabbitmq")
+
+# keep references to processes started with start_detached,
+# so they are not reported as leaked while still running
+_DETACHED_PROCESSES: "List[subprocess.Popen[bytes]]" = []
+
+READINESS_STRATEGIES = ("port", "log", "amqp")
+
+ENTITY_COLUMNS = {
+    "exchanges": ("name", "type", "arguments"),
+    "queues": ("name", "messages", "consumers", "type", "arguments"),
+}
+"""Columns listed by default for each kind of entities."""
+
+
+class Entity(NamedTuple):
+    """Exchange or queue, with properties listed for it.
+
+    Properties not requested, or not reported by the broker yet, are None.
+    """
+
+    name: str
+    vhost: str
+    messages: Optional[int] = None
+    consumers: Optional[int] = None
+    type: Optional[str] = None
+    arguments: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], vhost: str) -> "Entity":
+        """Build entity from JSON record, returned by rabbitmqctl or management API."""
+        arguments = record.get("arguments")
+        if isinstance(arguments, list):
+            # rabbitmqctl lists arguments as key, value pairs
+            arguments = dict(arguments)
+        return cls(
+            name=record["name"],
+            vhost=record.get("vhost", vhost),
+            messages=record.get("messages"),
+            consumers=record.get("consumers"),
+            type=record.get("type"),
+            arguments=arguments,
+        )
+
+
+def parse_json_records(output: str) -> List[Dict[str, Any]]:
+    """Parse ``rabbitmqctl --formatter json`` output.
+
+    Recent versions print a single JSON array, older ones an object per line.
+    """
+    output = output.strip()
+    if not output:
+        return []
+    try:
+        records = json.loads(output)
+    except json.JSONDecodeError:
+        records = [json.loads(line) for line in output.splitlines() if line.strip()]
+    return records if isinstance(records, list) else [records]
 
 
 class RabbitMqExecutor(TCPExecutor):
     """RabbitMQ executor to start specific rabbitmq instances."""
 
-    _UNWANTED_QUEUE_PATTERN = re.compile("(done|timeout:|listing queues)")
-
     def __init__(
         self,
         command: str,
@@ -24,6 +115,16 @@ class RabbitMqExecutor(TCPExecutor):
         path: Path,
         plugin_path: Path,
         node_name: Optional[str] = None,
+        management_port: Optional[int] = None,
+        timeout: float = 60,
+        readiness: str = "port",
+        erlang_cookie: Optional[str] = None,
+        config_file: Optional[Path] = None,
+        advanced_config_file: Optional[Path] = None,
+        definitions_file: Optional[Path] = None,
+        erl_args: str = "",
+        cpu_affinity: Optional[str] = None,
+        log_lines: int = 1000,
     ) -> None:  # pylint:disable=too-many-arguments
         """Initialize RabbitMQ executor.
 
@@ -34,7 +135,32 @@ class RabbitMqExecutor(TCPExecutor):
         :param logpath:
         :param path: Path containing rabbitmq'a mnesia na plugins
         :param node_name: RabbitMQ node name
+        :param management_port: port for the management plugin's HTTP API.
+            When given, the management plugin gets enabled and is used
+            to list entities instead of rabbitmqctl.
+        :param timeout: seconds to wait for the node to start
+        :param readiness: how to tell the node is ready:
+
+            * ``port`` - AMQP port accepts TCP connections
+            * ``log`` - node logged its startup is complete
+            * ``amqp`` - AMQP handshake succeeds
+        :param erlang_cookie: Erlang cookie for the node and rabbitmqctl to use.
+            Nodes can only cluster when they share the same cookie.
+        :param config_file: rabbitmq.conf for the node to read
+        :param advanced_config_file: advanced.config for the node to read
+        :param definitions_file: definitions JSON file, the node imports on boot
+            when config_file sets ``load_definitions`` to it
+        :param erl_args: additional Erlang VM arguments for the node
+        :param cpu_affinity: CPUs to run the node on, as a list accepted
+            by ``taskset --cpu-list``
+        :param log_lines: number of most recent log lines to keep following
+            the node's log in background, 0 not to follow it
         """
+        if readiness not in READINESS_STRATEGIES:
+            raise ValueError(
+                f"Unknown readiness strategy {readiness!r}, "
+                f"choose one of: {', '.join(READINESS_STRATEGIES)}"
+            )
         envvars = {
             "RABBITMQ_LOG_BASE": str(logpath / f"rabbit-server.{port}.log"),
             "RABBITMQ_MNESIA_BASE": str(path / "mnesia"),
@@ -45,8 +171,186 @@ class RabbitMqExecutor(TCPExecutor):
             # at different ports will work separately instead of clustering.
             "RABBITMQ_NODENAME": node_name or f"rabbitmq-test-{port}",
         }
-        super().__init__(command, host, port, timeout=60, envvars=envvars)
+        if config_file:
+            envvars["RABBITMQ_CONFIG_FILE"] = str(config_file)
+        if advanced_config_file:
+            envvars["RABBITMQ_ADVANCED_CONFIG_FILE"] = str(advanced_config_file)
+        self.definitions_file = definitions_file
+        self.snapshot: Optional[Dict[str, Any]] = None
+        """Definitions exported by :meth:`take_snapshot`, to roll back to."""
+        self.snapshot_vhost: Optional[str] = None
+        """Virtual host snapshot and rollback are limited to, e.g. on a node shared
+        with other workers. The whole node is rolled back, if None."""
+        self.erlang_cookie = erlang_cookie
+        self.cookie_file: Optional[Path] = None
+        if erlang_cookie:
+            # Erlang reads the cookie from $HOME, for both the node and rabbitmqctl
+            envvars["HOME"] = str(path)
+            self.cookie_file = path / ".erlang.cookie"
+        self.mnesia_base = path / "mnesia"
+        self.distribution_port = distribution_port
+        self.node_name = envvars["RABBITMQ_NODENAME"]
+        self.vhost = "/"
+        """Virtual host client fixtures connect to."""
+        self.plugins_file = plugin_path / "plugins"
+        """Enabled plugins file the node starts from, never written to."""
+        self.node_plugins_file: Optional[Path] = None
+        """Node's own copy of enabled plugins file, when it enables more plugins."""
+        self.management: Optional[ManagementClient] = None
+        additional_erl_args = [erl_args] if erl_args else []
+        if management_port:
+            self.node_plugins_file = path / "enabled_plugins"
+            envvars["RABBITMQ_ENABLED_PLUGINS_FILE"] = str(self.node_plugins_file)
+            additional_erl_args.append(
+                f"-rabbitmq_management tcp_config [{{port,{management_port}}}]"
+            )
+            self.management = ManagementClient(host, management_port)
+        if additional_erl_args:
+            envvars["RABBITMQ_SERVER_ADDITIONAL_ERL_ARGS"] = " ".join(additional_erl_args)
+        # reading new lines of the log is cheap, it can be checked often
+        sleep = 0.02 if readiness == "log" else 0.1
+        super().__init__(command, host, port, timeout=timeout, sleep=sleep, envvars=envvars)
+        self.server = command
+        """rabbitmq-server location, without anything it's started through."""
+        if cpu_affinity:
+            # affinity is inherited by the Erlang VM rabbitmq-server starts
+            self.command_parts = ["taskset", "--cpu-list", cpu_affinity, *self.command_parts]
         self.rabbit_ctl = rabbit_ctl
+        self.readiness = readiness
+        self.log_follower = LogFollower(logpath / f"rabbit-server.{port}.log")
+        self.log_tailer: Optional[LogTailer] = None
+        """Follows the log of a node this executor started, if enabled."""
+        if log_lines:
+            self.log_tailer = LogTailer(
+                logpath / f"rabbit-server.{port}.log", self.node_name, log_lines
+            )
+        self.boot_phases: Dict[str, float] = {}
+        """Seconds from spawning the node to each observed boot phase."""
+        self._spawned_at = 0.0
+        self._next_amqp_attempt = 0.0
+        self._entities_cache: Dict[
+            Tuple[str, Tuple[str, ...], Tuple[str, ...]], Tuple[float, List[Entity]]
+        ] = {}
+        self._vhosts_to_delete: "SimpleQueue[str]" = SimpleQueue()
+        self._vhost_reaper: Optional[threading.Thread] = None
+
+    def start(self) -> "RabbitMqExecutor":
+        """Start RabbitMQ, enabling management plugin beforehand if requested."""
+        self._prepare()
+        self._reset_boot_phases()
+        with recorder.measure("node.start"):
+            super().start()
+        logger.info(f"RabbitMQ node {self.node_name} boot phases: {self.boot_phases}")
+        if self.log_tailer:
+            self.log_tailer.start()
+        return self
+
+    def stop(self, *args: Any, **kwargs: Any) -> "RabbitMqExecutor":
+        """Stop RabbitMQ, measuring how long it takes."""
+        try:
+            with recorder.measure("node.stop"):
+                super().stop(*args, **kwargs)
+        finally:
+            if self.log_tailer:
+                self.log_tailer.stop()
+        return self
+
+    def _prepare(self) -> None:
+        """Write files the node reads on boot."""
+        if self.node_plugins_file:
+            enable_plugins(self.plugins_file, self.node_plugins_file, MANAGEMENT_PLUGIN)
+        if self.cookie_file and self.erlang_cookie:
+            if self.cookie_file.exists():
+                self.cookie_file.chmod(0o600)
+            self.cookie_file.write_text(self.erlang_cookie)
+            # Erlang refuses cookie files readable by others
+            self.cookie_file.chmod(0o400)
+
+    def _reset_boot_phases(self) -> None:
+        """Start measuring boot phases anew."""
+        self.boot_phases = {}
+        self._spawned_at = time.monotonic()
+        self._next_amqp_attempt = 0.0
+        # only startup lines of this boot count, not ones left by an earlier one
+        self.log_follower.skip_existing()
+
+    def _mark(self, phase: str) -> None:
+        """Record time elapsed since spawn, when phase is observed first."""
+        self.boot_phases.setdefault(phase, time.monotonic() - self._spawned_at)
+
+    def after_start_check(self) -> bool:
+        """Check whether node is ready, according to chosen readiness strategy."""
+        if self.readiness == "log":
+            for line in self.log_follower.read_lines():
+                if STARTUP_COMPLETE.search(line):
+                    self._mark("startup_complete")
+                    break
+            ready = "startup_complete" in self.boot_phases
+        else:
+            ready = super().after_start_check()
+            if ready:
+                self._mark("port_open")
+            if ready and self.readiness == "amqp":
+                ready = self._amqp_handshake()
+        if ready:
+            self._mark("ready")
+        return ready
+
+    def _amqp_handshake(self) -> bool:
+        """Try to open AMQP connection, backing off after each failed attempt."""
+        now = time.monotonic()
+        if now < self._next_amqp_attempt:
+            return False
+        parameters = ConnectionParameters(
+            host=self.host,
+            port=self.port,
+            credentials=PlainCredentials("guest", "guest"),
+            connection_attempts=1,
+            socket_timeout=1,
+        )
+        try:
+            BlockingConnection(parameters).close()
+        except AMQPError:
+            # back off up to a second between attempts
+            backoff = min(max((now - self._spawned_at) / 4, self._sleep), 1.0)
+            self._next_amqp_attempt = now + backoff
+            return False
+        self._mark("amqp_ready")
+        return True
+
+    def start_detached(self) -> int:
+        """Start RabbitMQ in its own session, not bound to this process' lifetime.
+
+        Unlike :meth:`start`, the node is left running when this executor
+        gets garbage collected, or the interpreter exits.
+
+        :returns: pid of started process, also its process group id
+        :raises TimeoutExpired: when node does not become ready in time
+        """
+        self._prepare()
+        self._reset_boot_phases()
+        env = {key: value for key, value in self._popen_kwargs["env"].items() if key != ENV_UUID}
+        process = subprocess.Popen(  # pylint:disable=consider-using-with
+            self.command_parts,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        _DETACHED_PROCESSES.append(process)
+        self._set_timeout()
+        with recorder.measure("node.start"):
+            while self.check_timeout():
+                if process.poll() is not None:
+                    raise ProcessExitedWithError(self, process.returncode)
+                if self.after_start_check():
+                    if self.log_tailer:
+                        self.log_tailer.start()
+                    return process.pid
+                time.sleep(self._sleep)
+        os.killpg(process.pid, signal.SIGKILL)
+        raise TimeoutExpired(self, timeout=self._timeout)
 
     def rabbitctl_output(self, *args: str) -> str:
         """Query rabbitctl with args.
@@ -55,27 +359,350 @@ class RabbitMqExecutor(TCPExecutor):
         """
         ctl_command: List[str] = [self.rabbit_ctl]
         ctl_command.extend(args)
-        return subprocess.check_output(ctl_command, env=self._popen_kwargs["env"]).decode("utf-8")
+        with recorder.measure(f"rabbitmqctl.{args[0] if args else ''}"):
+            output = subprocess.check_output(ctl_command, env=self._popen_kwargs["env"])
+        return output.decode("utf-8")
 
-    def list_exchanges(self) -> List[str]:
-        """Get exchanges defined on given rabbitmq."""
-        exchanges: List[str] = []
-        output = self.rabbitctl_output("list_exchanges", "name")
-        unwanted_exchanges = ["Listing exchanges for vhost / ...", "...done."]
+    def list_entities(
+        self,
+        kind: str,
+        columns: Optional[Sequence[str]] = None,
+        vhosts: Optional[Sequence[str]] = None,
+        max_age: float = 0.0,
+    ) -> List[Entity]:
+        """List exchanges or queues, along with their properties.
 
-        for exchange in output.split("\n"):
-            if exchange and exchange not in unwanted_exchanges:
-                exchanges.append(str(exchange))
+        Uses the management API when available, and ``rabbitmqctl`` with
+        JSON output otherwise. Management API lists several virtual hosts
+        in a single request, ``rabbitmqctl`` needs a call per virtual host.
 
-        return exchanges
+        Callers passing ``max_age`` opt into keeping results, so that repeated
+        assertions can share a single query. Kept results are dropped by
+        :meth:`invalidate_entities`, which client fixtures call whenever they
+        know entities changed. Calls without ``max_age`` neither reuse nor keep
+        results, as entities may change by means no fixture knows about.
 
-    def list_queues(self) -> List[str]:
-        """Get queues defined on given rabbitmq."""
-        queues: List[str] = []
-        output = self.rabbitctl_output("list_queues", "name")
+        :param kind: ``exchanges`` or ``queues``
+        :param columns: properties to list, defaults to all known for given kind
+        :param vhosts: virtual hosts to list entities of, defaults to executor's one
+        :param max_age: seconds for which previously listed result is still good,
+            by default entities are always listed anew
+        """
+        if kind not in ENTITY_COLUMNS:
+            raise ValueError(f"Unknown kind {kind!r}, choose one of: {', '.join(ENTITY_COLUMNS)}")
+        columns = tuple(dict.fromkeys(["name", *(columns or ENTITY_COLUMNS[kind])]))
+        vhosts = tuple(vhosts or (self.vhost,))
+        key = (kind, columns, vhosts)
+        cached = self._entities_cache.get(key)
+        if max_age and cached and time.monotonic() - cached[0] <= max_age:
+            return list(cached[1])
+
+        entities = self._list_entities_with_management(kind, columns, vhosts)
+        if entities is None:
+            entities = []
+            for vhost in vhosts:
+                output = self.rabbitctl_output(
+                    f"list_{kind}", "-p", vhost, "--formatter", "json", "--silent", *columns
+                )
+                entities.extend(
+                    Entity.from_record(record, vhost) for record in parse_json_records(output)
+                )
+        if max_age:
+            self._entities_cache[key] = (time.monotonic(), entities)
+        return list(entities)
+
+    def _list_entities_with_management(
+        self, kind: str, columns: Tuple[str, ...], vhosts: Tuple[str, ...]
+    ) -> Optional[List[Entity]]:
+        """List entities over management API.
+
+        :returns: entities or None, if management API is not available.
+        """
+        if not self.management:
+            return None
+        try:
+            if len(vhosts) == 1:
+                records = self.management.list_entities(kind, columns, vhosts[0])
+            else:
+                records = [
+                    record
+                    for record in self.management.list_entities(kind, columns)
+                    if record["vhost"] in vhosts
+                ]
+        except ManagementError as exc:
+            logger.warning(f"Falling back to rabbitmqctl, management API unavailable: {exc}")
+            return None
+        return [Entity.from_record(record, vhosts[0]) for record in records]
+
+    def import_definitions(
+        self, definitions: Optional[Dict[str, Any]] = None, vhost: Optional[str] = None
+    ) -> None:
+        """Import definitions, by default node's definitions file again.
 
-        for queue in output.split("\n"):
-            if queue and not self._UNWANTED_QUEUE_PATTERN.search(queue.strip(". ").lower()):
-                queues.append(str(queue))
+        Import only adds and updates, entities missing from the definitions are kept.
+        Node's definitions file imported into a virtual host other than the default
+        one brings there what the default one got on boot: policies, parameters,
+        exchanges, queues and bindings.
+
+        :param definitions: definitions to import instead of node's definitions file
+        :param vhost: virtual host to import node's definitions file into,
+            defaults to executor's one
+        """
+        if definitions is None:
+            if not self.definitions_file:
+                return
+            definitions = json.loads(self.definitions_file.read_text())
+            vhost = vhost or self.vhost
+            if vhost != DEFAULT_VHOST:
+                definitions = vhost_definitions(definitions, vhost)
+        self.invalidate_entities()
+        if self.management:
+            try:
+                self.management.request("POST", "definitions", definitions)
+                return
+            except ManagementError as exc:
+                logger.warning(f"Falling back to rabbitmqctl, management API unavailable: {exc}")
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as definitions_file:
+            json.dump(definitions, definitions_file)
+            definitions_file.flush()
+            self.rabbitctl_output("import_definitions", definitions_file.name)
+
+    def export_definitions(self) -> Dict[str, Any]:
+        """Export definitions of everything the node holds, but messages."""
+        if self.management:
+            try:
+                exported: Dict[str, Any] = self.management.request("GET", "definitions")
+                return exported
+            except ManagementError as exc:
+                logger.warning(f"Falling back to rabbitmqctl, management API unavailable: {exc}")
+        exported = json.loads(
+            self.rabbitctl_output("export_definitions", "-", "--format", "json", "--silent")
+        )
+        return exported
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        """Export definitions, for :meth:`rollback` to bring the node back to.
+
+        Only definitions of :attr:`snapshot_vhost` are kept, when it's set.
+        """
+        with recorder.measure("snapshot.take"):
+            self.snapshot = self._snapshot_definitions()
+        return self.snapshot
+
+    def _snapshot_definitions(self) -> Dict[str, Any]:
+        """Export definitions snapshot and rollback are limited to."""
+        definitions = self.export_definitions()
+        if self.snapshot_vhost is not None:
+            definitions = vhost_scoped(definitions, self.snapshot_vhost)
+        return definitions
+
+    def rollback(self) -> DefinitionsDiff:
+        """Bring the node back to the snapshot, reverting only what changed since.
+
+        Users, virtual hosts, permissions, policies, parameters, exchanges,
+        queues and bindings are compared with the snapshot. Added entities
+        are deleted, removed or changed ones are imported again. Exchanges
+        and queues are deleted over AMQP, everything else over management
+        API, or with ``rabbitmqctl``.
+
+        Messages are not part of the snapshot, client fixtures purge them.
+        With :attr:`snapshot_vhost` set, entities of other virtual hosts, and
+        users and virtual hosts themselves, are left alone.
+
+        :returns: what was reverted
+        :raises RuntimeError: when no snapshot was taken
+        """
+        if self.snapshot is None:
+            raise RuntimeError("No snapshot to roll back to, take_snapshot first")
+        with recorder.measure("snapshot.rollback"):
+            diff = diff_definitions(self.snapshot, self._snapshot_definitions())
+            if not diff:
+                return diff
+            self.invalidate_entities()
+            # users and virtual hosts first, to delete exchanges and queues as guest
+            restored = {
+                kind: entities
+                for kind, entities in diff.restore.items()
+                if entities and kind not in TOPOLOGY
+            }
+            if restored:
+                self.import_definitions(restored)
+            deleted_vhosts = {vhost["name"] for vhost in diff.delete["vhosts"]}
+            self._delete_topology(diff.delete, deleted_vhosts)
+            for kind in reversed(DEFINITION_KEYS):
+                if kind in TOPOLOGY:
+                    continue
+                for entity in diff.delete[kind]:
+                    # deleted along with their virtual host
+                    if entity.get("vhost") not in deleted_vhosts:
+                        self._delete_definition(kind, entity)
+            restored = {kind: diff.restore[kind] for kind in TOPOLOGY if diff.restore[kind]}
+            if restored:
+                self.import_definitions(restored)
+        return diff
+
+    def _delete_topology(
+        self, delete: Dict[str, List[Dict[str, Any]]], deleted_vhosts: Set[str]
+    ) -> None:
+        """Delete bindings, exchanges and queues, over a connection to each virtual host."""
+        vhosts = {
+            entity["vhost"]
+            for kind in TOPOLOGY
+            for entity in delete[kind]
+            if entity["vhost"] not in deleted_vhosts
+        }
+        for vhost in vhosts:
+            parameters = ConnectionParameters(
+                host=self.host,
+                port=self.port,
+                virtual_host=vhost,
+                credentials=PlainCredentials("guest", "guest"),
+            )
+            connection = BlockingConnection(parameters)
+            try:
+                channel = connection.channel()
+                for binding in delete["bindings"]:
+                    if binding["vhost"] != vhost:
+                        continue
+                    unbind = (
+                        channel.queue_unbind
+                        if binding["destination_type"] == "queue"
+                        else channel.exchange_unbind
+                    )
+                    try:
+                        unbind(
+                            binding["destination"],
+                            binding["source"],
+                            binding["routing_key"],
+                            binding.get("arguments") or None,
+                        )
+                    except ChannelClosedByBroker as exc:
+                        logger.warning(f"Could not remove binding {binding}: {exc}")
+                        channel = connection.channel()
+                deletions = [
+                    (kind[:-1], entity["name"])
+                    for kind in ("exchanges", "queues")
+                    for entity in delete[kind]
+                    if entity["vhost"] == vhost
+                ]
+                with AsyncConnection(parameters) as bulk_connection:
+                    failures = bulk_delete(bulk_connection, deletions)
+                for failure in failures:
+                    logger.warning(
+                        f"Could not delete {failure.kind} {failure.name} from {vhost}: "
+                        f"{failure.reply_code} {failure.reply_text}"
+                    )
+            finally:
+                connection.close()
+
+    def _delete_definition(self, kind: str, entity: Dict[str, Any]) -> None:
+        """Delete user, virtual host, permissions, policy or parameter."""
+        if self.management:
+            try:
+                self.management.request("DELETE", management_deletion(kind, entity))
+                return
+            except ManagementError as exc:
+                logger.warning(f"Falling back to rabbitmqctl, management API unavailable: {exc}")
+        self.rabbitctl_output(*rabbitmqctl_deletion(kind, entity))
+
+    def invalidate_entities(self) -> None:
+        """Drop results kept by :meth:`list_entities`."""
+        self._entities_cache.clear()
+
+    def list_exchanges(self, vhost: Optional[str] = None, max_age: float = 0.0) -> List[str]:
+        """Get exchanges defined on given rabbitmq.
+
+        :param vhost: virtual host to list exchanges of, defaults to executor's one
+        :param max_age: seconds for which previously listed exchanges are still good,
+            see :meth:`list_entities`
+        """
+        vhost = vhost or self.vhost
+        # default exchange is nameless
+        return [
+            exchange.name
+            for exchange in self.list_entities("exchanges", ["name"], [vhost], max_age)
+            if exchange.name
+        ]
+
+    def list_queues(self, vhost: Optional[str] = None, max_age: float = 0.0) -> List[str]:
+        """Get queues defined on given rabbitmq.
+
+        :param vhost: virtual host to list queues of, defaults to executor's one
+        :param max_age: seconds for which previously listed queues are still good,
+            see :meth:`list_entities`
+        """
+        vhost = vhost or self.vhost
+        return [queue.name for queue in self.list_entities("queues", ["name"], [vhost], max_age)]
+
+    def add_vhost(self, vhost: str, user: str = "guest") -> None:
+        """Create virtual host and grant user full permissions to it.
+
+        :param vhost: name of virtual host to create
+        :param user: user to grant permissions to
+        """
+        self.invalidate_entities()
+        if self.management:
+            quoted = quote(vhost, safe="")
+            try:
+                self.management.request("PUT", f"vhosts/{quoted}")
+                self.management.request(
+                    "PUT",
+                    f"permissions/{quoted}/{quote(user, safe='')}",
+                    {"configure": ".*", "write": ".*", "read": ".*"},
+                )
+                return
+            except ManagementError as exc:
+                logger.warning(f"Falling back to rabbitmqctl, management API unavailable: {exc}")
+        self.rabbitctl_output("add_vhost", vhost)
+        self.rabbitctl_output("set_permissions", "-p", vhost, user, ".*", ".*", ".*")
+
+    def delete_vhost(self, vhost: str) -> None:
+        """Delete virtual host, along with everything declared within.
+
+        :param vhost: name of virtual host to delete
+        """
+        self.invalidate_entities()
+        if self.management:
+            try:
+                self.management.request("DELETE", f"vhosts/{quote(vhost, safe='')}")
+                return
+            except ManagementError as exc:
+                logger.warning(f"Falling back to rabbitmqctl, management API unavailable: {exc}")
+        self.rabbitctl_output("delete_vhost", vhost)
+
+    def reset_vhost(self, vhost: Optional[str] = None) -> None:
+        """Remove everything from virtual host, by recreating it.
+
+        Topology from node's definitions file, if there's one, gets imported again.
+
+        :param vhost: name of virtual host to reset, defaults to executor's one
+        """
+        vhost = vhost or self.vhost
+        self.delete_vhost(vhost)
+        self.add_vhost(vhost)
+        self.import_definitions(vhost=vhost)
+
+    def delete_vhost_later(self, vhost: str) -> None:
+        """Schedule virtual host deletion on a background thread.
+
+        Lets the test run finish without waiting for the broker
+        to drop everything that lived in given virtual host.
+
+        :param vhost: name of virtual host to delete
+        """
+        self.invalidate_entities()
+        self._vhosts_to_delete.put(vhost)
+        if self._vhost_reaper is None:
+            self._vhost_reaper = threading.Thread(
+                target=self._reap_vhosts, name=f"rabbitmq-vhost-reaper-{self.port}", daemon=True
+            )
+            self._vhost_reaper.start()
 
-        return queues
+    def _reap_vhosts(self) -> None:
+        """Delete virtual hosts as they get scheduled for deletion."""
+        while True:
+            vhost = self._vhosts_to_delete.get()
+            try:
+                self.delete_vhost(vhost)
+            except (subprocess.CalledProcessError, OSError) as exc:
+                logger.warning(f"Could not delete virtual host {vhost}: {exc}")
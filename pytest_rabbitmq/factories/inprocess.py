@@ -0,0 +1,59 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""In-process AMQP broker fixture factory."""
+
+from typing import Callable, Generator, Optional
+
+import pytest
+from pytest import FixtureRequest
+
+from pytest_rabbitmq.broker import InProcessBroker
+from pytest_rabbitmq.factories.process import get_config
+
+
+def rabbitmq_inprocess_proc(
+    host: Optional[str] = None, port: Optional[int] = None
+) -> Callable[[FixtureRequest], Generator[InProcessBroker, None, None]]:
+    """Fixture factory for an AMQP broker, served from the test process itself.
+
+    Starts in milliseconds, and needs no RabbitMQ installed, at the cost of
+    covering only the core of AMQP 0-9-1, see :mod:`pytest_rabbitmq.broker`.
+    It can stand in for :func:`rabbitmq_proc` as the process fixture
+    of :func:`rabbitmq` client fixtures.
+
+    :param host: host to listen on
+    :param port: port to listen on, a random free one if not given
+    :returns: pytest fixture with in-process broker
+    """
+
+    @pytest.fixture(scope="session")
+    def rabbitmq_inprocess_proc_fixture(
+        request: FixtureRequest,
+    ) -> Generator[InProcessBroker, None, None]:
+        """Fixture for in-process AMQP broker.
+
+        :param request: fixture request object
+        :returns: running in-process broker
+        """
+        config = get_config(request)
+        broker = InProcessBroker(host or config["host"], port or 0)
+        broker.start()
+        yield broker
+        broker.stop()
+
+    return rabbitmq_inprocess_proc_fixture
@@ -0,0 +1,238 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Keeping RabbitMQ node running between pytest invocations."""
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, Optional
+
+from pika import BlockingConnection, ConnectionParameters
+from pika.credentials import PlainCredentials
+from pika.exceptions import AMQPError
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.shared import NodeAddress, locked, node_address, pid_alive
+
+# keep references to started watchdogs, so they are not reported as leaked
+_WATCHDOGS: "List[subprocess.Popen[bytes]]" = []
+
+
+class KeptNode(NodeAddress):
+    """Description of a node left running for the next pytest invocations."""
+
+    fingerprint: str
+    pid: int
+    last_used: float
+    idle_timeout: float
+    sessions: Dict[str, int]
+    watchdog: int
+
+
+def _healthy(state: KeptNode) -> bool:
+    """Check whether kept node is alive and accepts AMQP connections."""
+    if not pid_alive(state["pid"]):
+        return False
+    parameters = ConnectionParameters(
+        host=state["host"],
+        port=state["port"],
+        credentials=PlainCredentials("guest", "guest"),
+        connection_attempts=1,
+        socket_timeout=2,
+    )
+    try:
+        BlockingConnection(parameters).close()
+    except AMQPError:
+        return False
+    return True
+
+
+def _group_running(pgid: int) -> bool:
+    """Tell whether any process of the group still runs, not counting zombies."""
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return True
+    for stat_path in proc.glob("[0-9]*/stat"):
+        try:
+            stat = stat_path.read_text()
+        except OSError:
+            # process exited meanwhile
+            continue
+        # state, parent pid and process group follow the command name
+        state, _ppid, pgrp = stat[stat.rfind(")") + 2 :].split()[:3]
+        if int(pgrp) == pgid and state != "Z":
+            return True
+    return False
+
+
+def _stop(pid: int, timeout: float = 30.0) -> None:
+    """Stop kept node, started in its own process group, and wait for the group to exit.
+
+    Group still running after timeout gets killed. Once this returns, node's data
+    directory, ports and name are free for a new node to use.
+
+    :param pid: pid of the node, also its process group id
+    :param timeout: seconds to wait for the node to stop gracefully
+    """
+    for sig, wait in ((signal.SIGTERM, timeout), (signal.SIGKILL, 5.0)):
+        try:
+            os.killpg(pid, sig)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + wait
+        while _group_running(pid):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        else:
+            return
+
+
+def _live_sessions(state: KeptNode) -> Dict[str, int]:
+    """Sessions using the node, that are still running."""
+    return {session: pid for session, pid in state["sessions"].items() if pid_alive(pid)}
+
+
+def keep_executor(
+    keep_dir: Path,
+    name: str,
+    fingerprint: str,
+    create: Callable[[Optional[NodeAddress]], RabbitMqExecutor],
+    idle_timeout: float,
+    snapshot: bool = False,
+) -> Generator[RabbitMqExecutor, None, None]:
+    """Reuse node left by previous pytest invocation, or start one that outlives this one.
+
+    Reused node is wiped by recreating the executor's virtual host. If another
+    pytest invocation uses the node at the same time, this one gets its own
+    virtual host instead. Either way, topology from node's definitions
+    file gets imported into the virtual host, and snapshot and rollback
+    are limited to it.
+
+    A watchdog process stops the node, once no invocation has used it
+    for ``idle_timeout`` seconds.
+
+    :param keep_dir: stable directory, holding node's description and data
+    :param name: name of the process fixture
+    :param fingerprint: identifies fixture configuration, node gets restarted
+        when it changes
+    :param create: creates executor for node at given address,
+        or for a brand new one, if None is passed
+    :param idle_timeout: seconds after which unused node gets stopped
+    :param snapshot: snapshot executor's virtual host, once it's set up
+    """
+    state_path = keep_dir / f"{name}.json"
+    lock_path = keep_dir / f"{name}.lock"
+    session = str(os.getpid())
+    with locked(lock_path):
+        state: Optional[KeptNode] = None
+        if state_path.exists():
+            state = json.loads(state_path.read_text())
+        if state and state["fingerprint"] == fingerprint and _healthy(state):
+            executor = create(state)
+            if _live_sessions(state):
+                executor.vhost = f"pytest-{session}"
+                executor.add_vhost(executor.vhost)
+                executor.import_definitions()
+            else:
+                executor.reset_vhost()
+        else:
+            if state:
+                _stop(state["pid"])
+            shutil.rmtree(keep_dir / name, ignore_errors=True)
+            executor = create(None)
+            state = {
+                **node_address(executor),
+                "fingerprint": fingerprint,
+                "pid": executor.start_detached(),
+                "last_used": time.time(),
+                "idle_timeout": idle_timeout,
+                "sessions": {},
+                "watchdog": 0,
+            }
+        if not pid_alive(state["watchdog"]):
+            watchdog = subprocess.Popen(  # pylint:disable=consider-using-with
+                [sys.executable, "-m", __name__, str(state_path)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            _WATCHDOGS.append(watchdog)
+            state["watchdog"] = watchdog.pid
+        state["sessions"] = {**_live_sessions(state), session: os.getpid()}
+        state["idle_timeout"] = idle_timeout
+        state_path.write_text(json.dumps(state))
+
+    # other invocations may use the node as well, leave their virtual hosts alone
+    executor.snapshot_vhost = executor.vhost
+    if snapshot:
+        executor.take_snapshot()
+    try:
+        yield executor
+    finally:
+        if executor.vhost != "/":
+            executor.delete_vhost(executor.vhost)
+        with locked(lock_path):
+            if state_path.exists():
+                state = json.loads(state_path.read_text())
+                assert state
+                state["sessions"].pop(session, None)
+                state["last_used"] = time.time()
+                state_path.write_text(json.dumps(state))
+
+
+def watch(state_path: Path, poll_interval: float = 5.0) -> None:
+    """Stop kept node once it's been idle for long enough.
+
+    Runs as a separate process, started along with the node.
+    """
+    lock_path = state_path.with_suffix(".lock")
+    while True:
+        time.sleep(poll_interval)
+        with locked(lock_path):
+            if not state_path.exists():
+                return
+            state: KeptNode = json.loads(state_path.read_text())
+            if state["watchdog"] != os.getpid():
+                # node got replaced, and is watched by another watchdog
+                return
+            if not pid_alive(state["pid"]):
+                state_path.unlink()
+                return
+            if _live_sessions(state):
+                continue
+            if time.time() - state["last_used"] > state["idle_timeout"]:
+                _stop(state["pid"])
+                state_path.unlink()
+                return
+
+
+if __name__ == "__main__":
+    watch(Path(sys.argv[1]))
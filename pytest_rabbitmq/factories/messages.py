@@ -0,0 +1,52 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Message helper fixture factory."""
+
+from typing import Any, Callable, Generator
+
+import pytest
+
+from pytest_rabbitmq.factories.client import client_parameters
+from pytest_rabbitmq.factories.dependencies import depends_on
+from pytest_rabbitmq.messages import MessageHelper
+
+
+def rabbitmq_messages(
+    client_fixture_name: str,
+) -> Callable[..., Generator[MessageHelper, None, None]]:
+    """Fixture factory for publishing and consuming messages in bulk.
+
+    :param client_fixture_name: name of client fixture, returned by
+        :func:`rabbitmq`, whose connection to use
+    :returns: pytest fixture with message helper
+    """
+
+    @pytest.fixture
+    @depends_on(client_fixture_name)
+    def rabbitmq_messages_fixture(**fixtures: Any) -> Generator[MessageHelper, None, None]:
+        """Fixture for message helper.
+
+        :param fixtures: client fixture, by its name
+        :returns: message helper, using client fixture's connection
+        """
+        connection = fixtures[client_fixture_name]
+        helper = MessageHelper(connection, client_parameters[connection])
+        yield helper
+        helper.close()
+
+    return rabbitmq_messages_fixture
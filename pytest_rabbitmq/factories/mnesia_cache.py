@@ -0,0 +1,130 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Cache of freshly initialised RabbitMQ data directories."""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from uuid import uuid4
+
+from mirakuru.exceptions import ProcessExitedWithError
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.management import MANAGEMENT_PLUGIN, read_plugins
+
+
+class MnesiaCache:
+    """Keeps copies of data directories of nodes that booted once and got stopped.
+
+    On first boot, RabbitMQ initialises its schema, which takes a good part of
+    the startup time. Restoring a copy of a data directory, that went through
+    it already, lets the node skip that.
+
+    Entries are keyed by the server installation, the node name, enabled
+    plugins and definitions loaded on boot, since the data directory is bound
+    to the node name, and upgrading RabbitMQ changes the server's path or
+    modification time. Nodes named after a random port never hit the cache,
+    and are started without it. Least recently used entries get evicted
+    beyond ``max_entries``.
+
+    .. note::
+
+        Entries are copied, not hardlinked, since the node writes to its
+        data files in place, and would corrupt the cached copy.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 3) -> None:
+        """Initialize cache.
+
+        :param cache_dir: directory to keep data directory copies in
+        :param max_entries: how many data directories to keep
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(executor: RabbitMqExecutor) -> str:
+        """Compute cache key of an executor's data directory."""
+        server = Path(shutil.which(executor.server) or executor.server).resolve()
+        server_stat = server.stat()
+        plugins = set(read_plugins(executor.plugins_file))
+        if executor.management:
+            plugins.add(MANAGEMENT_PLUGIN)
+        parts = [
+            str(server),
+            str(server_stat.st_size),
+            str(server_stat.st_mtime_ns),
+            executor.node_name,
+            ",".join(sorted(plugins)),
+        ]
+        if executor.definitions_file:
+            # data directory holds topology imported from definitions
+            parts.append(hashlib.sha256(executor.definitions_file.read_bytes()).hexdigest())
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:32]
+
+    def restore(self, key: str, mnesia_base: Path) -> bool:
+        """Copy cached data directory into given location.
+
+        :returns: whether there was an entry to restore
+        """
+        entry = self.cache_dir / key
+        if not entry.is_dir():
+            return False
+        shutil.copytree(entry, mnesia_base, symlinks=True, dirs_exist_ok=True)
+        # mark entry as recently used
+        os.utime(entry)
+        return True
+
+    def store(self, key: str, mnesia_base: Path) -> None:
+        """Store data directory under given key, and evict the stale ones."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = self.cache_dir / f".{key}-{uuid4().hex}"
+        shutil.copytree(mnesia_base, staging, symlinks=True)
+        try:
+            # rename is atomic, whoever stores the same entry first wins
+            staging.rename(self.cache_dir / key)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries above the limit."""
+        entries = sorted(
+            (entry for entry in self.cache_dir.iterdir() if not entry.name.startswith(".")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in entries[self.max_entries :]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def prepare(self, executor: RabbitMqExecutor) -> None:
+        """Fill executor's data directory from cache.
+
+        On a cache miss, boot the node once, stop it, and cache
+        the resulting data directory before it's used by any test.
+        """
+        key = self.key(executor)
+        if self.restore(key, executor.mnesia_base):
+            return
+        executor.start()
+        try:
+            executor.stop()
+        except ProcessExitedWithError:
+            pass
+        self.store(key, executor.mnesia_base)
@@ -0,0 +1,106 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Attaching to an already running RabbitMQ, instead of starting one."""
+
+import time
+from pathlib import Path
+from typing import Any, Optional
+from uuid import uuid4
+
+from mirakuru.exceptions import TimeoutExpired
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.timing import recorder
+
+
+class NoProcExecutor(RabbitMqExecutor):
+    """Executor for a RabbitMQ broker running already, e.g. as a system service.
+
+    Nothing gets started or stopped. Instead, starting waits for the broker
+    to accept AMQP connections and creates a virtual host for client fixtures
+    to connect to, stopping deletes it, so that tests are isolated from
+    everything else the broker holds.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        rabbit_ctl: str,
+        path: Path,
+        node_name: Optional[str] = None,
+        management_port: Optional[int] = None,
+        timeout: float = 60,
+    ) -> None:  # pylint:disable=too-many-arguments
+        """Initialize executor.
+
+        :param host: host the broker listens on
+        :param port: AMQP port of the broker
+        :param rabbit_ctl: rabbitmqctl location, used when management API isn't available
+        :param path: directory for files the executor writes
+        :param node_name: name of broker's node, for rabbitmqctl to talk to,
+            rabbitmqctl's default if not given
+        :param management_port: port of broker's management API, to use
+            instead of rabbitmqctl
+        :param timeout: seconds to wait for the broker to accept connections
+        """
+        super().__init__(
+            "rabbitmq-server",
+            host,
+            port,
+            0,
+            rabbit_ctl,
+            logpath=path,
+            path=path,
+            plugin_path=path,
+            node_name=node_name,
+            management_port=management_port,
+            timeout=timeout,
+            readiness="amqp",
+            log_lines=0,
+        )
+        # rabbitmqctl talks to the running node, not the one this executor would start
+        self._envvars = {"RABBITMQ_NODENAME": node_name} if node_name else {}
+        self._attached = False
+
+    def start(self) -> "NoProcExecutor":
+        """Wait for the broker to accept connections, and create a virtual host for tests."""
+        self._reset_boot_phases()
+        self._set_timeout()
+        with recorder.measure("node.start"):
+            while not self.after_start_check():
+                if not self.check_timeout():
+                    raise TimeoutExpired(self, timeout=self._timeout)
+                time.sleep(self._sleep)
+            self.vhost = f"pytest-{uuid4().hex}"
+            self.add_vhost(self.vhost)
+        self._attached = True
+        return self
+
+    def stop(self, *args: Any, **kwargs: Any) -> "NoProcExecutor":
+        """Delete virtual host created for tests, leaving the broker running."""
+        if self._attached:
+            with recorder.measure("node.stop"):
+                self.delete_vhost(self.vhost)
+            self.vhost = "/"
+            self._attached = False
+        return self
+
+    def running(self) -> bool:
+        """Tell whether executor is attached to the broker."""
+        return self._attached
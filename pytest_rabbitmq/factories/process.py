@@ -17,26 +17,53 @@
 # along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
 """RabbitMQ process fixture factory."""
 
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from types import ModuleType
 from typing import (
     Any,
     Callable,
+    Dict,
     Generator,
     List,
     Optional,
+    Sequence,
     Set,
     Tuple,
     TypedDict,
     Union,
+    cast,
 )
 from warnings import warn
+from weakref import WeakSet
 
 import pytest
 from mirakuru.exceptions import ProcessExitedWithError
 from port_for import get_port
-from pytest import FixtureRequest, TempPathFactory
+from pytest import Config, FixtureRequest, Item, Session, TempPathFactory
 
+from pytest_rabbitmq.definitions import Definitions, load_definitions, write_definitions
+from pytest_rabbitmq.factories.container import ContainerExecutor
 from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.keepalive import keep_executor
+from pytest_rabbitmq.factories.mnesia_cache import MnesiaCache
+from pytest_rabbitmq.factories.noproc import NoProcExecutor
+from pytest_rabbitmq.factories.shared import NodeAddress, share_executor
+from pytest_rabbitmq.management import management_available
+from pytest_rabbitmq.profiles import (
+    FAST_ADVANCED_CONFIG,
+    fast_config,
+    node_resources,
+    ram_directory,
+    resources_config,
+    resources_erl_args,
+    write_config,
+)
 
 PortType = Union[
     None,
@@ -64,6 +91,61 @@ class RabbitMQConfig(TypedDict):
     ctl: str
     node: str
     plugindir: Path
+    management: Optional[bool]
+    management_port: PortType
+    xdist_shared: bool
+    mnesia_cache: bool
+    keepalive: bool
+    keepalive_timeout: float
+    startup_timeout: float
+    readiness: str
+    fast: bool
+    definitions: Optional[Path]
+    warm_up: bool
+    small: bool
+    schedulers: Optional[int]
+    async_threads: Optional[int]
+    erl_args: str
+    memory_high_watermark: Optional[str]
+    cpu_affinity: Optional[str]
+    snapshot: bool
+    log_lines: int
+    backend: str
+    container_image: str
+
+
+class ProcessOptions(TypedDict, total=False):
+    """Options of a single RabbitMQ process, as accepted by :func:`rabbitmq_proc`."""
+
+    server: Optional[str]
+    host: Optional[str]
+    port: PortType
+    distribution_port: PortType
+    node: Optional[str]
+    ctl: Optional[str]
+    logsdir: Optional[Path]
+    plugindir: Optional[Path]
+    management: Optional[bool]
+    management_port: PortType
+    xdist_shared: Optional[bool]
+    mnesia_cache: Optional[bool]
+    keepalive: Optional[bool]
+    keepalive_timeout: Optional[float]
+    startup_timeout: Optional[float]
+    readiness: Optional[str]
+    fast: Optional[bool]
+    definitions: Optional[Definitions]
+    warm_up: Optional[bool]
+    small: Optional[bool]
+    schedulers: Optional[int]
+    async_threads: Optional[int]
+    erl_args: Optional[str]
+    memory_high_watermark: Optional[str]
+    cpu_affinity: Optional[str]
+    snapshot: Optional[bool]
+    log_lines: Optional[int]
+    backend: Optional[str]
+    container_image: Optional[str]
 
 
 def get_config(request: FixtureRequest) -> RabbitMQConfig:
@@ -76,6 +158,18 @@ def get_config(request: FixtureRequest) -> RabbitMQConfig:
     port = get_conf_option("port")
     distribution_port = get_conf_option("distribution_port")
     logsdir = get_conf_option("logsdir")
+    management_port = get_conf_option("management_port")
+    definitions = get_conf_option("definitions")
+    management = request.config.getoption("rabbitmq_management")
+    if management is None:
+        # False turns the plugin off, falling back to ini only when option is missing
+        management = request.config.getini("rabbitmq_management")
+    log_lines = request.config.getoption("rabbitmq_log_lines")
+    if log_lines is None:
+        # 0 is a valid value, falling back to ini only when option is missing
+        log_lines = request.config.getini("rabbitmq_log_lines")
+    schedulers = get_conf_option("schedulers")
+    async_threads = get_conf_option("async_threads")
     config: RabbitMQConfig = {
         "host": get_conf_option("host"),
         "port": int(port) if port else None,
@@ -85,10 +179,290 @@ def get_config(request: FixtureRequest) -> RabbitMQConfig:
         "ctl": get_conf_option("ctl"),
         "node": get_conf_option("node"),
         "plugindir": Path(get_conf_option("plugindir")),
+        "management": management,
+        "management_port": int(management_port) if management_port else None,
+        "xdist_shared": bool(get_conf_option("xdist_shared")),
+        "mnesia_cache": bool(get_conf_option("mnesia_cache")),
+        "keepalive": bool(get_conf_option("keepalive")),
+        "keepalive_timeout": float(get_conf_option("keepalive_timeout")),
+        "startup_timeout": float(get_conf_option("startup_timeout")),
+        "readiness": get_conf_option("readiness"),
+        "fast": bool(get_conf_option("fast")),
+        "definitions": Path(definitions) if definitions else None,
+        "warm_up": bool(get_conf_option("warm_up")),
+        "small": bool(get_conf_option("small")),
+        "schedulers": int(schedulers) if schedulers else None,
+        "async_threads": int(async_threads) if async_threads else None,
+        "erl_args": get_conf_option("erl_args") or "",
+        "memory_high_watermark": get_conf_option("memory_high_watermark") or None,
+        "cpu_affinity": get_conf_option("cpu_affinity") or None,
+        "snapshot": bool(get_conf_option("snapshot")),
+        "log_lines": int(log_lines),
+        "backend": get_conf_option("backend"),
+        "container_image": get_conf_option("container_image"),
     }
     return config
 
 
+def _option(options: ProcessOptions, config: RabbitMQConfig, name: str) -> Any:
+    """Get option passed to fixture factory, or the configured one if it was not passed."""
+    value = options.get(name)
+    return config[name] if value is None else value  # type: ignore[literal-required]
+
+
+def _definitions_file(tmpdir: Path, definitions: Optional[Definitions]) -> Optional[Path]:
+    """Write definitions for the node to import on boot, if there are any."""
+    if definitions is None:
+        return None
+    return write_definitions(tmpdir, definitions)
+
+
+def _fingerprint_definitions(definitions: Optional[Definitions]) -> Optional[str]:
+    """Return definitions in a stable form, so that a kept node restarts when they change."""
+    if definitions is None:
+        return None
+    return json.dumps(load_definitions(definitions), sort_keys=True)
+
+
+def _exact_port(options: ProcessOptions, config: RabbitMQConfig, name: str, default: int) -> int:
+    """Get exact port of a broker running already, the configured one if it was not passed."""
+    port: Any = options.get(name, -1)
+    if port in (-1, None):
+        port = config[name]  # type: ignore[literal-required]
+    return int(port) if port else default
+
+
+def _noproc_executor(
+    request: FixtureRequest, tmpdir: Path, options: ProcessOptions
+) -> RabbitMqExecutor:
+    """Create executor attaching to a broker running already."""
+    config = get_config(request)
+    management_port = None
+    if _option(options, config, "management"):
+        management_port = _exact_port(options, config, "management_port", 15672)
+    return NoProcExecutor(
+        _option(options, config, "host"),
+        _exact_port(options, config, "port", 5672),
+        _option(options, config, "ctl"),
+        tmpdir,
+        node_name=options.get("node"),
+        management_port=management_port,
+        timeout=_option(options, config, "startup_timeout"),
+    )
+
+
+def _container_executor(
+    request: FixtureRequest, tmpdir: Path, options: ProcessOptions
+) -> RabbitMqExecutor:
+    """Create executor for a broker running in a container."""
+    config = get_config(request)
+    return ContainerExecutor(
+        _option(options, config, "container_image"),
+        tmpdir,
+        host=_option(options, config, "host"),
+        timeout=_option(options, config, "startup_timeout"),
+    )
+
+
+BACKENDS: Dict[str, Callable[[FixtureRequest, Path, ProcessOptions], RabbitMqExecutor]] = {
+    "noproc": _noproc_executor,
+    "container": _container_executor,
+}
+"""Executors of brokers not started as a local process, by backend name.
+
+Executors for each backend take care of starting and stopping the broker,
+and telling it's ready. Listing and removing entities, virtual hosts and
+definitions are shared with :class:`RabbitMqExecutor`, through the management API.
+"""
+
+LOCAL_BACKEND = "local"
+"""Backend starting RabbitMQ as a local process, with :class:`RabbitMqExecutor`."""
+
+
+def create_executor(
+    request: FixtureRequest,
+    tmpdir: Path,
+    options: ProcessOptions,
+    address: Optional[NodeAddress] = None,
+    exclude_ports: Optional[List[int]] = None,
+    erlang_cookie: Optional[str] = None,
+) -> RabbitMqExecutor:
+    """Create executor for a new node, or for a node running at given address.
+
+    :param request: fixture request object
+    :param tmpdir: directory for node's data
+    :param options: options passed to fixture factory
+    :param address: address of an already running node
+    :param exclude_ports: ports not to pick for a new node
+    :param erlang_cookie: Erlang cookie, shared by nodes meant to cluster
+    """
+    config = get_config(request)
+    backend = _option(options, config, "backend")
+    if backend != LOCAL_BACKEND:
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend {backend!r}, "
+                f"choose one of: {', '.join([LOCAL_BACKEND, *BACKENDS])}"
+            )
+        return BACKENDS[backend](request, tmpdir, options)
+    rabbit_ctl = _option(options, config, "ctl")
+    rabbit_server = _option(options, config, "server")
+    rabbit_plugin_path = _option(options, config, "plugindir")
+
+    rabbit_logpath = config["logsdir"] or options.get("logsdir")
+    if rabbit_logpath:
+        warn(
+            f"rabbitmq_logsdir and --rabbitmq-logsdir config option is "
+            f"deprecated, and will be dropped in future releases. "
+            f"All fixture related data resides within {tmpdir}",
+            DeprecationWarning,
+        )
+    if not rabbit_logpath:
+        rabbit_logpath = tmpdir / "logs"
+
+    if address:
+        return RabbitMqExecutor(
+            rabbit_server,
+            address["host"],
+            address["port"],
+            address["distribution_port"],
+            rabbit_ctl,
+            logpath=rabbit_logpath,
+            path=tmpdir,
+            plugin_path=rabbit_plugin_path,
+            node_name=address["node"],
+            management_port=address["management_port"],
+            timeout=_option(options, config, "startup_timeout"),
+            readiness=_option(options, config, "readiness"),
+            definitions_file=_definitions_file(tmpdir, _option(options, config, "definitions")),
+        )
+
+    used_ports = list(exclude_ports or [])
+    rabbit_port = get_port(options.get("port", -1), used_ports) or get_port(
+        config["port"], used_ports
+    )
+    assert rabbit_port
+    used_ports.append(rabbit_port)
+    rabbit_distribution_port = get_port(
+        options.get("distribution_port", -1), used_ports
+    ) or get_port(config["distribution_port"], used_ports)
+    assert rabbit_distribution_port
+    assert (
+        rabbit_distribution_port != rabbit_port
+    ), "rabbit_port and distribution_port can not be the same!"
+    used_ports.append(rabbit_distribution_port)
+
+    rabbit_management_port = None
+    management = _option(options, config, "management")
+    if management is None:
+        # on by default, when the plugin ships with the server
+        management = management_available(rabbit_server)
+    if management:
+        rabbit_management_port = get_port(
+            options.get("management_port", -1), used_ports
+        ) or get_port(config["management_port"], used_ports)
+
+    node_config: Dict[str, str] = {}
+    advanced_config = ""
+    if _option(options, config, "fast"):
+        # nodes outliving the session are stopped by someone else,
+        # who wouldn't know to remove their data from RAM
+        outlives_session = _option(options, config, "keepalive") or _option(
+            options, config, "xdist_shared"
+        )
+        ram_path = None if outlives_session else ram_directory("pytest-rabbitmq-")
+        if ram_path:
+            # runs after fixture's teardown stops the node
+            request.addfinalizer(lambda: shutil.rmtree(ram_path, ignore_errors=True))
+            tmpdir = ram_path
+            if not config["logsdir"] and not options.get("logsdir"):
+                rabbit_logpath = ram_path / "logs"
+        node_config.update(
+            fast_config(rabbit_management_port is not None, _option(options, config, "readiness"))
+        )
+        advanced_config = FAST_ADVANCED_CONFIG
+    small = options.get("small")
+    if small is None:
+        # small preset applies to nodes given resources, unless turned off
+        small = config["small"] or None
+    resources = node_resources(
+        small,
+        schedulers=_option(options, config, "schedulers"),
+        async_threads=_option(options, config, "async_threads"),
+        erl_args=_option(options, config, "erl_args"),
+        memory_high_watermark=_option(options, config, "memory_high_watermark"),
+        cpu_affinity=_option(options, config, "cpu_affinity"),
+    )
+    node_config.update(resources_config(resources))
+    definitions_file = _definitions_file(tmpdir, _option(options, config, "definitions"))
+    if definitions_file:
+        node_config["load_definitions"] = str(definitions_file)
+    config_file = advanced_config_file = None
+    if node_config:
+        config_file, advanced_config_file = write_config(tmpdir, node_config, advanced_config)
+
+    executor = RabbitMqExecutor(
+        rabbit_server,
+        _option(options, config, "host"),
+        rabbit_port,
+        rabbit_distribution_port,
+        rabbit_ctl,
+        logpath=rabbit_logpath,
+        path=tmpdir,
+        plugin_path=rabbit_plugin_path,
+        node_name=_option(options, config, "node"),
+        management_port=rabbit_management_port,
+        timeout=_option(options, config, "startup_timeout"),
+        readiness=_option(options, config, "readiness"),
+        erlang_cookie=erlang_cookie,
+        config_file=config_file,
+        advanced_config_file=advanced_config_file,
+        definitions_file=definitions_file,
+        erl_args=resources_erl_args(resources),
+        cpu_affinity=resources["cpu_affinity"],
+        log_lines=_option(options, config, "log_lines"),
+    )
+    cache = getattr(request.config, "cache", None)
+    if cache and _option(options, config, "mnesia_cache"):
+        if _stable_node_name(options, config):
+            MnesiaCache(cache.mkdir("pytest-rabbitmq-mnesia")).prepare(executor)
+        else:
+            warn(
+                f"Not using mnesia cache for {executor.node_name}, node name changes with "
+                f"random port, set node name or port to use it",
+                UserWarning,
+            )
+    return executor
+
+
+def _stable_node_name(options: ProcessOptions, config: RabbitMQConfig) -> bool:
+    """Tell whether node gets the same name in every run.
+
+    Data directory is bound to the node name, cached one can't be used
+    by a node named after a port picked at random.
+    """
+    if _option(options, config, "node"):
+        return True
+    port = options.get("port", -1)
+    if port == -1:
+        port = config["port"]
+    return isinstance(port, int) or (isinstance(port, str) and port.isdigit())
+
+
+def _keeps_node(options: ProcessOptions, config: RabbitMQConfig) -> bool:
+    """Tell whether local node is left running after tests, to reuse it in following runs."""
+    return bool(_option(options, config, "keepalive")) and (
+        _option(options, config, "backend") == LOCAL_BACKEND
+    )
+
+
+def _shares_node(options: ProcessOptions, config: RabbitMQConfig) -> bool:
+    """Tell whether local node is shared between pytest-xdist workers."""
+    return bool(
+        os.environ.get("PYTEST_XDIST_WORKER") and _option(options, config, "xdist_shared")
+    ) and (_option(options, config, "backend") == LOCAL_BACKEND)
+
+
 def rabbitmq_proc(
     server: Optional[str] = None,
     host: Optional[str] = None,
@@ -98,6 +472,27 @@ def rabbitmq_proc(
     ctl: Optional[str] = None,
     logsdir: Optional[Path] = None,
     plugindir: Optional[Path] = None,
+    management: Optional[bool] = None,
+    management_port: PortType = -1,
+    xdist_shared: Optional[bool] = None,
+    mnesia_cache: Optional[bool] = None,
+    keepalive: Optional[bool] = None,
+    keepalive_timeout: Optional[float] = None,
+    startup_timeout: Optional[float] = None,
+    readiness: Optional[str] = None,
+    fast: Optional[bool] = None,
+    definitions: Optional[Definitions] = None,
+    warm_up: Optional[bool] = None,
+    small: Optional[bool] = None,
+    schedulers: Optional[int] = None,
+    async_threads: Optional[int] = None,
+    erl_args: Optional[str] = None,
+    memory_high_watermark: Optional[str] = None,
+    cpu_affinity: Optional[str] = None,
+    snapshot: Optional[bool] = None,
+    log_lines: Optional[int] = None,
+    backend: Optional[str] = None,
+    container_image: Optional[str] = None,
 ) -> Callable[[FixtureRequest, TempPathFactory], Generator[RabbitMqExecutor, None, None]]:
     """Fixture factory for RabbitMQ process.
 
@@ -121,11 +516,154 @@ def rabbitmq_proc(
                           clustered)
     :param ctl: path to rabbitmqctl file
     :param logsdir: path to log directory
+    :param plugindir: directory holding enabled plugins file
+    :param management: enable management plugin, and use its HTTP API
+        instead of rabbitmqctl to list queues and exchanges. By default it's
+        enabled when the plugin ships with the server, falling back to
+        rabbitmqctl otherwise. Nodes running already use it only when
+        turned on explicitly.
+    :param management_port: port for management HTTP API,
+        same format as port
+    :param xdist_shared: when running under pytest-xdist, start just one
+        node for all workers, with each worker using its own virtual host
+    :param mnesia_cache: start the node from a cached copy of an already
+        initialised data directory, kept in pytest's cache directory.
+        Data directory is bound to the node name, so the cache is only
+        used when node name, or port it defaults to, is set.
+    :param keepalive: leave the node running after tests, and reuse it
+        (wiped clean) in following pytest invocations
+    :param keepalive_timeout: seconds of inactivity, after which the node
+        left running gets stopped
+    :param startup_timeout: seconds to wait for the node to become ready
+    :param readiness: how to tell the node is ready: ``port`` once AMQP port
+        accepts connections, ``log`` once node logs its startup is complete,
+        ``amqp`` once AMQP handshake succeeds
+    :param fast: keep node's data and logs in RAM (``/dev/shm``), and configure
+        it for tests: low disk free limit, small message store files,
+        no statistics collection unless management plugin needs them,
+        warnings only logged, and mnesia log dumped less often. Nodes kept
+        alive, or shared between xdist workers, keep their data on disk.
+    :param definitions: definitions JSON file, or a dict of definitions,
+        as exported by ``rabbitmqctl export_definitions``. Node imports them
+        on boot, so exchanges, queues, bindings and the like are there
+        before the first test connects.
+    :param warm_up: start the node in background, while tests are collected,
+        and stop it if none of the collected tests request it. Node boots
+        while tests not using it run, and the fixture just waits for it to be ready.
+        Nodes kept alive, or shared between xdist workers, are not warmed up.
+    :param small: limit node's resources, so many nodes fit on one machine:
+        one scheduler not busy waiting for work, few async and dirty IO threads,
+        and publishers blocked at 10% of memory. Resource options below
+        override the preset, and use it by default, unless it's turned off
+        with ``small=False``.
+    :param schedulers: number of Erlang schedulers, one per CPU core by default
+    :param async_threads: size of Erlang async thread pool (``+A``)
+    :param erl_args: additional Erlang VM arguments, passed in
+        ``RABBITMQ_SERVER_ADDITIONAL_ERL_ARGS``
+    :param memory_high_watermark: memory use at which publishers get blocked,
+        either a fraction of total memory (``0.2``) or an absolute amount (``512MB``)
+    :param cpu_affinity: CPUs to run the node on, e.g. ``0-3`` or ``1,3``.
+        Requires ``taskset`` from util-linux.
+    :param snapshot: export node's definitions once it boots, so that
+        :meth:`RabbitMqExecutor.rollback` can bring the node back to that
+        state later, e.g. between test modules with :func:`rabbitmq_rollback`.
+    :param log_lines: number of most recent node log lines to keep, following
+        the log in background. Lines logged during a failing test are added
+        to its report. 0 not to follow the log.
+    :param backend: how to get a broker:
+
+        * ``local`` - start RabbitMQ as a local process
+        * ``noproc`` - attach to a broker running already at host and port
+          (5672 by default), e.g. as a service. Only the management port
+          (15672 by default) and node name options apply.
+        * ``container`` - run the broker in a container, left running
+          to be reused by following test sessions
+
+        Brokers not started locally isolate tests in a virtual host
+        of their own, created at start and deleted at stop.
+    :param container_image: image to run with ``container`` backend,
+        with management plugin enabled
 
     :returns pytest fixture with RabbitMQ process executor
     """
+    options: ProcessOptions = {
+        "server": server,
+        "host": host,
+        "port": port,
+        "distribution_port": distribution_port,
+        "node": node,
+        "ctl": ctl,
+        "logsdir": logsdir,
+        "plugindir": plugindir,
+        "management": management,
+        "management_port": management_port,
+        "xdist_shared": xdist_shared,
+        "mnesia_cache": mnesia_cache,
+        "keepalive": keepalive,
+        "keepalive_timeout": keepalive_timeout,
+        "startup_timeout": startup_timeout,
+        "readiness": readiness,
+        "fast": fast,
+        "definitions": definitions,
+        "warm_up": warm_up,
+        "small": small,
+        "schedulers": schedulers,
+        "async_threads": async_threads,
+        "erl_args": erl_args,
+        "memory_high_watermark": memory_high_watermark,
+        "cpu_affinity": cpu_affinity,
+        "snapshot": snapshot,
+        "log_lines": log_lines,
+        "backend": backend,
+        "container_image": container_image,
+    }
+    warmed_up: List["Future[RabbitMqExecutor]"] = []
+    discarded: List["Future[None]"] = []
+
+    def start_warm_up(config: Config, fixturename: str) -> None:
+        """Start the node in background, for the fixture to pick up once requested.
+
+        :param config: pytest config
+        :param fixturename: name the process fixture is requested by
+        """
+        request = cast(FixtureRequest, _SessionRequest(config))
+        rabbitmq_config = get_config(request)
+        if not _option(options, rabbitmq_config, "warm_up") or warmed_up:
+            return
+        if _keeps_node(options, rabbitmq_config) or _shares_node(options, rabbitmq_config):
+            return
+        tmpdir = Path(tempfile.mkdtemp(prefix=f"pytest-rabbitmq-{fixturename}-"))
+        # runs after the node is stopped, by fixture's teardown or stop_unused
+        request.addfinalizer(lambda: shutil.rmtree(tmpdir, ignore_errors=True))
+        executor = create_executor(request, tmpdir, options)
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"warm-up-{fixturename}")
+        future = pool.submit(executor.start)
+        pool.shutdown(wait=False)
+        warmed_up.append(future)
+
+        def stop_unused() -> None:
+            # node started for tests that didn't get to run, e.g. after --exitfirst
+            if future in warmed_up:
+                warmed_up.remove(future)
+                if future.exception() is None:
+                    stop_executor(future.result())
+
+        request.addfinalizer(stop_unused)
+
+    def discard_warm_up() -> None:
+        """Stop node started in background once it's up, no collected test uses it."""
+        while warmed_up:
+            stopped: "Future[None]" = Future()
+            discarded.append(stopped)
+
+            def stop(future: "Future[RabbitMqExecutor]", stopped: "Future[None]" = stopped) -> None:
+                try:
+                    _stop_started(future)
+                finally:
+                    stopped.set_result(None)
+
+            warmed_up.pop().add_done_callback(stop)
 
-    @pytest.fixture(scope="session")
     def rabbitmq_proc_fixture(
         request: FixtureRequest, tmp_path_factory: TempPathFactory
     ) -> Generator[RabbitMqExecutor, None, None]:
@@ -149,51 +687,281 @@ def rabbitmq_proc(
         :returns: tcp executor of running rabbitmq-server
         """
         config = get_config(request)
-        rabbit_ctl = ctl or config["ctl"]
-        rabbit_server = server or config["server"]
-        rabbit_host = host or config["host"]
-        rabbit_port = get_port(port) or get_port(config["port"])
-        assert rabbit_port
-        rabbit_distribution_port = get_port(distribution_port, [rabbit_port]) or get_port(
-            config["distribution_port"], [rabbit_port]
-        )
-        assert rabbit_distribution_port
-        assert (
-            rabbit_distribution_port != rabbit_port
-        ), "rabbit_port and distribution_port can not be the same!"
+        if warmed_up:
+            # raises if the node failed to start
+            rabbit_executor = warmed_up.pop().result()
+            if _option(options, config, "snapshot"):
+                rabbit_executor.take_snapshot()
+            yield rabbit_executor
+            stop_executor(rabbit_executor)
+            return
+        # requested after all, e.g. with request.getfixturevalue, don't boot
+        # a node while the discarded one still holds the same ports or name
+        while discarded:
+            discarded.pop().result()
 
-        tmpdir = tmp_path_factory.mktemp(f"pytest-rabbitmq-{request.fixturename}")
+        worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+        cache = getattr(request.config, "cache", None)
 
-        rabbit_plugin_path = plugindir or config["plugindir"]
+        def create(address: Optional[NodeAddress] = None) -> RabbitMqExecutor:
+            return create_executor(request, tmpdir, options, address)
 
-        rabbit_logpath = config["logsdir"] or logsdir
-        if rabbit_logpath:
-            warn(
-                f"rabbitmq_logsdir and --rabbitmq-logsdir config option is "
-                f"deprecated, and will be dropped in future releases. "
-                f"All fixture related data resides within {tmpdir}",
-                DeprecationWarning,
+        if cache and _keeps_node(options, config):
+            keep_dir = cache.mkdir("pytest-rabbitmq-keepalive")
+            keep_name = f"{request.fixturename}-{worker_id or 'main'}"
+            tmpdir = keep_dir / keep_name
+            tmpdir.mkdir(exist_ok=True)
+            fingerprint = hashlib.sha256(
+                repr(
+                    (
+                        _option(options, config, "server"),
+                        _option(options, config, "ctl"),
+                        _option(options, config, "host"),
+                        port,
+                        _option(options, config, "node"),
+                        _option(options, config, "management"),
+                        _option(options, config, "plugindir"),
+                        _fingerprint_definitions(_option(options, config, "definitions")),
+                        _option(options, config, "fast"),
+                        _option(options, config, "small"),
+                        _option(options, config, "schedulers"),
+                        _option(options, config, "async_threads"),
+                        _option(options, config, "erl_args"),
+                        _option(options, config, "memory_high_watermark"),
+                        _option(options, config, "cpu_affinity"),
+                    )
+                ).encode("utf-8")
+            ).hexdigest()
+            yield from keep_executor(
+                keep_dir,
+                keep_name,
+                fingerprint,
+                create,
+                _option(options, config, "keepalive_timeout"),
+                snapshot=_option(options, config, "snapshot"),
             )
-        if not rabbit_logpath:
-            rabbit_logpath = tmpdir / "logs"
+            return
 
-        rabbit_executor = RabbitMqExecutor(
-            rabbit_server,
-            rabbit_host,
-            rabbit_port,
-            rabbit_distribution_port,
-            rabbit_ctl,
-            logpath=rabbit_logpath,
-            path=tmpdir,
-            plugin_path=rabbit_plugin_path,
-            node_name=node or config["node"],
-        )
+        tmpdir = tmp_path_factory.mktemp(f"pytest-rabbitmq-{request.fixturename}")
+        if worker_id and _shares_node(options, config):
+            # basetemp of each worker is a subdirectory of the run's basetemp
+            shared_dir = tmp_path_factory.getbasetemp().parent
+            yield from share_executor(
+                shared_dir,
+                str(request.fixturename),
+                worker_id,
+                create,
+                snapshot=_option(options, config, "snapshot"),
+            )
+            return
 
+        rabbit_executor = create()
         rabbit_executor.start()
+        if _option(options, config, "snapshot"):
+            rabbit_executor.take_snapshot()
         yield rabbit_executor
-        try:
-            rabbit_executor.stop()
-        except ProcessExitedWithError:
-            pass
+        stop_executor(rabbit_executor)
+
+    # found by warm_up_processes, through the fixture's definition
+    _WARM_UP_FIXTURES.add(rabbitmq_proc_fixture)
+    rabbitmq_proc_fixture.start_warm_up = start_warm_up  # type: ignore[attr-defined]
+    rabbitmq_proc_fixture.discard_warm_up = discard_warm_up  # type: ignore[attr-defined]
+    fixture: Callable[
+        [FixtureRequest, TempPathFactory], Generator[RabbitMqExecutor, None, None]
+    ] = pytest.fixture(scope="session")(rabbitmq_proc_fixture)
+    return fixture
+
+
+class _SessionRequest:
+    """Stands in for fixture request, for nodes started before any fixture is set up."""
+
+    def __init__(self, config: Config) -> None:
+        """Initialize request of given config."""
+        self.config = config
+
+    def addfinalizer(self, finalizer: Callable[[], None]) -> None:
+        """Call finalizer once the test run is over."""
+        self.config.add_cleanup(finalizer)
+
+
+def _stop_started(future: "Future[RabbitMqExecutor]") -> None:
+    """Stop node started in background, unless it failed to start."""
+    if future.exception() is None:
+        stop_executor(future.result())
+
+
+_WARM_UP_FIXTURES: "WeakSet[Callable[..., Any]]" = WeakSet()
+"""Functions of process fixtures, able to start their node before they are set up."""
+
+
+def _warm_up_function(value: Any) -> Optional[Any]:
+    """Return function of a process fixture able to warm up, if value is one."""
+    func = getattr(value, "__wrapped__", value)
+    try:
+        return func if func in _WARM_UP_FIXTURES else None
+    except TypeError:
+        # not a function, nor anything else that can be weakly referenced
+        return None
+
+
+def warm_up_processes(session: Session, items: Optional[Sequence[Item]] = None) -> None:
+    """Start process fixtures with warm up enabled in background.
+
+    Before collection, process fixtures defined in plugins and conftest files
+    loaded by then get started, so that nodes boot while tests are collected.
+    After collection, given collected tests, process fixtures any of them uses,
+    directly or through other fixtures, get started too, and nodes none of them
+    is going to use get stopped.
+
+    :param session: test session
+    :param items: collected tests, None before collection
+    """
+    defined: Dict[Any, str] = {}
+    for plugin in session.config.pluginmanager.get_plugins():
+        if isinstance(plugin, ModuleType):
+            for name, value in vars(plugin).items():
+                func = _warm_up_function(value)
+                if func is not None:
+                    defined[func] = name
+    if items is None:
+        for func, name in defined.items():
+            func.start_warm_up(session.config, name)
+        return
+    requested: Dict[Any, str] = {}
+    for item in items:
+        # fixtures each test uses, along with ones they use, as pytest resolved them
+        fixtureinfo = getattr(item, "_fixtureinfo", None)
+        if fixtureinfo is None:
+            continue
+        for name, fixturedefs in fixtureinfo.name2fixturedefs.items():
+            func = _warm_up_function(fixturedefs[-1].func) if fixturedefs else None
+            if func is not None:
+                requested[func] = name
+    for func, name in requested.items():
+        func.start_warm_up(session.config, name)
+    for func in defined:
+        if func not in requested:
+            func.discard_warm_up()
+
+
+class RabbitMqGroupStartError(Exception):
+    """Raised when some nodes of a group failed to start."""
+
+    def __init__(self, errors: Dict[str, BaseException]) -> None:
+        """Initialize error.
+
+        :param errors: exceptions raised while starting nodes, by node's name
+        """
+        self.errors = errors
+        details = ", ".join(f"{name}: {error!r}" for name, error in errors.items())
+        super().__init__(f"RabbitMQ nodes failed to start: {details}")
+
+
+def start_executors(executors: Dict[str, RabbitMqExecutor]) -> None:
+    """Start executors concurrently, and wait for all of them to be ready.
+
+    Most of RabbitMQ's boot time is spent waiting for the Erlang VM and the node
+    to initialise, so booting nodes side by side takes about as long as booting
+    the slowest of them. If any node fails to start, those that did get stopped.
+
+    :param executors: executors to start, by name
+    :raises RabbitMqGroupStartError: when any of the nodes failed to start
+    """
+    errors: Dict[str, BaseException] = {}
+    with ThreadPoolExecutor(max_workers=max(len(executors), 1)) as pool:
+        futures = {name: pool.submit(executor.start) for name, executor in executors.items()}
+        for name, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                errors[name] = error
+    if errors:
+        stop_executors(executors)
+        raise RabbitMqGroupStartError(errors)
+
+
+def stop_executors(executors: Dict[str, RabbitMqExecutor]) -> None:
+    """Stop running executors concurrently."""
+    with ThreadPoolExecutor(max_workers=max(len(executors), 1)) as pool:
+        for executor in executors.values():
+            if executor.running():
+                pool.submit(stop_executor, executor)
+
+
+def stop_executor(executor: RabbitMqExecutor) -> None:
+    """Stop executor, ignoring RabbitMQ's non-zero exit code on shutdown."""
+    try:
+        executor.stop()
+    except ProcessExitedWithError:
+        pass
+
+
+GROUP_UNSUPPORTED = ("warm_up", "keepalive", "xdist_shared")
+"""Options of :func:`rabbitmq_proc`, not accepted for nodes of a process group."""
+
+
+def rabbitmq_proc_group(
+    **processes: ProcessOptions,
+) -> Callable[
+    [FixtureRequest, TempPathFactory], Generator[Dict[str, RabbitMqExecutor], None, None]
+]:
+    """Fixture factory for a group of RabbitMQ processes, started concurrently.
+
+    Each keyword names a node, and holds the options :func:`rabbitmq_proc`
+    would accept for it. Nodes get distinct ports, and unless given, node
+    names after their ports, like single nodes do. When a node name is
+    configured, each node gets its own one, suffixed with its name in the group.
+
+    Nodes of a group are started along with the fixture and stopped after
+    the session, so ``warm_up``, ``keepalive`` and ``xdist_shared`` options
+    are not accepted, and the configured ones don't apply.
+
+    .. code-block:: python
+
+        rabbitmq_nodes = factories.rabbitmq_proc_group(
+            orders={"port": 5680}, billing={"port": 5681, "management": True}
+        )
+
+    :param processes: options of each node, by its name
+    :returns: pytest fixture with RabbitMQ process executors, by name
+    :raises ValueError: when options not supported for nodes of a group are given
+    """
+    for name, options in processes.items():
+        unsupported = [option for option in GROUP_UNSUPPORTED if options.get(option)]
+        if unsupported:
+            raise ValueError(
+                f"Node {name!r} of a process group can't use: {', '.join(unsupported)}"
+            )
+
+    @pytest.fixture(scope="session")
+    def rabbitmq_proc_group_fixture(
+        request: FixtureRequest, tmp_path_factory: TempPathFactory
+    ) -> Generator[Dict[str, RabbitMqExecutor], None, None]:
+        """Fixture for a group of RabbitMQ processes.
+
+        :param request: fixture request object
+        :param tmp_path_factory: temporary path factory
+        :returns: tcp executors of running rabbitmq-servers, by name
+        """
+        config = get_config(request)
+        executors: Dict[str, RabbitMqExecutor] = {}
+        used_ports: List[int] = []
+        for name, options in processes.items():
+            tmpdir = tmp_path_factory.mktemp(f"pytest-rabbitmq-{request.fixturename}-{name}")
+            options = ProcessOptions(**options)
+            if not options.get("node") and config["node"]:
+                # configured name, shared by all nodes of the group otherwise
+                options["node"] = f"{config['node']}-{name}"
+            executor = create_executor(request, tmpdir, options, exclude_ports=used_ports)
+            used_ports.extend(port for port in (executor.port, executor.distribution_port) if port)
+            if executor.management:
+                used_ports.append(executor.management.port)
+            executors[name] = executor
+
+        start_executors(executors)
+        for name, executor in executors.items():
+            if _option(processes[name], config, "snapshot"):
+                executor.take_snapshot()
+        yield executors
+        stop_executors(executors)
 
-    return rabbitmq_proc_fixture
+    return rabbitmq_proc_group_fixture
@@ -0,0 +1,58 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Rollback fixture factory."""
+
+from typing import Any, Callable, Generator, Literal
+
+import pytest
+
+from pytest_rabbitmq.factories.dependencies import depends_on
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+
+
+def rabbitmq_rollback(
+    process_fixture_name: str,
+    scope: Literal["session", "package", "module", "class", "function"] = "module",
+) -> Callable[..., Generator[RabbitMqExecutor, None, None]]:
+    """Fixture factory bringing RabbitMQ node back to its snapshot, after each scope.
+
+    Meant to be used autouse, e.g. by modules changing users, permissions,
+    policies or parameters, which client fixtures don't clear.
+    Enable ``snapshot`` on the process fixture to snapshot the node right
+    after boot, otherwise it's taken when this fixture is first set up.
+
+    :param process_fixture_name: name of RabbitMQ process fixture
+    :param scope: scope after which to roll back, ``module`` by default
+    :returns: pytest fixture with RabbitMQ process executor
+    """
+
+    @pytest.fixture(scope=scope)
+    @depends_on(process_fixture_name)
+    def rabbitmq_rollback_fixture(**fixtures: Any) -> Generator[RabbitMqExecutor, None, None]:
+        """Fixture rolling RabbitMQ node back to its snapshot, after the scope ends.
+
+        :param fixtures: process fixture, by its name
+        :returns: RabbitMQ process executor
+        """
+        process: RabbitMqExecutor = fixtures[process_fixture_name]
+        if process.snapshot is None:
+            process.take_snapshot()
+        yield process
+        process.rollback()
+
+    return rabbitmq_rollback_fixture
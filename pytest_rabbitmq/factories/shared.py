@@ -0,0 +1,170 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Sharing single RabbitMQ node between pytest-xdist workers."""
+
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Generator, Iterator, Optional, TypedDict
+
+from mirakuru.exceptions import ProcessExitedWithError
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+
+
+class NodeAddress(TypedDict):
+    """Where to find a node started by someone else."""
+
+    host: str
+    port: int
+    distribution_port: int
+    node: str
+    management_port: Optional[int]
+
+
+class SharedNode(NodeAddress):
+    """Description of a node shared between workers."""
+
+    owner: int
+    workers: Dict[str, int]
+
+
+def node_address(executor: RabbitMqExecutor) -> NodeAddress:
+    """Describe where to find executor's node."""
+    return {
+        "host": executor.host,
+        "port": executor.port,
+        "distribution_port": executor.distribution_port,
+        "node": executor.node_name,
+        "management_port": executor.management.port if executor.management else None,
+    }
+
+
+def pid_alive(pid: int) -> bool:
+    """Check whether process of given pid still exists."""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def locked(lock_path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on a given file."""
+    with lock_path.open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read(state_path: Path) -> Optional[SharedNode]:
+    """Read shared node description, if there's a live one."""
+    if not state_path.exists():
+        return None
+    state: SharedNode = json.loads(state_path.read_text())
+    if not pid_alive(state["owner"]):
+        return None
+    return state
+
+
+def _leave(state_path: Path, worker_id: str) -> SharedNode:
+    """Remove worker from the shared node description, along with dead ones."""
+    state: SharedNode = json.loads(state_path.read_text())
+    state["workers"] = {
+        worker: pid
+        for worker, pid in state["workers"].items()
+        if worker != worker_id and pid_alive(pid)
+    }
+    state_path.write_text(json.dumps(state))
+    return state
+
+
+def share_executor(
+    shared_dir: Path,
+    name: str,
+    worker_id: str,
+    create: Callable[[Optional[NodeAddress]], RabbitMqExecutor],
+    poll_interval: float = 0.5,
+    snapshot: bool = False,
+) -> Generator[RabbitMqExecutor, None, None]:
+    """Start RabbitMQ node once for all workers, and attach every other worker to it.
+
+    First worker to get here starts the node and publishes its address.
+    Every worker gets its own virtual host on that node, with topology
+    from node's definitions file. Snapshot and rollback are limited to it.
+
+    The node is a child process of the worker that started it, and would get
+    killed along with it. Thus that worker, when done, waits for all other
+    workers to leave before stopping the node.
+
+    :param shared_dir: directory shared by all workers of a test run
+    :param name: name of the process fixture
+    :param worker_id: xdist worker id
+    :param create: creates executor for node at given address,
+        or for a brand new one, if None is passed
+    :param poll_interval: how often owner checks for workers left
+    :param snapshot: snapshot worker's virtual host, once its topology is imported
+    """
+    state_path = shared_dir / f"pytest-rabbitmq-{name}.json"
+    lock_path = shared_dir / f"pytest-rabbitmq-{name}.lock"
+    with locked(lock_path):
+        state = _read(state_path)
+        if state is None:
+            executor = create(None)
+            executor.start()
+            state = {**node_address(executor), "owner": os.getpid(), "workers": {}}
+        else:
+            executor = create(state)
+        owner = state["owner"] == os.getpid()
+        state["workers"][worker_id] = os.getpid()
+        state_path.write_text(json.dumps(state))
+
+    executor.vhost = f"pytest-{worker_id}"
+    executor.add_vhost(executor.vhost)
+    executor.import_definitions()
+    # other workers use the node as well, leave their virtual hosts alone
+    executor.snapshot_vhost = executor.vhost
+    if snapshot:
+        executor.take_snapshot()
+    try:
+        yield executor
+    finally:
+        executor.delete_vhost(executor.vhost)
+        with locked(lock_path):
+            state = _leave(state_path, worker_id)
+        if owner:
+            while state["workers"]:
+                time.sleep(poll_interval)
+                with locked(lock_path):
+                    state = _leave(state_path, worker_id)
+            with locked(lock_path):
+                state_path.unlink()
+                try:
+                    executor.stop()
+                except ProcessExitedWithError:
+                    pass
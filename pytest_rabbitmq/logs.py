@@ -0,0 +1,177 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Following RabbitMQ node log."""
+
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import IO, Deque, Dict, List, Optional, Set, Tuple
+
+STARTUP_COMPLETE = re.compile(r"Server startup complete|completed with \d+ plugins")
+"""Logged by RabbitMQ once it's done booting (3.8+ and older format)."""
+
+
+class LogFollower:
+    """Read lines appended to the node's log file since the last read.
+
+    Only the new part of the file is read each time, so following
+    a long, verbose log costs as little as a short one.
+    """
+
+    def __init__(self, log_base: Path) -> None:
+        """Initialize follower.
+
+        :param log_base: directory RabbitMQ writes its logs to,
+            set through ``RABBITMQ_LOG_BASE``
+        """
+        self.log_base = log_base
+        self._file: Optional[IO[str]] = None
+        self._partial = ""
+        self._skipped: Dict[Path, int] = {}
+
+    def _log_paths(self) -> List[Path]:
+        """Return node log files, there's none before RabbitMQ creates it."""
+        if not self.log_base.is_dir():
+            return []
+        return [
+            log_path
+            for log_path in sorted(self.log_base.glob("*.log"))
+            if not log_path.name.endswith("_upgrade.log")
+        ]
+
+    def skip_existing(self) -> None:
+        """Follow only lines written from now on, e.g. by a node booting again.
+
+        Lines an earlier boot left in the log would otherwise be read too.
+        """
+        self.close()
+        self._skipped = {log_path: log_path.stat().st_size for log_path in self._log_paths()}
+
+    def _open(self) -> Optional[IO[str]]:
+        """Open node log, once RabbitMQ creates it."""
+        if self._file is None:
+            for log_path in self._log_paths():
+                self._file = log_path.open(encoding="utf-8", errors="replace")
+                offset = self._skipped.get(log_path, 0)
+                # log that got shorter since was rotated, or truncated
+                if offset <= log_path.stat().st_size:
+                    self._file.seek(offset)
+                break
+        return self._file
+
+    def read_lines(self) -> List[str]:
+        """Return complete lines written since the previous call."""
+        log_file = self._open()
+        if log_file is None:
+            return []
+        data = self._partial + log_file.read()
+        lines = data.split("\n")
+        self._partial = lines.pop()
+        return lines
+
+    def close(self) -> None:
+        """Close followed file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._partial = ""
+
+
+class LogTailer:
+    """Follow node's log in a background thread, keeping most recent lines.
+
+    Lines are read incrementally, with :class:`LogFollower`, and kept in
+    a bounded buffer, so long sessions with verbose logs cost no more
+    than short ones.
+    """
+
+    def __init__(
+        self, log_base: Path, name: str, max_lines: int = 1000, interval: float = 0.25
+    ) -> None:
+        """Initialize tailer.
+
+        :param log_base: directory RabbitMQ writes its logs to
+        :param name: name of the node, telling its lines apart in reports
+        :param max_lines: number of most recent lines to keep
+        :param interval: seconds between reads of the log
+        """
+        self.name = name
+        self.interval = interval
+        self.position = 0
+        """Number of lines read so far."""
+        self.marked = 0
+        """Position at the last :meth:`mark`."""
+        self._follower = LogFollower(log_base)
+        self._lines: Deque[Tuple[int, str]] = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start following the log, in background."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._follow, name=f"rabbitmq-log-{self.name}", daemon=True
+        )
+        self._thread.start()
+        running_tailers.add(self)
+
+    def stop(self) -> None:
+        """Stop following the log, reading what's left of it first."""
+        running_tailers.discard(self)
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self.read()
+        self._follower.close()
+
+    def _follow(self) -> None:
+        """Read new lines until stopped."""
+        while not self._stopped.wait(self.interval):
+            self.read()
+
+    def read(self) -> None:
+        """Read lines written since the previous read into the buffer."""
+        with self._lock:
+            for line in self._follower.read_lines():
+                self._lines.append((self.position, line))
+                self.position += 1
+
+    def mark(self) -> None:
+        """Remember current position, e.g. when a test starts."""
+        self.read()
+        self.marked = self.position
+
+    def lines_since(self, position: int) -> List[str]:
+        """Return lines read since given position, as many as the buffer still holds."""
+        self.read()
+        with self._lock:
+            return [line for line_position, line in self._lines if line_position >= position]
+
+    def lines_since_mark(self) -> List[str]:
+        """Return lines read since the last :meth:`mark`."""
+        return self.lines_since(self.marked)
+
+
+running_tailers: Set[LogTailer] = set()
+"""Tailers following logs of running nodes."""
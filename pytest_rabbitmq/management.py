@@ -0,0 +1,172 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Minimal client for the RabbitMQ HTTP management API."""
+
+import json
+import os
+import re
+import shutil
+import threading
+from base64 import b64encode
+from http.client import HTTPConnection, HTTPException
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+MANAGEMENT_PLUGIN = "rabbitmq_management"
+
+_PLUGIN_NAME_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+class ManagementError(Exception):
+    """Raised when the management API can not be reached or rejects a request."""
+
+
+class ManagementClient:
+    """Talk to the RabbitMQ management plugin over a single keep-alive connection.
+
+    Every call spawning ``rabbitmqctl`` boots a fresh Erlang VM, which costs
+    a second or two. A request to the management API costs milliseconds.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "guest",
+        password: str = "guest",
+        timeout: float = 10.0,
+    ) -> None:
+        """Initialize management API client.
+
+        :param host: host the management listener is bound to
+        :param port: management listener port
+        :param username: user to authenticate as
+        :param password: password of that user
+        :param timeout: socket timeout for a single request
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        credentials = b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii")
+        self._headers = {
+            "Authorization": f"Basic {credentials}",
+            "Content-Type": "application/json",
+        }
+        self._connection: Optional[HTTPConnection] = None
+        self._lock = threading.Lock()
+
+    def request(self, method: str, path: str, body: Any = None) -> Any:
+        """Send a request to the management API and return decoded response.
+
+        The connection is reused between requests, and reopened once
+        if the server dropped it in the meantime.
+
+        :param method: HTTP method
+        :param path: path below ``/api``
+        :param body: JSON serializable request body
+        :raises ManagementError: when the request could not be completed
+        """
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        with self._lock:
+            try:
+                status, data = self._send(method, path, payload)
+            except (OSError, HTTPException):
+                # server might have dropped the idle keep-alive connection
+                self.close_connection()
+                try:
+                    status, data = self._send(method, path, payload)
+                except (OSError, HTTPException) as exc:
+                    self.close_connection()
+                    raise ManagementError(f"{method} /api/{path} failed: {exc}") from exc
+        if status >= 400:
+            raise ManagementError(f"{method} /api/{path} returned {status}: {data!r}")
+        return json.loads(data) if data else None
+
+    def _send(self, method: str, path: str, payload: Optional[bytes]) -> Tuple[int, bytes]:
+        """Send a single request over the kept-alive connection."""
+        if self._connection is None:
+            self._connection = HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self._connection.request(method, f"/api/{path}", body=payload, headers=self._headers)
+        response = self._connection.getresponse()
+        return response.status, response.read()
+
+    def close_connection(self) -> None:
+        """Close underlying HTTP connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def list_entities(
+        self, kind: str, columns: Sequence[str], vhost: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """List entities of given kind (``exchanges``, ``queues``).
+
+        :param kind: kind of entities to list
+        :param columns: entity properties to return, besides vhost
+        :param vhost: virtual host to list entities of, all of them if not given
+        """
+        path = kind if vhost is None else f"{kind}/{quote(vhost, safe='')}"
+        entities: List[Dict[str, Any]] = self.request(
+            "GET", f"{path}?columns={','.join([*columns, 'vhost'])}"
+        )
+        return entities
+
+
+def management_available(server: str) -> bool:
+    """Check whether management plugin ships with RabbitMQ server.
+
+    Plugins reside in directories listed in ``RABBITMQ_PLUGINS_DIR``,
+    by default in ``plugins`` directory of RabbitMQ's home, the one holding
+    the ``sbin`` directory the server script is installed to.
+
+    :param server: path to, or name of rabbitmq-server script
+    """
+    plugins_dirs = os.environ.get("RABBITMQ_PLUGINS_DIR")
+    if plugins_dirs:
+        directories = [Path(directory) for directory in plugins_dirs.split(os.pathsep)]
+    else:
+        server_path = shutil.which(server)
+        if server_path is None:
+            return False
+        directories = [Path(os.path.realpath(server_path)).parent.parent / "plugins"]
+    # either an .ez archive, or a directory, named after plugin and its version
+    return any(any(directory.glob(f"{MANAGEMENT_PLUGIN}-*")) for directory in directories)
+
+
+def read_plugins(plugins_file: Path) -> List[str]:
+    """Read names of plugins listed in enabled plugins file."""
+    if not plugins_file.exists():
+        return []
+    return _PLUGIN_NAME_PATTERN.findall(plugins_file.read_text())
+
+
+def enable_plugins(source: Path, plugins_file: Path, *plugins: str) -> None:
+    """Write node's own enabled plugins file, listing given plugins too.
+
+    The file holds a single Erlang list term, e.g. ``[rabbitmq_management].``
+    Plugins listed in the source file are kept. The source file itself is
+    left alone, since every node reading it would enable given plugins as well.
+
+    :param source: enabled plugins file to start from, if it exists
+    :param plugins_file: node's own file, to point ``RABBITMQ_ENABLED_PLUGINS_FILE`` to
+    :param plugins: names of plugins to enable
+    """
+    enabled = read_plugins(source)
+    missing = [plugin for plugin in plugins if plugin not in enabled]
+    plugins_file.write_text(f"[{','.join(enabled + missing)}].\n")
@@ -0,0 +1,264 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Publishing and consuming many messages at once, in tests."""
+
+import time
+from typing import Any, Iterable, List, NamedTuple, Optional
+
+from pika import BasicProperties, BlockingConnection, ConnectionParameters
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import ChannelClosed
+
+from pytest_rabbitmq.channels import AsyncConnection
+
+
+class PublishError(Exception):
+    """Raised when the broker didn't take all published messages."""
+
+    def __init__(self, published: int, nacked: int, returned: int, unconfirmed: int) -> None:
+        """Initialize error with counts of messages that didn't make it."""
+        self.published = published
+        self.nacked = nacked
+        self.returned = returned
+        self.unconfirmed = unconfirmed
+        super().__init__(
+            f"Of {published} messages published, {nacked} got nacked, {returned} returned "
+            f"as unroutable, and {unconfirmed} not confirmed in time"
+        )
+
+
+class ReceivedMessage(NamedTuple):
+    """Message consumed from a queue."""
+
+    exchange: str
+    routing_key: str
+    properties: BasicProperties
+    body: Optional[memoryview]
+    """Body, or None when bodies were not collected."""
+    redelivered: bool
+
+
+class _Publisher:
+    """Publishes over its own channel in confirm mode, without waiting for each confirm."""
+
+    def __init__(self) -> None:
+        self.channel: Any = None
+        self.ready = False
+        self.closed: Optional[Exception] = None
+        self.acked = 0
+        self.nacked = 0
+        self.returned = 0
+
+    def on_open(self, channel: Any) -> None:
+        """Turn on publisher confirms for the opened channel."""
+        self.channel = channel
+        channel.add_on_return_callback(self.on_return)
+        channel.confirm_delivery(self.on_confirm, callback=self.on_select_ok)
+
+    def on_select_ok(self, _frame: Any) -> None:
+        """Mark channel ready to publish."""
+        self.ready = True
+
+    def on_confirm(self, method_frame: Any) -> None:
+        """Count messages confirmed by the broker, possibly many at once."""
+        method = method_frame.method
+        confirmed = method.delivery_tag - self.acked - self.nacked
+        if not method.multiple:
+            confirmed = 1
+        if method.NAME == "Basic.Ack":
+            self.acked += confirmed
+        else:
+            self.nacked += confirmed
+
+    def on_return(self, _channel: Any, _method: Any, _properties: Any, _body: bytes) -> None:
+        """Count messages returned as unroutable."""
+        self.returned += 1
+
+    def on_close(self, _channel: Any, reason: Exception) -> None:
+        """Record why the channel got closed."""
+        self.closed = reason
+
+
+class MessageHelper:
+    """Publish and consume messages in bulk, over a client fixture's connection.
+
+    Publishing one by one with confirms waits a round trip per message, and
+    polling with ``basic_get`` waits one per message too. Here messages are
+    published all at once and confirmed in batches, and consumed with
+    a prefetch window, acknowledged many at a time.
+    """
+
+    def __init__(self, connection: BlockingConnection, parameters: ConnectionParameters) -> None:
+        """Initialize helper.
+
+        :param connection: connection to consume over
+        :param parameters: parameters to open connection to publish over with,
+            publishing without waiting for each confirm takes a connection of its own
+        """
+        self.connection = connection
+        self.parameters = parameters
+        self._channel: Optional[BlockingChannel] = None
+
+    @property
+    def channel(self) -> BlockingChannel:
+        """Return helper's own channel, reopened if the broker closed it."""
+        if self._channel is None or not self._channel.is_open:
+            self._channel = self.connection.channel()
+        return self._channel
+
+    def close(self) -> None:
+        """Close helper's channel."""
+        if self._channel is not None and self._channel.is_open:
+            self._channel.close()
+        self._channel = None
+
+    def publish_many(
+        self,
+        exchange: str,
+        routing_key: str,
+        bodies: Iterable[bytes],
+        properties: Optional[BasicProperties] = None,
+        mandatory: bool = False,
+        timeout: float = 30.0,
+    ) -> int:
+        """Publish messages with publisher confirms, waiting for all confirms at once.
+
+        Messages are written out together, over a connection of their own,
+        and the broker confirms them in batches, so publishing takes a few
+        round trips overall.
+
+        :param exchange: exchange to publish to
+        :param routing_key: routing key of every message
+        :param bodies: bodies of messages to publish
+        :param properties: properties of every message
+        :param mandatory: have unroutable messages returned, and count them as failed
+        :param timeout: seconds to wait for all messages to be confirmed
+        :returns: number of messages published
+        :raises PublishError: when any message got nacked, returned, or not confirmed in time
+        """
+        publisher = _Publisher()
+        deadline = time.monotonic() + timeout
+        with AsyncConnection(self.parameters, timeout) as connection:
+            connection.channel(publisher.on_open, publisher.on_close)
+            connection.run_until(lambda: publisher.ready or publisher.closed is not None, deadline)
+            if publisher.closed is not None:
+                raise publisher.closed
+            if not publisher.ready:
+                raise TimeoutError("Channel to publish over didn't open in time")
+            published = 0
+            for body in bodies:
+                publisher.channel.basic_publish(
+                    exchange, routing_key, body, properties, mandatory=mandatory
+                )
+                published += 1
+            connection.run_until(
+                lambda: publisher.acked + publisher.nacked >= published
+                or publisher.closed is not None,
+                deadline,
+            )
+        unconfirmed = published - publisher.acked - publisher.nacked
+        if publisher.nacked or publisher.returned or unconfirmed:
+            raise PublishError(published, publisher.nacked, publisher.returned, unconfirmed)
+        return published
+
+    def drain(
+        self,
+        queue: str,
+        count: Optional[int] = None,
+        timeout: float = 5.0,
+        prefetch: int = 1000,
+        collect_bodies: bool = True,
+    ) -> List[ReceivedMessage]:
+        """Consume and acknowledge messages from queue.
+
+        Messages are consumed with a prefetch window, rather than polled one
+        by one, and acknowledged many at a time.
+
+        :param queue: queue to consume from
+        :param count: number of messages to consume, defaults to as many as
+            the queue holds right now
+        :param timeout: seconds to wait for that many messages
+        :param prefetch: maximum number of messages on their way at once
+        :param collect_bodies: keep message bodies, wrapped in memoryviews
+            rather than copied. Skip them to only count messages.
+        :returns: consumed messages, fewer than count if timeout passed
+        """
+        channel = self.channel
+        if count is None:
+            count = channel.queue_declare(queue, passive=True).method.message_count
+        if not count:
+            return []
+        channel.basic_qos(prefetch_count=min(prefetch, count))
+        # acknowledge a batch once half of the window is consumed
+        ack_every = max(min(prefetch, count) // 2, 1)
+        messages: List[ReceivedMessage] = []
+        deadline = time.monotonic() + timeout
+        delivery_tag = unacked = 0
+        for method, properties, body in channel.consume(queue, inactivity_timeout=0.05):
+            if method is not None:
+                messages.append(
+                    ReceivedMessage(
+                        method.exchange,
+                        method.routing_key,
+                        properties,
+                        memoryview(body) if collect_bodies else None,
+                        method.redelivered,
+                    )
+                )
+                delivery_tag = method.delivery_tag
+                unacked += 1
+                if unacked >= ack_every:
+                    channel.basic_ack(delivery_tag, multiple=True)
+                    unacked = 0
+            if len(messages) >= count or time.monotonic() >= deadline:
+                break
+        if unacked:
+            channel.basic_ack(delivery_tag, multiple=True)
+        # messages delivered beyond count get requeued
+        channel.cancel()
+        return messages
+
+    def queue_depth(self, queue: str) -> int:
+        """Return number of messages ready in queue."""
+        count: int = self.channel.queue_declare(queue, passive=True).method.message_count
+        return count
+
+    def wait_for_queue_depth(
+        self, queue: str, depth: int, timeout: float = 5.0, interval: float = 0.05
+    ) -> int:
+        """Wait until queue holds exactly given number of ready messages.
+
+        :param queue: queue to check
+        :param depth: number of messages to wait for
+        :param timeout: seconds to wait
+        :param interval: seconds between checks
+        :returns: queue depth
+        :raises TimeoutError: when queue didn't reach depth in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                current = self.queue_depth(queue)
+            except ChannelClosed:
+                # queue doesn't exist (yet)
+                current = -1
+            if current == depth:
+                return current
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Queue {queue!r} holds {current} messages, not {depth}")
+            self.connection.sleep(interval)
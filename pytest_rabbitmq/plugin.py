@@ -16,11 +16,24 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
 """Plugin definition for pytest-rabbitmq."""
+from pathlib import Path
 from tempfile import gettempdir
+from typing import Any, Generator, Optional
 
-from pytest import Parser
+import pytest
+from pytest import (
+    Config,
+    Item,
+    Parser,
+    Session,
+    TerminalReporter,
+)
 
 from pytest_rabbitmq import factories
+from pytest_rabbitmq.factories.executor import READINESS_STRATEGIES
+from pytest_rabbitmq.factories.process import BACKENDS, LOCAL_BACKEND, warm_up_processes
+from pytest_rabbitmq.logs import running_tailers
+from pytest_rabbitmq.timing import recorder
 
 # pylint:disable=invalid-name
 _help_ctl = "RabbitMQ ctl path"
@@ -31,6 +44,51 @@ _help_host = "Host at which RabbitMQ will accept connections"
 _help_port = "Port at which RabbitMQ will accept connections"
 _help_distribution_port = "Port at which RabbitMQ nodes will communicate with each other"
 _help_node = "Node name for rabbitmq instance"
+_help_management = (
+    "Enable management plugin and use its HTTP API instead of rabbitmqctl, "
+    "by default when the plugin ships with the server"
+)
+_help_no_management = "Keep management plugin off, and use rabbitmqctl"
+_help_management_port = "Port at which RabbitMQ management HTTP API will accept connections"
+_help_mnesia_cache = "Start RabbitMQ from a cached copy of an initialised data directory"
+_help_keepalive = "Leave RabbitMQ running after tests, and reuse it in following test runs"
+_help_keepalive_timeout = "Seconds of inactivity, after which RabbitMQ left running gets stopped"
+_help_startup_timeout = "Seconds to wait for RabbitMQ to become ready"
+_help_readiness = (
+    "How to tell RabbitMQ is ready: 'port' once its port accepts connections, "
+    "'log' once it logs startup is complete, 'amqp' once AMQP handshake succeeds"
+)
+_help_xdist_shared = (
+    "Start a single RabbitMQ node for all pytest-xdist workers, with a virtual host per worker"
+)
+_help_fast = "Keep RabbitMQ data and logs in RAM, and configure it for tests rather than durability"
+_help_definitions = "Definitions JSON file for RabbitMQ to import on boot"
+_help_warm_up = (
+    "Start RabbitMQ in background while tests are collected, if collected tests request it"
+)
+_help_small = (
+    "Limit RabbitMQ resources, so many nodes fit on one machine: a single scheduler, "
+    "few threads, and publishers blocked at a tenth of memory"
+)
+_help_schedulers = "Number of Erlang schedulers RabbitMQ runs"
+_help_async_threads = "Size of Erlang async thread pool (+A) RabbitMQ runs"
+_help_erl_args = "Additional Erlang VM arguments for RabbitMQ"
+_help_memory_high_watermark = (
+    "Memory use at which RabbitMQ blocks publishers, a fraction of total memory, or an amount"
+)
+_help_cpu_affinity = "CPUs to run RabbitMQ on, as a list accepted by taskset, e.g. 0-3"
+_help_snapshot = "Export RabbitMQ definitions after boot, for the node to be rolled back to them"
+_help_log_lines = (
+    "Number of most recent RabbitMQ log lines to keep, and add to reports of failing tests, "
+    "0 not to follow the log"
+)
+_help_backend = (
+    "How to get RabbitMQ: 'local' starts it as a local process, 'noproc' attaches to one running "
+    "already, 'container' runs it in a container, kept running for following sessions"
+)
+_help_container_image = "Image to run RabbitMQ from, with 'container' backend"
+_help_timings = "Report time spent on RabbitMQ node, connections and teardown, by phase and test"
+_help_timings_json = "Write time spent on RabbitMQ, by phase and by test, to given JSON file"
 
 
 def pytest_addoption(parser: Parser) -> None:
@@ -71,6 +129,104 @@ def pytest_addoption(parser: Parser) -> None:
         help=_help_node,
         default=None,
     )
+    parser.addini(
+        name="rabbitmq_management",
+        type="bool",
+        help=_help_management,
+        default=None,
+    )
+    parser.addini(
+        name="rabbitmq_management_port",
+        help=_help_management_port,
+        default=None,
+    )
+    parser.addini(
+        name="rabbitmq_mnesia_cache",
+        type="bool",
+        help=_help_mnesia_cache,
+        default=False,
+    )
+    parser.addini(
+        name="rabbitmq_keepalive",
+        type="bool",
+        help=_help_keepalive,
+        default=False,
+    )
+    parser.addini(
+        name="rabbitmq_keepalive_timeout",
+        help=_help_keepalive_timeout,
+        default="1800",
+    )
+    parser.addini(
+        name="rabbitmq_startup_timeout",
+        help=_help_startup_timeout,
+        default="60",
+    )
+    parser.addini(
+        name="rabbitmq_readiness",
+        help=_help_readiness,
+        default="port",
+    )
+    parser.addini(
+        name="rabbitmq_xdist_shared",
+        type="bool",
+        help=_help_xdist_shared,
+        default=False,
+    )
+    parser.addini(
+        name="rabbitmq_fast",
+        type="bool",
+        help=_help_fast,
+        default=False,
+    )
+    parser.addini(
+        name="rabbitmq_definitions",
+        help=_help_definitions,
+        default=None,
+    )
+    parser.addini(
+        name="rabbitmq_warm_up",
+        type="bool",
+        help=_help_warm_up,
+        default=False,
+    )
+    parser.addini(
+        name="rabbitmq_small",
+        type="bool",
+        help=_help_small,
+        default=False,
+    )
+    parser.addini(name="rabbitmq_schedulers", help=_help_schedulers, default=None)
+    parser.addini(name="rabbitmq_async_threads", help=_help_async_threads, default=None)
+    parser.addini(name="rabbitmq_erl_args", help=_help_erl_args, default=None)
+    parser.addini(
+        name="rabbitmq_memory_high_watermark", help=_help_memory_high_watermark, default=None
+    )
+    parser.addini(name="rabbitmq_cpu_affinity", help=_help_cpu_affinity, default=None)
+    parser.addini(
+        name="rabbitmq_snapshot",
+        type="bool",
+        help=_help_snapshot,
+        default=False,
+    )
+    parser.addini(name="rabbitmq_log_lines", help=_help_log_lines, default=1000)
+    parser.addini(name="rabbitmq_backend", help=_help_backend, default=LOCAL_BACKEND)
+    parser.addini(
+        name="rabbitmq_container_image",
+        help=_help_container_image,
+        default="rabbitmq:3-management",
+    )
+    parser.addini(
+        name="rabbitmq_timings",
+        type="bool",
+        help=_help_timings,
+        default=False,
+    )
+    parser.addini(
+        name="rabbitmq_timings_json",
+        help=_help_timings_json,
+        default=None,
+    )
 
     parser.addoption(
         "--rabbitmq-host",
@@ -107,7 +263,252 @@ def pytest_addoption(parser: Parser) -> None:
         dest="rabbitmq_node",
         help=_help_node,
     )
+    parser.addoption(
+        "--rabbitmq-management",
+        action="store_true",
+        dest="rabbitmq_management",
+        default=None,
+        help=_help_management,
+    )
+    parser.addoption(
+        "--rabbitmq-no-management",
+        action="store_false",
+        dest="rabbitmq_management",
+        default=None,
+        help=_help_no_management,
+    )
+    parser.addoption(
+        "--rabbitmq-management-port",
+        action="store",
+        dest="rabbitmq_management_port",
+        help=_help_management_port,
+    )
+    parser.addoption(
+        "--rabbitmq-mnesia-cache",
+        action="store_true",
+        dest="rabbitmq_mnesia_cache",
+        help=_help_mnesia_cache,
+    )
+    parser.addoption(
+        "--rabbitmq-keepalive",
+        action="store_true",
+        dest="rabbitmq_keepalive",
+        help=_help_keepalive,
+    )
+    parser.addoption(
+        "--rabbitmq-keepalive-timeout",
+        action="store",
+        dest="rabbitmq_keepalive_timeout",
+        help=_help_keepalive_timeout,
+    )
+    parser.addoption(
+        "--rabbitmq-startup-timeout",
+        action="store",
+        dest="rabbitmq_startup_timeout",
+        help=_help_startup_timeout,
+    )
+    parser.addoption(
+        "--rabbitmq-readiness",
+        action="store",
+        choices=READINESS_STRATEGIES,
+        dest="rabbitmq_readiness",
+        help=_help_readiness,
+    )
+    parser.addoption(
+        "--rabbitmq-xdist-shared",
+        action="store_true",
+        dest="rabbitmq_xdist_shared",
+        help=_help_xdist_shared,
+    )
+    parser.addoption(
+        "--rabbitmq-fast",
+        action="store_true",
+        dest="rabbitmq_fast",
+        help=_help_fast,
+    )
+    parser.addoption(
+        "--rabbitmq-definitions",
+        action="store",
+        metavar="path",
+        dest="rabbitmq_definitions",
+        help=_help_definitions,
+    )
+    parser.addoption(
+        "--rabbitmq-warm-up",
+        action="store_true",
+        dest="rabbitmq_warm_up",
+        help=_help_warm_up,
+    )
+    parser.addoption(
+        "--rabbitmq-small",
+        action="store_true",
+        dest="rabbitmq_small",
+        help=_help_small,
+    )
+    parser.addoption(
+        "--rabbitmq-schedulers",
+        action="store",
+        dest="rabbitmq_schedulers",
+        help=_help_schedulers,
+    )
+    parser.addoption(
+        "--rabbitmq-async-threads",
+        action="store",
+        dest="rabbitmq_async_threads",
+        help=_help_async_threads,
+    )
+    parser.addoption(
+        "--rabbitmq-erl-args",
+        action="store",
+        dest="rabbitmq_erl_args",
+        help=_help_erl_args,
+    )
+    parser.addoption(
+        "--rabbitmq-memory-high-watermark",
+        action="store",
+        dest="rabbitmq_memory_high_watermark",
+        help=_help_memory_high_watermark,
+    )
+    parser.addoption(
+        "--rabbitmq-cpu-affinity",
+        action="store",
+        dest="rabbitmq_cpu_affinity",
+        help=_help_cpu_affinity,
+    )
+    parser.addoption(
+        "--rabbitmq-snapshot",
+        action="store_true",
+        dest="rabbitmq_snapshot",
+        help=_help_snapshot,
+    )
+    parser.addoption(
+        "--rabbitmq-log-lines",
+        action="store",
+        type=int,
+        dest="rabbitmq_log_lines",
+        help=_help_log_lines,
+    )
+    parser.addoption(
+        "--rabbitmq-backend",
+        action="store",
+        choices=(LOCAL_BACKEND, *BACKENDS),
+        dest="rabbitmq_backend",
+        help=_help_backend,
+    )
+    parser.addoption(
+        "--rabbitmq-container-image",
+        action="store",
+        dest="rabbitmq_container_image",
+        help=_help_container_image,
+    )
+    parser.addoption(
+        "--rabbitmq-timings",
+        action="store_true",
+        dest="rabbitmq_timings",
+        help=_help_timings,
+    )
+    parser.addoption(
+        "--rabbitmq-timings-json",
+        action="store",
+        metavar="path",
+        dest="rabbitmq_timings_json",
+        help=_help_timings_json,
+    )
+
+
+def _timings_json(config: Config) -> Optional[Path]:
+    """Return path to write timings to, if configured."""
+    path = config.getoption("rabbitmq_timings_json") or config.getini("rabbitmq_timings_json")
+    return Path(path) if path else None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item: Item) -> Generator[None, None, None]:
+    """Attribute timings and node logs recorded while the test runs to it, fixtures included."""
+    recorder.current_test = item.nodeid
+    for tailer in list(running_tailers):
+        tailer.mark()
+    yield
+    recorder.current_test = None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: Item) -> Generator[None, Any, None]:
+    """Add lines nodes logged since the test started to its report, if it failed."""
+    outcome = yield
+    report = outcome.get_result()
+    if not report.failed:
+        return
+    for tailer in list(running_tailers):
+        lines = tailer.lines_since_mark()
+        if lines:
+            report.sections.append(
+                (f"Captured RabbitMQ log {tailer.name} {report.when}", "\n".join(lines))
+            )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node: Any) -> None:
+    """Collect timings recorded by a pytest-xdist worker."""
+    recorder.extend(getattr(node, "workeroutput", {}).get("rabbitmq_timings", []))
+
+
+def pytest_sessionfinish(session: Session) -> None:
+    """Pass timings on to pytest-xdist controller, or write them to JSON file."""
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["rabbitmq_timings"] = [list(timing) for timing in recorder.timings]
+        return
+    path = _timings_json(session.config)
+    if path:
+        recorder.write_json(path)
+
+
+def pytest_terminal_summary(terminalreporter: TerminalReporter, config: Config) -> None:
+    """Summarize time spent on RabbitMQ, if requested."""
+    if not (config.getoption("rabbitmq_timings") or config.getini("rabbitmq_timings")):
+        return
+    if not recorder.timings:
+        return
+    terminalreporter.write_sep("=", "RabbitMQ timings")
+    terminalreporter.write_line(f"{'phase':<40} {'calls':>7} {'total':>9} {'mean':>9} {'max':>9}")
+    for phase, stats in recorder.by_phase().items():
+        terminalreporter.write_line(
+            f"{phase:<40} {stats.calls:>7} {stats.total:>8.3f}s "
+            f"{stats.mean:>8.3f}s {stats.max:>8.3f}s"
+        )
+    slowest = recorder.slowest_tests(10)
+    if slowest:
+        terminalreporter.write_line("")
+        terminalreporter.write_line("slowest tests, by time spent on RabbitMQ:")
+        for item in slowest:
+            terminalreporter.write_line(f"{item['total']:>8.3f}s {item['test']}")
+    path = _timings_json(config)
+    if path:
+        terminalreporter.write_line(f"timings written to {path}")
+
+
+def _runs_tests(session: Session) -> bool:
+    """Tell whether this process is going to run the collected tests."""
+    # pytest-xdist controller leaves running tests to its workers
+    return not (
+        session.config.option.collectonly or session.config.pluginmanager.hasplugin("dsession")
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection(session: Session) -> None:
+    """Start RabbitMQ processes with warm up enabled, to boot while tests are collected."""
+    if _runs_tests(session):
+        warm_up_processes(session)
+
+
+def pytest_collection_finish(session: Session) -> None:
+    """Warm up processes requested by collected tests, stop ones no test is going to use."""
+    if _runs_tests(session):
+        warm_up_processes(session, session.items)
 
 
 rabbitmq_proc = factories.rabbitmq_proc()
 rabbitmq = factories.rabbitmq("rabbitmq_proc")
+rabbitmq_messages = factories.rabbitmq_messages("rabbitmq")
@@ -0,0 +1,138 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Pool of connections reused between tests."""
+
+from typing import Any, List, Optional, Type
+
+from pika import BlockingConnection, ConnectionParameters
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import AMQPError
+
+from pytest_rabbitmq.tracking import TrackingConnection
+
+
+class PooledConnection(BlockingConnection):  # type: ignore[misc]
+    """Blocking connection remembering channels opened over it.
+
+    Lets the pool close whatever channels a test left open,
+    before handing the connection to the next test.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize connection with no channels opened yet."""
+        super().__init__(*args, **kwargs)
+        self._opened_channels: List[BlockingChannel] = []
+
+    def channel(self, channel_number: Optional[int] = None) -> BlockingChannel:
+        """Open a channel, and remember it."""
+        channel = super().channel(channel_number)
+        self._opened_channels.append(channel)
+        return channel
+
+    def close_channels(self) -> None:
+        """Close all channels opened over this connection."""
+        channels, self._opened_channels = self._opened_channels, []
+        for channel in channels:
+            if channel.is_open:
+                channel.close()
+
+
+class PooledTrackingConnection(TrackingConnection, PooledConnection):
+    """Pooled connection, recording what was declared over its channels."""
+
+
+class ConnectionPool:
+    """Live connections to a single broker, handed out one test at a time.
+
+    Opening a connection costs a TCP and AMQP handshake (and a TLS one,
+    where used). Reusing connections between tests saves that, which adds up
+    in suites of many short tests.
+    """
+
+    def __init__(
+        self,
+        parameters: ConnectionParameters,
+        connection_class: Type[PooledConnection] = PooledConnection,
+        max_idle: int = 2,
+    ) -> None:
+        """Initialize empty pool.
+
+        :param parameters: parameters to open new connections with
+        :param connection_class: class of connections to open
+        :param max_idle: how many connections to keep, while not in use
+        """
+        self.parameters = parameters
+        self.connection_class = connection_class
+        self.max_idle = max_idle
+        self.opened = 0
+        """Number of connections opened by the pool so far."""
+        self._idle: List[PooledConnection] = []
+
+    def acquire(self) -> PooledConnection:
+        """Return a healthy idle connection, or a new one if there are none."""
+        while self._idle:
+            connection = self._idle.pop()
+            if self._healthy(connection):
+                return connection
+            self._discard(connection)
+        self.opened += 1
+        return self.connection_class(self.parameters)
+
+    def release(self, connection: PooledConnection) -> None:
+        """Take connection back, after closing its channels.
+
+        Broken connections, and those above ``max_idle``, get discarded.
+        """
+        try:
+            connection.close_channels()
+        except AMQPError:
+            self._discard(connection)
+            return
+        if len(self._idle) < self.max_idle and self._healthy(connection):
+            self._idle.append(connection)
+        else:
+            self._discard(connection)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+    @staticmethod
+    def _healthy(connection: PooledConnection) -> bool:
+        """Check connection is still open, by processing pending I/O without blocking.
+
+        Handles heartbeats due, and notices if the broker closed the connection.
+        """
+        if not connection.is_open:
+            return False
+        try:
+            connection.process_data_events(time_limit=0)
+        except AMQPError:
+            return False
+        return bool(connection.is_open)
+
+    @staticmethod
+    def _discard(connection: PooledConnection) -> None:
+        """Close connection, if it's still open."""
+        try:
+            if connection.is_open:
+                connection.close()
+        except AMQPError:
+            pass
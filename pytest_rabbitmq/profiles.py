@@ -0,0 +1,186 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Node configuration profiles, tuned for tests rather than production."""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+RAM_DIRECTORY = Path("/dev/shm")
+"""RAM backed file system, present on most Linux systems."""
+
+FAST_CONFIG = {
+    # nodes run on CI runners with little free disk space, and data is in RAM anyway
+    "disk_free_limit.absolute": "1MB",
+    # message store rolls over to new files sooner, and compacts smaller ones
+    "msg_store_file_size_limit": "2097152",
+    "log.console": "false",
+    "log.file.level": "warning",
+    "log.connection.level": "error",
+}
+"""rabbitmq.conf settings of the fast profile."""
+
+FAST_ADVANCED_CONFIG = "[{mnesia, [{dump_log_write_threshold, 10000}]}].\n"
+"""advanced.config of the fast profile, dumping mnesia transaction log less often."""
+
+
+class NodeResources(TypedDict):
+    """Resources a node may use, left to Erlang VM and RabbitMQ defaults when None."""
+
+    schedulers: Optional[int]
+    async_threads: Optional[int]
+    erl_args: str
+    memory_high_watermark: Optional[str]
+    cpu_affinity: Optional[str]
+
+
+SMALL_NODE: NodeResources = {
+    "schedulers": 1,
+    "async_threads": 4,
+    # schedulers don't spin waiting for work, leaving CPU to other nodes
+    "erl_args": "+sbwt none +sbwtdcpu none +sbwtdio none +SDio 2",
+    "memory_high_watermark": "0.1",
+    "cpu_affinity": None,
+}
+"""Resources of the small node preset, so that many nodes fit on one machine.
+
+By default, each node starts a scheduler per CPU core, busy waiting for work,
+and may use 40% of the machine's memory before blocking publishers.
+"""
+
+
+def ram_directory(prefix: str) -> Optional[Path]:
+    """Create a directory on RAM backed file system, if there is a writable one.
+
+    :param prefix: prefix of created directory's name
+    :returns: created directory, or None when RAM backed file system is missing
+    """
+    if not (RAM_DIRECTORY.is_dir() and os.access(RAM_DIRECTORY, os.W_OK)):
+        return None
+    return Path(tempfile.mkdtemp(prefix=prefix, dir=RAM_DIRECTORY))
+
+
+def fast_config(management: bool, readiness: str) -> Dict[str, str]:
+    """Return rabbitmq.conf settings of the fast profile.
+
+    :param management: whether management plugin is enabled, it needs statistics
+    :param readiness: readiness strategy, ``log`` needs startup to be logged
+    """
+    config = dict(FAST_CONFIG)
+    if not management:
+        # nothing reads statistics, so don't collect and emit them
+        config["collect_statistics"] = "none"
+    if readiness == "log":
+        # startup completion is logged at info level
+        config["log.file.level"] = "info"
+    return config
+
+
+def write_config(
+    directory: Path, config: Dict[str, str], advanced_config: str = ""
+) -> Tuple[Path, Optional[Path]]:
+    """Write rabbitmq.conf, and advanced.config if given, to directory.
+
+    :returns: paths to written rabbitmq.conf and advanced.config
+    """
+    config_file = directory / "rabbitmq.conf"
+    config_file.write_text("".join(f"{key} = {value}\n" for key, value in config.items()))
+    if not advanced_config:
+        return config_file, None
+    advanced_config_file = directory / "advanced.config"
+    advanced_config_file.write_text(advanced_config)
+    return config_file, advanced_config_file
+
+
+def node_resources(
+    small: Optional[bool],
+    schedulers: Optional[int] = None,
+    async_threads: Optional[int] = None,
+    erl_args: str = "",
+    memory_high_watermark: Optional[str] = None,
+    cpu_affinity: Optional[str] = None,
+) -> NodeResources:
+    """Return resources of a node, given ones filled in from small node preset if requested.
+
+    :param small: start with :data:`SMALL_NODE` preset. When not set,
+        the preset is used as soon as any resource is given.
+    :param schedulers: number of Erlang schedulers
+    :param async_threads: size of Erlang async thread pool (``+A``)
+    :param erl_args: additional Erlang VM arguments, added after preset's
+    :param memory_high_watermark: memory use at which publishers get blocked,
+        either a fraction of total memory (``0.2``), or an absolute amount (``512MB``)
+    :param cpu_affinity: CPUs to run the node on, as a list accepted by
+        ``taskset --cpu-list``, e.g. ``0-3`` or ``1,3``
+    """
+    if small is None:
+        small = any(
+            (
+                schedulers is not None,
+                async_threads is not None,
+                erl_args,
+                memory_high_watermark is not None,
+                cpu_affinity is not None,
+            )
+        )
+    resources: NodeResources = (
+        SMALL_NODE.copy()
+        if small
+        else {
+            "schedulers": None,
+            "async_threads": None,
+            "erl_args": "",
+            "memory_high_watermark": None,
+            "cpu_affinity": None,
+        }
+    )
+    if schedulers is not None:
+        resources["schedulers"] = schedulers
+    if async_threads is not None:
+        resources["async_threads"] = async_threads
+    if erl_args:
+        resources["erl_args"] = " ".join(filter(None, (resources["erl_args"], erl_args)))
+    if memory_high_watermark is not None:
+        resources["memory_high_watermark"] = memory_high_watermark
+    if cpu_affinity is not None:
+        resources["cpu_affinity"] = cpu_affinity
+    return resources
+
+
+def resources_erl_args(resources: NodeResources) -> str:
+    """Return Erlang VM arguments limiting node's schedulers and threads."""
+    args: List[str] = []
+    if resources["schedulers"]:
+        args.append(f"+S {resources['schedulers']}:{resources['schedulers']}")
+    if resources["async_threads"]:
+        args.append(f"+A {resources['async_threads']}")
+    if resources["erl_args"]:
+        args.append(resources["erl_args"])
+    return " ".join(args)
+
+
+def resources_config(resources: NodeResources) -> Dict[str, str]:
+    """Return rabbitmq.conf settings limiting node's memory use."""
+    watermark = resources["memory_high_watermark"]
+    if not watermark:
+        return {}
+    try:
+        float(watermark)
+    except ValueError:
+        return {"vm_memory_high_watermark.absolute": watermark}
+    return {"vm_memory_high_watermark.relative": watermark}
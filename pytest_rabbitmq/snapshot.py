@@ -0,0 +1,171 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Bringing broker state back to a snapshot, by diffing exported definitions.
+
+Only what changed since the snapshot gets reverted, so rolling back costs
+a few requests rather than a node restart. Messages are not part of
+definitions, purging them is left to client fixtures.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, NamedTuple, Set, Tuple
+from urllib.parse import quote
+
+DefinitionKey = Tuple[Any, ...]
+
+DEFINITION_KEYS: Dict[str, Callable[[Dict[str, Any]], DefinitionKey]] = {
+    "vhosts": lambda entity: (entity["name"],),
+    "users": lambda entity: (entity["name"],),
+    "permissions": lambda entity: (entity["vhost"], entity["user"]),
+    "topic_permissions": lambda entity: (entity["vhost"], entity["user"], entity["exchange"]),
+    "policies": lambda entity: (entity["vhost"], entity["name"]),
+    "parameters": lambda entity: (entity["vhost"], entity["component"], entity["name"]),
+    "global_parameters": lambda entity: (entity["name"],),
+    "exchanges": lambda entity: (entity["vhost"], entity["name"]),
+    "queues": lambda entity: (entity["vhost"], entity["name"]),
+    "bindings": lambda entity: (
+        entity["vhost"],
+        entity["source"],
+        entity["destination"],
+        entity["destination_type"],
+        entity["routing_key"],
+        json.dumps(entity.get("arguments") or {}, sort_keys=True),
+    ),
+}
+"""Kinds of definitions rolled back, with what identifies an entity of each kind."""
+
+VHOST_INDEPENDENT = ("vhosts", "users", "global_parameters")
+"""Kinds of definitions that belong to the whole node, rather than a virtual host."""
+
+TOPOLOGY = ("exchanges", "queues", "bindings")
+"""Kinds of definitions deleted over AMQP, rather than management API or rabbitmqctl."""
+
+
+class DefinitionsDiff(NamedTuple):
+    """What to do, to bring broker back to snapshot."""
+
+    delete: Dict[str, List[Dict[str, Any]]]
+    """Entities added since the snapshot, and exchanges and queues changed since."""
+    restore: Dict[str, List[Dict[str, Any]]]
+    """Entities removed or changed since the snapshot, as definitions to import."""
+
+    def __bool__(self) -> bool:
+        """Tell whether anything changed since the snapshot."""
+        return any(self.delete.values()) or any(self.restore.values())
+
+
+def _by_key(definitions: Dict[str, Any], kind: str) -> Dict[DefinitionKey, Dict[str, Any]]:
+    """Return entities of given kind, by what identifies them."""
+    key = DEFINITION_KEYS[kind]
+    return {key(entity): entity for entity in definitions.get(kind) or []}
+
+
+def vhost_scoped(definitions: Dict[str, Any], vhost: str) -> Dict[str, Any]:
+    """Keep only definitions of entities in given virtual host.
+
+    Users, virtual hosts and global parameters belong to the whole node,
+    and are left out.
+
+    :param definitions: definitions exported from the node
+    :param vhost: virtual host to keep entities of
+    """
+    return {
+        kind: [entity for entity in definitions.get(kind) or [] if entity.get("vhost") == vhost]
+        for kind in DEFINITION_KEYS
+        if kind not in VHOST_INDEPENDENT
+    }
+
+
+def diff_definitions(snapshot: Dict[str, Any], current: Dict[str, Any]) -> DefinitionsDiff:
+    """Compare current definitions with the snapshot.
+
+    Definitions imported again overwrite existing ones, except for
+    exchanges and queues, which can't be redeclared with other properties.
+    Those get deleted and imported again, along with their bindings.
+
+    :param snapshot: definitions exported when snapshot was taken
+    :param current: definitions exported now
+    """
+    delete: Dict[str, List[Dict[str, Any]]] = {}
+    restore: Dict[str, List[Dict[str, Any]]] = {}
+    recreated: Set[Tuple[str, str]] = set()
+    for kind in DEFINITION_KEYS:
+        before = _by_key(snapshot, kind)
+        now = _by_key(current, kind)
+        delete[kind] = [entity for key, entity in now.items() if key not in before]
+        restore[kind] = [entity for key, entity in before.items() if now.get(key) != entity]
+        if kind in ("exchanges", "queues"):
+            changed = [
+                now[key] for key, entity in before.items() if key in now and now[key] != entity
+            ]
+            delete[kind].extend(changed)
+            recreated.update((entity["vhost"], entity["name"]) for entity in changed)
+    # topic permissions get cleared for all exchanges of user's virtual host at once
+    cleared = {(entity["vhost"], entity["user"]) for entity in delete["topic_permissions"]}
+    restore["topic_permissions"].extend(
+        entity
+        for entity in snapshot.get("topic_permissions") or []
+        if (entity["vhost"], entity["user"]) in cleared
+        and entity not in restore["topic_permissions"]
+    )
+    # deleting an exchange or a queue deletes its bindings too
+    restored_bindings = {DEFINITION_KEYS["bindings"](binding) for binding in restore["bindings"]}
+    restore["bindings"].extend(
+        binding
+        for binding in snapshot.get("bindings") or []
+        if DEFINITION_KEYS["bindings"](binding) not in restored_bindings
+        and (
+            (binding["vhost"], binding["source"]) in recreated
+            or (binding["vhost"], binding["destination"]) in recreated
+        )
+    )
+    return DefinitionsDiff(delete, restore)
+
+
+def management_deletion(kind: str, entity: Dict[str, Any]) -> str:
+    """Return management API path to delete entity of given kind with."""
+    if kind in ("users", "vhosts", "global_parameters"):
+        return f"{kind.replace('_', '-')}/{quote(entity['name'], safe='')}"
+    vhost = quote(entity["vhost"], safe="")
+    if kind in ("permissions", "topic_permissions"):
+        return f"{kind.replace('_', '-')}/{vhost}/{quote(entity['user'], safe='')}"
+    if kind == "policies":
+        return f"policies/{vhost}/{quote(entity['name'], safe='')}"
+    if kind == "parameters":
+        component = quote(entity["component"], safe="")
+        return f"parameters/{component}/{vhost}/{quote(entity['name'], safe='')}"
+    raise ValueError(f"Entities of kind {kind!r} are not deleted over management API")
+
+
+def rabbitmqctl_deletion(kind: str, entity: Dict[str, Any]) -> Tuple[str, ...]:
+    """Return rabbitmqctl arguments to delete entity of given kind with."""
+    if kind == "users":
+        return ("delete_user", entity["name"])
+    if kind == "vhosts":
+        return ("delete_vhost", entity["name"])
+    if kind == "global_parameters":
+        return ("clear_global_parameter", entity["name"])
+    if kind == "permissions":
+        return ("clear_permissions", "-p", entity["vhost"], entity["user"])
+    if kind == "topic_permissions":
+        return ("clear_topic_permissions", "-p", entity["vhost"], entity["user"])
+    if kind == "policies":
+        return ("clear_policy", "-p", entity["vhost"], entity["name"])
+    if kind == "parameters":
+        return ("clear_parameter", "-p", entity["vhost"], entity["component"], entity["name"])
+    raise ValueError(f"Entities of kind {kind!r} are not deleted with rabbitmqctl")
@@ -0,0 +1,141 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Measuring time spent on RabbitMQ, by phase and by test.
+
+Phases are named with a dot separated prefix telling what they belong to:
+
+* ``node.start``, ``node.stop`` - booting and stopping RabbitMQ node
+* ``rabbitmqctl.<command>`` - each rabbitmqctl call
+* ``connection.open``, ``connection.close`` - client fixture's connection
+* ``teardown.<strategy>`` - client fixture's teardown, e.g. ``teardown.clear``
+* ``snapshot.take``, ``snapshot.rollback`` - exporting and rolling back to snapshot
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+
+class Timing(NamedTuple):
+    """Time spent in a single phase."""
+
+    phase: str
+    seconds: float
+    test: Optional[str]
+    """Node id of the test running at the time, if any."""
+
+
+class PhaseStats(NamedTuple):
+    """Timings of a phase, aggregated."""
+
+    calls: int
+    total: float
+    max: float
+
+    @property
+    def mean(self) -> float:
+        """Return mean time spent in the phase."""
+        return self.total / self.calls if self.calls else 0.0
+
+
+class TimingRecorder:
+    """Collects timings of phases, attributing them to the running test.
+
+    Measuring is cheap (two clock reads and an append), so it's always on.
+    Session fixtures set up or torn down along with a test are attributed to it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize recorder, with nothing recorded."""
+        self.timings: List[Timing] = []
+        self.current_test: Optional[str] = None
+        """Node id of the test running right now."""
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Record time spent in a phase."""
+        with self._lock:
+            self.timings.append(Timing(phase, seconds, self.current_test))
+
+    def extend(self, timings: Iterable[Iterable[Any]]) -> None:
+        """Add timings recorded elsewhere, e.g. by pytest-xdist workers."""
+        with self._lock:
+            self.timings.extend(Timing(*timing) for timing in timings)
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Record time spent in the wrapped block, even if it raised."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - started_at)
+
+    def clear(self) -> None:
+        """Forget everything recorded."""
+        with self._lock:
+            self.timings = []
+
+    def by_phase(self) -> Dict[str, PhaseStats]:
+        """Return timings aggregated by phase, longest total first."""
+        seconds: Dict[str, List[float]] = {}
+        for timing in self.timings:
+            seconds.setdefault(timing.phase, []).append(timing.seconds)
+        stats = {
+            phase: PhaseStats(len(values), sum(values), max(values))
+            for phase, values in seconds.items()
+        }
+        return dict(sorted(stats.items(), key=lambda item: item[1].total, reverse=True))
+
+    def by_test(self) -> Dict[str, Dict[str, float]]:
+        """Return total seconds spent in each phase, for each test."""
+        tests: Dict[str, Dict[str, float]] = {}
+        for timing in self.timings:
+            phases = tests.setdefault(timing.test or "", {})
+            phases[timing.phase] = phases.get(timing.phase, 0.0) + timing.seconds
+        return tests
+
+    def slowest_tests(self, count: int) -> List[Dict[str, Any]]:
+        """Return tests that spent most time on RabbitMQ, with their totals."""
+        totals = [
+            {"test": test, "total": sum(phases.values())}
+            for test, phases in self.by_test().items()
+            if test
+        ]
+        return sorted(totals, key=lambda item: item["total"], reverse=True)[:count]
+
+    def report(self) -> Dict[str, Any]:
+        """Return all timings in a JSON serializable form."""
+        return {
+            "phases": {
+                phase: {**stats._asdict(), "mean": stats.mean}
+                for phase, stats in self.by_phase().items()
+            },
+            "tests": self.by_test(),
+        }
+
+    def write_json(self, path: Path) -> None:
+        """Write report to a JSON file."""
+        path.write_text(json.dumps(self.report(), indent=2, sort_keys=True), encoding="utf-8")
+
+
+recorder = TimingRecorder()
+"""Timings recorded in this process."""
@@ -0,0 +1,254 @@
+# Copyright (C) 2024 by Clearcode <http://clearcode.cc>
+# and associates (see AUTHORS).
+
+# This file is part of pytest-rabbitmq.
+
+# pytest-rabbitmq is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# pytest-rabbitmq is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with pytest-rabbitmq.  If not, see <http://www.gnu.org/licenses/>.
+"""Connection recording entities declared by the test."""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pika import BlockingConnection
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import ChannelClosed
+from pika.exchange_type import ExchangeType
+
+
+class Declaration(NamedTuple):
+    """Entity or binding declared on a tracked channel.
+
+    For bindings, ``name`` is the destination (queue or exchange),
+    and ``source`` the exchange it got bound to.
+    """
+
+    kind: str
+    name: str
+    source: str = ""
+    routing_key: Optional[str] = None
+    arguments: Optional[Tuple[Tuple[str, Any], ...]] = None
+
+    def undo(self, channel: BlockingChannel) -> None:
+        """Revert this declaration using given channel."""
+        arguments = dict(self.arguments) if self.arguments is not None else None
+        if self.kind == "exchange":
+            channel.exchange_delete(self.name)
+        elif self.kind == "queue":
+            channel.queue_delete(self.name)
+        elif self.kind == "queue_binding":
+            channel.queue_unbind(self.name, self.source, self.routing_key, arguments)
+        elif self.kind == "exchange_binding":
+            channel.exchange_unbind(self.name, self.source, self.routing_key, arguments)
+
+
+def _is_reserved(name: str) -> bool:
+    """Check whether name is reserved for the server (or left for server to generate)."""
+    return not name or name.startswith("amq.")
+
+
+def _freeze(arguments: Optional[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """Turn binding arguments into a hashable value."""
+    if arguments is None:
+        return None
+    return tuple(sorted(arguments.items()))
+
+
+class TrackingChannel:
+    """Blocking channel recording declarations made through it.
+
+    Opened by :meth:`TrackingConnection.channel`, it wraps a plain blocking
+    channel, forwarding everything to it, and records declarations on the
+    connection it belongs to. It passes for a :class:`BlockingChannel`
+    in ``isinstance`` checks.
+    """
+
+    def __init__(self, channel: BlockingChannel, connection: "TrackingConnection") -> None:
+        """Wrap channel.
+
+        :param channel: channel to forward to
+        :param connection: connection to record declarations on
+        """
+        self._channel = channel
+        self._tracker = connection
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> type:
+        """Pass for the wrapped channel's class."""
+        return type(self._channel)
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward everything not tracked to the wrapped channel."""
+        return getattr(self._channel, name)
+
+    def __int__(self) -> int:
+        """Return channel number."""
+        return int(self._channel)
+
+    def __repr__(self) -> str:
+        """Represent as the wrapped channel."""
+        return repr(self._channel)
+
+    def __enter__(self) -> "TrackingChannel":
+        """Use channel as a context manager, like the wrapped one."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close channel on leaving the context, like the wrapped one."""
+        self._channel.__exit__(*args)
+
+    def exchange_declare(
+        self,
+        exchange: str,
+        exchange_type: ExchangeType = ExchangeType.direct,
+        passive: bool = False,
+        durable: bool = False,
+        auto_delete: bool = False,
+        internal: bool = False,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Declare exchange and record it."""
+        result = self._channel.exchange_declare(
+            exchange, exchange_type, passive, durable, auto_delete, internal, arguments
+        )
+        if not passive:
+            self._tracker.record(Declaration("exchange", exchange))
+        return result
+
+    def queue_declare(
+        self,
+        queue: str,
+        passive: bool = False,
+        durable: bool = False,
+        exclusive: bool = False,
+        auto_delete: bool = False,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Declare queue and record it, including server named ones."""
+        result = self._channel.queue_declare(
+            queue, passive, durable, exclusive, auto_delete, arguments
+        )
+        if not passive:
+            self._tracker.record(Declaration("queue", result.method.queue))
+        return result
+
+    def queue_bind(
+        self,
+        queue: str,
+        exchange: str,
+        routing_key: Optional[str] = None,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Bind queue and record the binding."""
+        result = self._channel.queue_bind(queue, exchange, routing_key, arguments)
+        self._tracker.record(
+            Declaration("queue_binding", queue, exchange, routing_key, _freeze(arguments))
+        )
+        return result
+
+    def exchange_bind(
+        self,
+        destination: str,
+        source: str,
+        routing_key: str = "",
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Bind exchange and record the binding."""
+        result = self._channel.exchange_bind(destination, source, routing_key, arguments)
+        self._tracker.record(
+            Declaration("exchange_binding", destination, source, routing_key, _freeze(arguments))
+        )
+        return result
+
+    def exchange_delete(self, exchange: Optional[str] = None, if_unused: bool = False) -> Any:
+        """Delete exchange and stop tracking it."""
+        result = self._channel.exchange_delete(exchange, if_unused)
+        self._tracker.forget("exchange", exchange or "")
+        return result
+
+    def queue_delete(self, queue: str, if_unused: bool = False, if_empty: bool = False) -> Any:
+        """Delete queue and stop tracking it."""
+        result = self._channel.queue_delete(queue, if_unused, if_empty)
+        self._tracker.forget("queue", queue)
+        return result
+
+
+class TrackingConnection(BlockingConnection):  # type: ignore[misc]
+    """Blocking connection recording what was declared over its channels.
+
+    Lets teardown remove exactly what the test created,
+    without listing entities on the broker.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize connection with empty declaration log."""
+        super().__init__(*args, **kwargs)
+        self._declarations: Dict[Declaration, None] = {}
+        self.on_change: Optional[Callable[[], None]] = None
+        """Called whenever an entity gets declared or deleted."""
+
+    def channel(self, channel_number: Optional[int] = None) -> TrackingChannel:
+        """Open a channel recording declarations made through it."""
+        return TrackingChannel(super().channel(channel_number), self)
+
+    def untracked_channel(self, channel_number: Optional[int] = None) -> BlockingChannel:
+        """Open a plain channel."""
+        return super().channel(channel_number)
+
+    def record(self, declaration: Declaration) -> None:
+        """Record declaration, unless it is about an entity reserved by the server."""
+        if _is_reserved(declaration.name):
+            return
+        self._declarations.setdefault(declaration)
+        if self.on_change:
+            self.on_change()
+
+    def forget(self, kind: str, name: str) -> None:
+        """Stop tracking an entity removed by the test."""
+        self._declarations.pop(Declaration(kind, name), None)
+        if self.on_change:
+            self.on_change()
+
+    @property
+    def declarations(self) -> List[Declaration]:
+        """Declarations in the order they were made."""
+        return list(self._declarations)
+
+    def undo_declarations(self) -> None:
+        """Delete everything declared on this connection, newest first.
+
+        Bindings of entities that are about to be deleted are skipped,
+        as the broker drops them along with the entity.
+        """
+        deleted = {
+            (declaration.kind, declaration.name)
+            for declaration in self._declarations
+            if declaration.kind in ("exchange", "queue")
+        }
+        channel = self.untracked_channel()
+        for declaration in reversed(self.declarations):
+            if declaration.kind.endswith("binding") and (
+                (declaration.kind.split("_")[0], declaration.name) in deleted
+                or ("exchange", declaration.source) in deleted
+            ):
+                continue
+            if not channel.is_open:
+                channel = self.untracked_channel()
+            try:
+                declaration.undo(channel)
+            except ChannelClosed:
+                # e.g. the entity was exclusive to another connection,
+                # carry on with a new channel
+                pass
+        self._declarations.clear()
+        if channel.is_open:
+            channel.close()
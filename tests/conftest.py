@@ -4,6 +4,7 @@ from pathlib import Path
 
 from pytest_rabbitmq import factories
 from pytest_rabbitmq.plugin import *  # noqa: F403
+from tests.test_definitions import DEFINITIONS
 
 # pylint:disable=invalid-name
 rabbitmq_proc2 = factories.rabbitmq_proc(port=5674, node="test2")
@@ -13,4 +14,33 @@ rabbitmq_rand = factories.rabbitmq("rabbitmq_rand_proc")
 rabbitmq_rand_proc2 = factories.rabbitmq_proc(port=None)
 rabbitmq_rand_proc3 = factories.rabbitmq_proc(port=None)
 rabbitmq_plugindir = factories.rabbitmq_proc(plugindir=Path("/etc"))
+rabbitmq_cached_proc = factories.rabbitmq_proc(port=5675, node="cached", mnesia_cache=True)
+rabbitmq_kept_proc = factories.rabbitmq_proc(port=None, keepalive=True, keepalive_timeout=30)
+rabbitmq_kept = factories.rabbitmq("rabbitmq_kept_proc")
+rabbitmq_log_ready_proc = factories.rabbitmq_proc(port=None, readiness="log")
+rabbitmq_amqp_ready_proc = factories.rabbitmq_proc(port=None, readiness="amqp", startup_timeout=90)
+rabbitmq_tracked = factories.rabbitmq("rabbitmq_proc", track_declarations=True)
+rabbitmq_isolated = factories.rabbitmq("rabbitmq_proc", isolate_vhost=True)
+rabbitmq_management_proc = factories.rabbitmq_proc(port=None, management=True)
+rabbitmq_management = factories.rabbitmq("rabbitmq_management_proc")
+rabbitmq_group = factories.rabbitmq_proc_group(first={"port": None}, second={"port": None})
+rabbitmq_test_cluster = factories.rabbitmq_cluster(nodes=2)
+rabbitmq_pooled = factories.rabbitmq("rabbitmq_proc", pooled=True)
+rabbitmq_purged = factories.rabbitmq("rabbitmq_proc", purge=True)
+rabbitmq_inprocess_proc = factories.rabbitmq_inprocess_proc()
+rabbitmq_inprocess = factories.rabbitmq("rabbitmq_inprocess_proc")
+rabbitmq_inprocess_tracked = factories.rabbitmq("rabbitmq_inprocess_proc", track_declarations=True)
+rabbitmq_inprocess_purged = factories.rabbitmq("rabbitmq_inprocess_proc", purge=True)
+rabbitmq_inprocess_isolated = factories.rabbitmq("rabbitmq_inprocess_proc", isolate_vhost=True)
+rabbitmq_inprocess_messages = factories.rabbitmq_messages("rabbitmq_inprocess")
+rabbitmq_fast_proc = factories.rabbitmq_proc(port=None, fast=True)
+rabbitmq_fast = factories.rabbitmq("rabbitmq_fast_proc")
+rabbitmq_small_proc = factories.rabbitmq_proc(port=None, small=True)
+rabbitmq_defined_proc = factories.rabbitmq_proc(port=None, definitions=DEFINITIONS)
+rabbitmq_defined = factories.rabbitmq("rabbitmq_defined_proc", purge=True)
+rabbitmq_warm_proc = factories.rabbitmq_proc(port=None, warm_up=True)
+rabbitmq_warm_client_proc = factories.rabbitmq_proc(port=None, warm_up=True)
+rabbitmq_warm_client = factories.rabbitmq("rabbitmq_warm_client_proc")
+rabbitmq_snapshot_proc = factories.rabbitmq_proc(port=None, snapshot=True)
+rabbitmq_snapshot = factories.rabbitmq("rabbitmq_snapshot_proc")
 # pylint:enable=invalid-name
@@ -0,0 +1,80 @@
+"""Tests for asyncio client fixture."""
+
+import asyncio
+from typing import Any, List, Set
+
+import pytest
+
+from pytest_rabbitmq import factories
+from pytest_rabbitmq.factories.async_client import _delete_concurrently
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+
+pytest.importorskip("aio_pika")
+pytest.importorskip("pytest_asyncio")
+
+# pylint:disable=invalid-name
+rabbitmq_async = factories.async_rabbitmq("rabbitmq_proc")
+# pylint:enable=invalid-name
+
+
+@pytest.mark.asyncio
+async def test_async_rabbitmq(rabbitmq_async: Any, rabbitmq_proc: RabbitMqExecutor) -> None:
+    """Async connection declares entities, that get deleted after the test."""
+    channel = await rabbitmq_async.channel()
+    await channel.declare_exchange("async-exchange")
+    for number in range(10):
+        await channel.declare_queue(f"async-queue-{number}")
+    assert "async-exchange" in rabbitmq_proc.list_exchanges()
+    assert "async-queue-9" in rabbitmq_proc.list_queues()
+
+
+def test_async_rabbitmq_cleared(rabbitmq_proc: RabbitMqExecutor) -> None:
+    """Entities declared in previous test are gone."""
+    assert "async-exchange" not in rabbitmq_proc.list_exchanges()
+    assert not [queue for queue in rabbitmq_proc.list_queues() if queue.startswith("async-")]
+
+
+class _Channel:
+    """Stand-in for aio-pika channel, refusing to delete some entities."""
+
+    def __init__(self, connection: "_Connection") -> None:
+        self.connection = connection
+        self.is_closed = False
+
+    async def exchange_delete(self, name: str) -> None:
+        await self.queue_delete(name)
+
+    async def queue_delete(self, name: str) -> None:
+        from aio_pika.exceptions import AMQPError  # pylint:disable=import-outside-toplevel
+
+        if name in self.connection.refused:
+            self.is_closed = True
+            raise AMQPError(f"ACCESS_REFUSED - {name}")
+        self.connection.deleted.append(name)
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+
+class _Connection:
+    """Stand-in for aio-pika connection, keeping track of channels opened."""
+
+    def __init__(self, refused: Set[str]) -> None:
+        self.refused = refused
+        self.deleted: List[str] = []
+        self.channels: List[_Channel] = []
+
+    async def channel(self) -> _Channel:
+        channel = _Channel(self)
+        self.channels.append(channel)
+        return channel
+
+
+def test_delete_concurrently_refused(caplog: pytest.LogCaptureFixture) -> None:
+    """Refused deletion is logged, others still happen, and every channel gets closed."""
+    connection: Any = _Connection({"queue-0"})
+    deletions = [("queue", f"queue-{number}") for number in range(6)]
+    asyncio.run(_delete_concurrently(connection, deletions, 2))
+    assert sorted(connection.deleted) == [f"queue-{number}" for number in range(1, 6)]
+    assert "Could not clear queue queue-0" in caplog.text
+    assert all(channel.is_closed for channel in connection.channels)
@@ -0,0 +1,97 @@
+"""Tests of backends for brokers not started as a local process."""
+
+import json
+import socket
+import stat
+import sys
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+from mirakuru.exceptions import TimeoutExpired
+
+from pytest_rabbitmq.broker import InProcessBroker
+from pytest_rabbitmq.factories.container import ContainerExecutor, container_name
+from pytest_rabbitmq.factories.noproc import NoProcExecutor
+
+FAKE_RUNTIME = """#!{python}
+import json, pathlib, sys
+
+state = pathlib.Path({state!r})
+calls = pathlib.Path({calls!r})
+with calls.open("a") as calls_file:
+    calls_file.write(json.dumps(sys.argv[1:]) + "\\n")
+command = sys.argv[1]
+if command == "inspect":
+    if not state.exists():
+        sys.exit(1)
+    print(state.read_text())
+elif command in ("run", "start"):
+    state.write_text("true")
+elif command == "port":
+    print("127.0.0.1:" + ({amqp_port!r} if sys.argv[3] == "5672/tcp" else {management_port!r}))
+"""
+
+
+def _closed_port() -> int:
+    """Return port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+    return port
+
+
+@pytest.fixture
+def broker() -> Iterator[InProcessBroker]:
+    """Broker standing in for the one in the container."""
+    broker = InProcessBroker()
+    broker.start()
+    yield broker
+    broker.stop()
+
+
+def _calls(tmp_path: Path) -> List[List[str]]:
+    """Return container runtime commands called so far."""
+    return [json.loads(line) for line in (tmp_path / "calls").read_text().splitlines()]
+
+
+def test_container_started_once(tmp_path: Path, broker: InProcessBroker) -> None:
+    """Container is run by the first executor, and reused by following ones."""
+    runtime = tmp_path / "runtime"
+    runtime.write_text(
+        FAKE_RUNTIME.format(
+            python=sys.executable,
+            state=str(tmp_path / "state"),
+            calls=str(tmp_path / "calls"),
+            amqp_port=str(broker.port),
+            management_port=str(_closed_port()),
+        )
+    )
+    runtime.chmod(runtime.stat().st_mode | stat.S_IEXEC)
+
+    executor = ContainerExecutor("rabbitmq:3-management", tmp_path, runtime=str(runtime))
+    executor.start()
+    assert executor.running()
+    assert executor.port == broker.port
+    assert executor.vhost.startswith("pytest-")
+    vhost = executor.vhost
+    executor.stop()
+    assert not executor.running()
+    assert executor.vhost == "/"
+
+    name = container_name("rabbitmq:3-management")
+    calls = _calls(tmp_path)
+    assert [call[0] for call in calls].count("run") == 1
+    assert ["exec", name, "rabbitmqctl", "add_vhost", vhost] in calls
+    assert ["exec", name, "rabbitmqctl", "delete_vhost", vhost] in calls
+
+    ContainerExecutor("rabbitmq:3-management", tmp_path, runtime=str(runtime)).start()
+    assert [call[0] for call in _calls(tmp_path)].count("run") == 1
+
+
+def test_noproc_timeout(tmp_path: Path) -> None:
+    """Attaching to a broker that's not there times out."""
+    executor = NoProcExecutor("127.0.0.1", _closed_port(), "rabbitmqctl", tmp_path, timeout=0.3)
+    with pytest.raises(TimeoutExpired):
+        executor.start()
+    assert not executor.running()
@@ -0,0 +1,106 @@
+"""Tests for bulk deletion."""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, List, Set, Tuple
+
+import pytest
+from pika.exceptions import ChannelClosedByBroker, ChannelClosedByClient
+
+from pytest_rabbitmq.bulk import DeletionFailure, bulk_delete
+
+
+class _Channel:
+    """Stand-in for pika's channel, answering requests one at a time."""
+
+    def __init__(self, broker: "_Broker") -> None:
+        self.broker = broker
+        self.is_open = True
+        self.requests: Deque[Tuple[str, Callable[[Any], None]]] = deque()
+        self.on_close: List[Callable[[Any, Exception], None]] = []
+
+    def add_on_close_callback(self, callback: Callable[[Any, Exception], None]) -> None:
+        self.on_close.append(callback)
+
+    def exchange_delete(self, name: str, callback: Callable[[Any], None]) -> None:
+        self.requests.append((name, callback))
+
+    def queue_delete(self, name: str, callback: Callable[[Any], None]) -> None:
+        self.requests.append((name, callback))
+
+    def close(self, reason: Exception = ChannelClosedByClient(200, "OK")) -> None:
+        self.is_open = False
+        self.requests.clear()
+        for callback in self.on_close:
+            callback(self, reason)
+
+    def reply(self) -> None:
+        """Answer the oldest request."""
+        name, callback = self.requests.popleft()
+        if name in self.broker.refused:
+            self.close(ChannelClosedByBroker(403, f"ACCESS_REFUSED - {name}"))
+            return
+        self.broker.deleted.append(name)
+        callback(None)
+
+
+class _Broker:
+    """Stand-in for asynchronous connection."""
+
+    def __init__(self, refused: Set[str], refuse_channels: bool = False) -> None:
+        self.refused = refused
+        self.refuse_channels = refuse_channels
+        self.deleted: List[str] = []
+        self.channels: List[_Channel] = []
+        self.opening: List[Tuple[_Channel, Callable[[Any], None]]] = []
+        self.rounds = 0
+
+    def channel(
+        self, on_open: Callable[[Any], None], on_close: Callable[[Any, Exception], None]
+    ) -> _Channel:
+        channel = _Channel(self)
+        channel.add_on_close_callback(on_close)
+        self.opening.append((channel, on_open))
+        return channel
+
+    def run_until(self, condition: Callable[[], bool], deadline: float) -> bool:
+        """Channels get opened, and every open one gets a reply, within a single round trip."""
+        while not condition() and time.monotonic() < deadline:
+            self.rounds += 1
+            opening, self.opening = self.opening, []
+            for channel, on_open in opening:
+                if self.refuse_channels:
+                    channel.close(ChannelClosedByBroker(504, "CHANNEL_ERROR"))
+                    continue
+                self.channels.append(channel)
+                on_open(channel)
+            for channel in self.channels:
+                if channel.is_open and channel.requests:
+                    channel.reply()
+        return condition()
+
+
+def test_bulk_delete_round_trips() -> None:
+    """Round trips depend on the number of channels, not of entities."""
+    broker: Any = _Broker(set())
+    deletions = [("queue", f"queue-{number}") for number in range(64)]
+    assert not bulk_delete(broker, deletions, max_channels=32)
+    assert sorted(broker.deleted) == sorted(name for _, name in deletions)
+    assert broker.rounds == 2
+
+
+def test_bulk_delete_reports_failures() -> None:
+    """Refused deletion is reported, and those queued behind it still happen."""
+    broker: Any = _Broker({"queue-0"})
+    deletions = [("queue", f"queue-{number}") for number in range(6)]
+    failures = bulk_delete(broker, deletions, max_channels=2)
+    assert failures == [DeletionFailure("queue", "queue-0", 403, "ACCESS_REFUSED - queue-0")]
+    assert sorted(broker.deleted) == [f"queue-{number}" for number in range(1, 6)]
+
+
+def test_bulk_delete_channel_not_opened() -> None:
+    """Channel the broker didn't open fails deletion right away, not after the timeout."""
+    broker: Any = _Broker(set(), refuse_channels=True)
+    with pytest.raises(ChannelClosedByBroker):
+        bulk_delete(broker, [("queue", "queue-0")], timeout=30.0)
+    assert broker.rounds == 1
@@ -0,0 +1,55 @@
+"""Tests for RabbitMQ cluster fixture."""
+
+import socket
+from pathlib import Path
+
+from pika import BlockingConnection
+
+from pytest_rabbitmq.factories.cluster import RabbitMqCluster, full_node_name
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+
+
+def test_full_node_name() -> None:
+    """Short node names get qualified with short host name."""
+    host = socket.gethostname().split(".")[0]
+    assert full_node_name("rabbit") == f"rabbit@{host}"
+    assert full_node_name("rabbit@elsewhere") == "rabbit@elsewhere"
+
+
+def test_erlang_cookie_written(tmp_path: Path) -> None:
+    """Executor writes cookie only its owner may read, and points HOME to it."""
+    executor = RabbitMqExecutor(
+        "rabbitmq-server",
+        "127.0.0.1",
+        5672,
+        25672,
+        "rabbitmqctl",
+        logpath=tmp_path,
+        path=tmp_path,
+        plugin_path=tmp_path,
+        erlang_cookie="COOKIE",
+    )
+    executor._prepare()  # pylint:disable=protected-access
+    executor._prepare()  # pylint:disable=protected-access
+    assert executor.cookie_file
+    assert executor.cookie_file.read_text() == "COOKIE"
+    assert executor.cookie_file.stat().st_mode & 0o777 == 0o400
+    assert executor._popen_kwargs["env"]["HOME"] == str(tmp_path)
+
+
+def test_cluster_formed(rabbitmq_test_cluster: RabbitMqCluster) -> None:
+    """All nodes are running members of a single cluster."""
+    assert len(rabbitmq_test_cluster) == 2
+    assert set(rabbitmq_test_cluster.formation_phases) == {"boot", "join"}
+    expected = {full_node_name(node.node_name) for node in rabbitmq_test_cluster.nodes}
+    assert set(rabbitmq_test_cluster.running_nodes()) == expected
+
+
+def test_cluster_node_restart(rabbitmq_test_cluster: RabbitMqCluster) -> None:
+    """Killed node rejoins the cluster once restarted."""
+    rabbitmq_test_cluster.kill_node(1)
+    # connection fails over to the node that is still running
+    BlockingConnection(rabbitmq_test_cluster.all_connection_parameters()[::-1]).close()
+    assert len(rabbitmq_test_cluster.running_nodes()) == 1
+    rabbitmq_test_cluster.restart_node(1)
+    assert len(rabbitmq_test_cluster.running_nodes()) == 2
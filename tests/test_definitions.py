@@ -0,0 +1,142 @@
+"""Definitions loading tests."""
+
+import hashlib
+import json
+from base64 import b64decode
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from pika import BlockingConnection
+
+from pytest_rabbitmq.definitions import (
+    password_hash,
+    vhost_definitions,
+    with_defaults,
+    write_definitions,
+)
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+
+DEFINITIONS = {
+    "exchanges": [
+        {
+            "name": "orders",
+            "vhost": "/",
+            "type": "direct",
+            "durable": True,
+            "auto_delete": False,
+            "internal": False,
+            "arguments": {},
+        }
+    ],
+    "queues": [
+        {
+            "name": "orders.new",
+            "vhost": "/",
+            "durable": True,
+            "auto_delete": False,
+            "arguments": {},
+        }
+    ],
+    "bindings": [
+        {
+            "source": "orders",
+            "vhost": "/",
+            "destination": "orders.new",
+            "destination_type": "queue",
+            "routing_key": "new",
+            "arguments": {},
+        }
+    ],
+}
+
+
+def test_password_hash() -> None:
+    """Password is hashed with salted SHA-256, deterministically."""
+    decoded = b64decode(password_hash("guest"))
+    salt, digest = decoded[:4], decoded[4:]
+    assert digest == hashlib.sha256(salt + b"guest").digest()
+    assert password_hash("guest") == password_hash("guest")
+
+
+def test_with_defaults() -> None:
+    """Default user and vhost get added, unless defined already."""
+    definitions = with_defaults(DEFINITIONS)
+    assert definitions["vhosts"] == [{"name": "/"}]
+    assert [user["name"] for user in definitions["users"]] == ["guest"]
+    assert definitions["permissions"][0]["user"] == "guest"
+    assert definitions["queues"] == DEFINITIONS["queues"]
+    assert "users" not in DEFINITIONS
+
+    user = {"name": "guest", "password_hash": "x", "tags": ""}
+    assert with_defaults({"users": [user]})["users"] == [user]
+
+
+def test_vhost_definitions() -> None:
+    """Topology of the default virtual host gets moved to another one."""
+    definitions = vhost_definitions(with_defaults(DEFINITIONS), "pytest-gw0")
+    assert set(definitions) == {"policies", "parameters", "exchanges", "queues", "bindings"}
+    assert [queue["name"] for queue in definitions["queues"]] == ["orders.new"]
+    assert {
+        entity["vhost"]
+        for kind in ("exchanges", "queues", "bindings")
+        for entity in definitions[kind]
+    } == {"pytest-gw0"}
+    assert vhost_definitions(DEFINITIONS, "/")["queues"] == DEFINITIONS["queues"]
+
+
+def test_reset_vhost_imports_definitions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Recreated virtual host gets topology from node's definitions file."""
+    executor = RabbitMqExecutor(
+        "rabbitmq-server",
+        "127.0.0.1",
+        5672,
+        25672,
+        "rabbitmqctl",
+        logpath=tmp_path,
+        path=tmp_path,
+        plugin_path=tmp_path,
+        definitions_file=write_definitions(tmp_path, DEFINITIONS),
+    )
+    executor.vhost = "pytest-1234"
+    imported: List[Dict[str, Any]] = []
+
+    def rabbitctl_output(*args: str) -> str:
+        if args[0] == "import_definitions":
+            imported.append(json.loads(Path(args[1]).read_text()))
+        return ""
+
+    monkeypatch.setattr(executor, "rabbitctl_output", rabbitctl_output)
+    executor.reset_vhost()
+    assert imported == [vhost_definitions(DEFINITIONS, "pytest-1234")]
+
+
+def test_write_definitions_from_file(tmp_path: Path) -> None:
+    """Definitions file gets copied, along with defaults."""
+    source = tmp_path / "source.json"
+    source.write_text(json.dumps(DEFINITIONS))
+    written = write_definitions(tmp_path, source)
+    assert written.name == "definitions.json"
+    assert json.loads(written.read_text())["exchanges"] == DEFINITIONS["exchanges"]
+    assert written.read_text() == write_definitions(tmp_path, DEFINITIONS).read_text()
+
+
+def test_defined_topology(
+    rabbitmq_defined_proc: RabbitMqExecutor, rabbitmq_defined: BlockingConnection
+) -> None:
+    """Topology is there before the first connection, and can be deleted by test."""
+    assert "orders" in rabbitmq_defined_proc.list_exchanges()
+    assert "orders.new" in rabbitmq_defined_proc.list_queues()
+    channel = rabbitmq_defined.channel()
+    channel.basic_publish("orders", "new", b"order")
+    channel.queue_delete("orders.new")
+
+
+def test_defined_topology_restored(
+    rabbitmq_defined_proc: RabbitMqExecutor, rabbitmq_defined: BlockingConnection
+) -> None:
+    """Purge teardown recreated queue deleted by previous test, from definitions."""
+    assert "orders.new" in rabbitmq_defined_proc.list_queues()
+    channel = rabbitmq_defined.channel()
+    method, _properties, _body = channel.basic_get("orders.new")
+    assert method is None
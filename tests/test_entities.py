@@ -0,0 +1,116 @@
+"""Tests for listing entities with their properties."""
+
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+from pika import BlockingConnection
+
+from pytest_rabbitmq.factories.executor import Entity, RabbitMqExecutor, parse_json_records
+
+
+class _ListingExecutor(RabbitMqExecutor):
+    """Executor answering rabbitmqctl calls with prepared JSON output."""
+
+    def __init__(self, tmp_path: Path) -> None:
+        super().__init__(
+            "rabbitmq-server",
+            "127.0.0.1",
+            5672,
+            25672,
+            "rabbitmqctl",
+            logpath=tmp_path,
+            path=tmp_path,
+            plugin_path=tmp_path,
+        )
+        self.calls: List[Tuple[str, ...]] = []
+
+    def rabbitctl_output(self, *args: str) -> str:
+        self.calls.append(args)
+        vhost = args[args.index("-p") + 1]
+        return json.dumps(
+            [
+                {
+                    "name": f"orders-{vhost}",
+                    "messages": 3,
+                    "consumers": 1,
+                    "type": "quorum",
+                    "arguments": [["x-queue-type", "quorum"]],
+                }
+            ]
+        )
+
+
+def test_parse_json_records() -> None:
+    """Both single array and object per line outputs get parsed."""
+    assert parse_json_records('[{"name": "a"},\n{"name": "b"}]') == [{"name": "a"}, {"name": "b"}]
+    assert parse_json_records('{"name": "a"}\n{"name": "b"}\n') == [{"name": "a"}, {"name": "b"}]
+    assert parse_json_records("") == []
+
+
+def test_list_entities(tmp_path: Path) -> None:
+    """Entities of several virtual hosts come with their properties."""
+    executor = _ListingExecutor(tmp_path)
+    queues = executor.list_entities("queues", vhosts=["/", "other"])
+    assert queues == [
+        Entity("orders-/", "/", 3, 1, "quorum", {"x-queue-type": "quorum"}),
+        Entity("orders-other", "other", 3, 1, "quorum", {"x-queue-type": "quorum"}),
+    ]
+    assert executor.calls[0] == (
+        "list_queues",
+        "-p",
+        "/",
+        "--formatter",
+        "json",
+        "--silent",
+        "name",
+        "messages",
+        "consumers",
+        "type",
+        "arguments",
+    )
+    assert executor.list_queues() == ["orders-/"]
+
+
+def test_list_entities_cache(tmp_path: Path) -> None:
+    """Recent result gets reused when allowed, until invalidated."""
+    executor = _ListingExecutor(tmp_path)
+    executor.list_entities("queues", max_age=60)
+    executor.list_entities("queues", max_age=60)
+    assert len(executor.calls) == 1
+    executor.list_entities("queues")
+    assert len(executor.calls) == 2
+    executor.invalidate_entities()
+    executor.list_entities("queues", max_age=60)
+    assert len(executor.calls) == 3
+
+
+def test_list_entities_not_kept_without_max_age(tmp_path: Path) -> None:
+    """Result listed without max_age isn't reused by callers allowing it."""
+    executor = _ListingExecutor(tmp_path)
+    executor.list_entities("queues")
+    executor.list_entities("queues", max_age=60)
+    assert len(executor.calls) == 2
+
+
+def test_list_entities_unknown_kind(tmp_path: Path) -> None:
+    """Only exchanges and queues can be listed."""
+    with pytest.raises(ValueError):
+        _ListingExecutor(tmp_path).list_entities("bindings")
+
+
+def test_list_entities_running(
+    rabbitmq: BlockingConnection, rabbitmq_proc: RabbitMqExecutor
+) -> None:
+    """Queue gets listed along with its messages count."""
+    channel = rabbitmq.channel()
+    channel.confirm_delivery()
+    channel.queue_declare("counted", arguments={"x-max-length": 10})
+    channel.basic_publish("", "counted", b"first")
+    channel.basic_publish("", "counted", b"second")
+    (queue,) = rabbitmq_proc.list_entities("queues")
+    assert queue.name == "counted"
+    assert queue.messages == 2
+    assert queue.consumers == 0
+    assert queue.arguments == {"x-max-length": 10}
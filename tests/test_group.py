@@ -0,0 +1,65 @@
+"""Tests for RabbitMQ process groups."""
+
+from typing import Dict
+
+import pytest
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.process import (
+    RabbitMqGroupStartError,
+    rabbitmq_proc_group,
+    start_executors,
+)
+
+
+def test_group_nodes_running(rabbitmq_group: Dict[str, RabbitMqExecutor]) -> None:
+    """All nodes of the group are running, on distinct ports, under distinct names."""
+    assert set(rabbitmq_group) == {"first", "second"}
+    assert all(process.running() for process in rabbitmq_group.values())
+    first, second = rabbitmq_group["first"], rabbitmq_group["second"]
+    assert first.port != second.port
+    assert first.distribution_port != second.distribution_port
+    assert first.node_name == f"rabbitmq-test-{first.port}"
+    assert second.node_name == f"rabbitmq-test-{second.port}"
+
+
+def test_group_unsupported_options() -> None:
+    """Options group nodes can't honour are rejected, rather than ignored."""
+    with pytest.raises(ValueError, match="keepalive, xdist_shared"):
+        rabbitmq_proc_group(first={"port": None}, second={"keepalive": True, "xdist_shared": True})
+
+
+class _FailingExecutor:
+    """Stand-in for an executor that fails to start."""
+
+    def start(self) -> None:
+        raise RuntimeError("boom")
+
+    def running(self) -> bool:
+        return False
+
+
+class _Executor:
+    """Stand-in for an executor that starts fine."""
+
+    def __init__(self) -> None:
+        self.started = False
+
+    def start(self) -> None:
+        self.started = True
+
+    def running(self) -> bool:
+        return self.started
+
+    def stop(self) -> None:
+        self.started = False
+
+
+def test_group_start_failure_stops_started_nodes() -> None:
+    """Failures get reported together, and nodes that did start get stopped."""
+    good = _Executor()
+    executors = {"good": good, "bad": _FailingExecutor(), "worse": _FailingExecutor()}
+    with pytest.raises(RabbitMqGroupStartError) as excinfo:
+        start_executors(executors)  # type: ignore[arg-type]
+    assert set(excinfo.value.errors) == {"bad", "worse"}
+    assert not good.running()
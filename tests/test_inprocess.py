@@ -0,0 +1,293 @@
+"""In-process broker tests."""
+
+from typing import List
+
+import pika
+import pytest
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import ChannelClosedByBroker, ConnectionClosedByBroker, UnroutableError
+
+from pytest_rabbitmq.broker import (
+    InProcessBroker,
+    ServerChannel,
+    headers_match,
+    topic_matches,
+)
+from pytest_rabbitmq.factories import client
+from pytest_rabbitmq.tracking import TrackingConnection
+
+
+@pytest.mark.parametrize(
+    "binding_key, routing_key, matches",
+    [
+        ("a.b", "a.b", True),
+        ("a.*", "a.b", True),
+        ("a.*", "a.b.c", False),
+        ("a.#", "a", True),
+        ("a.#", "a.b.c", True),
+        ("#.c", "a.b.c", True),
+        ("#", "", True),
+        ("a.#.c", "a.c", True),
+        ("a.#.c", "a.b.b.c", True),
+        ("*.b", "b", False),
+    ],
+)
+def test_topic_matches(binding_key: str, routing_key: str, matches: bool) -> None:
+    """Check topic wildcards."""
+    assert topic_matches(binding_key, routing_key) is matches
+
+
+def test_headers_match() -> None:
+    """Check x-match all and any."""
+    assert headers_match({"a": 1, "b": 2}, {"a": 1, "b": 2, "c": 3})
+    assert not headers_match({"a": 1, "b": 2}, {"a": 1})
+    assert headers_match({"x-match": "any", "a": 1, "b": 2}, {"a": 1})
+
+
+def test_declare_and_list(
+    rabbitmq_inprocess_proc: InProcessBroker, rabbitmq_inprocess: pika.BlockingConnection
+) -> None:
+    """Declared entities are listed the way RabbitMqExecutor lists them."""
+    channel = rabbitmq_inprocess.channel()
+    channel.exchange_declare("test-exchange", "topic")
+    declared = channel.queue_declare("", exclusive=True)
+    assert declared.method.queue.startswith("amq.gen-")
+    channel.queue_declare("test-queue")
+
+    assert "test-exchange" in rabbitmq_inprocess_proc.list_exchanges()
+    assert "amq.topic" in rabbitmq_inprocess_proc.list_exchanges()
+    assert "" not in rabbitmq_inprocess_proc.list_exchanges()
+    assert "test-queue" in rabbitmq_inprocess_proc.list_queues()
+
+
+def test_cleared_between_tests(rabbitmq_inprocess_proc: InProcessBroker) -> None:
+    """Client fixture cleared what the previous test declared."""
+    assert "test-exchange" not in rabbitmq_inprocess_proc.list_exchanges()
+    assert "test-queue" not in rabbitmq_inprocess_proc.list_queues()
+
+
+def test_routing(rabbitmq_inprocess: pika.BlockingConnection) -> None:
+    """Messages get routed by every exchange type."""
+    channel = rabbitmq_inprocess.channel()
+    for exchange_type in ("direct", "fanout", "topic", "headers"):
+        channel.exchange_declare(exchange_type, exchange_type)
+        channel.queue_declare(exchange_type)
+    channel.queue_bind("direct", "direct", "key")
+    channel.queue_bind("fanout", "fanout")
+    channel.queue_bind("topic", "topic", "orders.*")
+    channel.queue_bind("headers", "headers", arguments={"x-match": "any", "kind": "order"})
+
+    channel.basic_publish("direct", "key", b"direct")
+    channel.basic_publish("direct", "other", b"lost")
+    channel.basic_publish("fanout", "anything", b"fanout")
+    channel.basic_publish("topic", "orders.created", b"topic")
+    channel.basic_publish(
+        "headers", "", b"headers", pika.BasicProperties(headers={"kind": "order"})
+    )
+    channel.basic_publish("", "direct", b"default")
+
+    assert _drain(channel, "direct") == [b"direct", b"default"]
+    assert _drain(channel, "fanout") == [b"fanout"]
+    assert _drain(channel, "topic") == [b"topic"]
+    assert _drain(channel, "headers") == [b"headers"]
+
+
+def test_exchange_to_exchange(rabbitmq_inprocess: pika.BlockingConnection) -> None:
+    """Messages follow exchange to exchange bindings."""
+    channel = rabbitmq_inprocess.channel()
+    channel.exchange_declare("upstream", "fanout")
+    channel.exchange_declare("downstream", "direct")
+    channel.exchange_bind("downstream", "upstream")
+    channel.queue_declare("sink")
+    channel.queue_bind("sink", "downstream", "key")
+
+    channel.basic_publish("upstream", "key", b"through")
+    assert _drain(channel, "sink") == [b"through"]
+
+
+def test_large_message(rabbitmq_inprocess: pika.BlockingConnection) -> None:
+    """Message bigger than frame size arrives whole."""
+    channel = rabbitmq_inprocess.channel()
+    channel.queue_declare("large")
+    body = bytes(range(256)) * 4096
+    channel.basic_publish("", "large", body)
+    assert _drain(channel, "large") == [body]
+
+
+def test_consume_ack_and_requeue(rabbitmq_inprocess: pika.BlockingConnection) -> None:
+    """Consumed messages get redelivered, unless acknowledged."""
+    channel = rabbitmq_inprocess.channel()
+    channel.queue_declare("work")
+    channel.basic_qos(prefetch_count=1)
+    for body in (b"first", b"second"):
+        channel.basic_publish("", "work", body)
+
+    delivered = []
+    for method, _properties, body in channel.consume("work", inactivity_timeout=1):
+        assert method
+        delivered.append((body, method.redelivered))
+        if body == b"first" and not method.redelivered:
+            channel.basic_nack(method.delivery_tag, requeue=True)
+        else:
+            channel.basic_ack(method.delivery_tag)
+        if len(delivered) == 3:
+            break
+    channel.cancel()
+
+    assert delivered == [(b"first", False), (b"first", True), (b"second", False)]
+    assert channel.queue_declare("work", passive=True).method.message_count == 0
+
+
+def test_unacked_requeued_on_channel_close(rabbitmq_inprocess: pika.BlockingConnection) -> None:
+    """Closing a channel puts its unacknowledged messages back."""
+    channel = rabbitmq_inprocess.channel()
+    channel.queue_declare("pending")
+    channel.basic_publish("", "pending", b"message")
+    method, _properties, _body = channel.basic_get("pending")
+    assert method
+    channel.close()
+
+    channel = rabbitmq_inprocess.channel()
+    method, _properties, body = channel.basic_get("pending", auto_ack=True)
+    assert method and method.redelivered
+    assert body == b"message"
+
+
+def test_confirms(rabbitmq_inprocess: pika.BlockingConnection) -> None:
+    """Publisher confirms, with mandatory messages returned when unroutable."""
+    channel = rabbitmq_inprocess.channel()
+    channel.confirm_delivery()
+    channel.queue_declare("confirmed")
+    channel.basic_publish("", "confirmed", b"routed", mandatory=True)
+    with pytest.raises(UnroutableError):
+        channel.basic_publish("", "nowhere", b"unroutable", mandatory=True)
+
+
+def test_errors_close_channel(rabbitmq_inprocess: pika.BlockingConnection) -> None:
+    """Errors close the channel with RabbitMQ's reply codes."""
+    channel = rabbitmq_inprocess.channel()
+    with pytest.raises(ChannelClosedByBroker) as error:
+        channel.queue_declare("missing", passive=True)
+    assert error.value.reply_code == 404
+
+    channel = rabbitmq_inprocess.channel()
+    with pytest.raises(ChannelClosedByBroker) as error:
+        channel.exchange_declare("amq.custom", "direct")
+    assert error.value.reply_code == 403
+    assert rabbitmq_inprocess.is_open
+
+
+def test_exclusive_queue(
+    rabbitmq_inprocess_proc: InProcessBroker, rabbitmq_inprocess: pika.BlockingConnection
+) -> None:
+    """Exclusive queue is locked to its connection, and deleted along with it."""
+    channel = rabbitmq_inprocess.channel()
+    with pika.BlockingConnection(
+        pika.ConnectionParameters(rabbitmq_inprocess_proc.host, rabbitmq_inprocess_proc.port)
+    ) as other:
+        other.channel().queue_declare("private", exclusive=True)
+        with pytest.raises(ChannelClosedByBroker) as error:
+            channel.queue_declare("private", passive=True)
+        assert error.value.reply_code == 405
+    # connection cleanup happens in broker's thread
+    rabbitmq_inprocess.sleep(0.1)
+    assert "private" not in rabbitmq_inprocess_proc.list_queues()
+
+
+def test_unexpected_error_closes_connection(
+    rabbitmq_inprocess_proc: InProcessBroker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Unexpected failure in broker closes the connection, instead of leaving client waiting."""
+    with pika.BlockingConnection(
+        pika.ConnectionParameters(rabbitmq_inprocess_proc.host, rabbitmq_inprocess_proc.port)
+    ) as connection:
+        channel = connection.channel()
+
+        def fail(_self: ServerChannel, _method: object) -> None:
+            raise RuntimeError("unexpected")
+
+        monkeypatch.setattr(ServerChannel, "handle_method", fail)
+        with pytest.raises(ConnectionClosedByBroker) as error:
+            channel.queue_declare("failing")
+        assert error.value.reply_code == 541
+        assert not connection.is_open
+
+
+def test_clear_exclusive_queue(
+    rabbitmq_inprocess_proc: InProcessBroker,
+    rabbitmq_inprocess: pika.BlockingConnection,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Queue exclusive to the client's connection gets cleared over it."""
+    rabbitmq_inprocess.channel().queue_declare("private", exclusive=True)
+    rabbitmq_inprocess.channel().queue_declare("shared")
+    client.clear_rabbitmq(rabbitmq_inprocess_proc, rabbitmq_inprocess)  # type: ignore[arg-type]
+    assert rabbitmq_inprocess_proc.list_queues() == []
+    assert not [record for record in caplog.records if record.name == "pytest-rabbitmq"]
+
+
+def test_tracked_declarations(
+    rabbitmq_inprocess_proc: InProcessBroker, rabbitmq_inprocess_tracked: pika.BlockingConnection
+) -> None:
+    """Tracking client fixture works against in-process broker as well."""
+    rabbitmq_inprocess_tracked.channel().queue_declare("tracked")
+    assert rabbitmq_inprocess_proc.list_queues() == ["tracked"]
+
+
+def test_tracked_channel_context_manager(
+    rabbitmq_inprocess_tracked: TrackingConnection,
+) -> None:
+    """Tracking channel is a blocking channel, usable as a context manager."""
+    with rabbitmq_inprocess_tracked.channel() as channel:
+        assert isinstance(channel, BlockingChannel)
+        channel.queue_declare("scoped")
+    assert not channel.is_open
+    assert [declaration.name for declaration in rabbitmq_inprocess_tracked.declarations] == [
+        "scoped"
+    ]
+
+
+def _drain(channel: BlockingChannel, queue: str) -> List[bytes]:
+    """Get all messages from queue."""
+    bodies: List[bytes] = []
+    while True:
+        method, _properties, body = channel.basic_get(queue, auto_ack=True)
+        if method is None:
+            return bodies
+        bodies.append(body)
+
+
+def test_isolated_vhost(
+    rabbitmq_inprocess_proc: InProcessBroker, rabbitmq_inprocess_isolated: pika.BlockingConnection
+) -> None:
+    """Isolating client fixture works against in-process broker as well."""
+    rabbitmq_inprocess_isolated.channel().queue_declare("isolated")
+    assert "isolated" not in rabbitmq_inprocess_proc.list_queues()
+
+
+@pytest.fixture
+def baselines_taken(monkeypatch: pytest.MonkeyPatch) -> List[client.Baseline]:
+    """Record baselines taken by purging client fixtures."""
+    taken: List[client.Baseline] = []
+    take_baseline = client.take_baseline
+
+    def recording_take_baseline(process: InProcessBroker) -> client.Baseline:
+        taken.append(take_baseline(process))  # type: ignore[arg-type]
+        return taken[-1]
+
+    monkeypatch.setattr(client, "take_baseline", recording_take_baseline)
+    return taken
+
+
+@pytest.mark.parametrize("queue", ["first", "second"])
+def test_purge_baseline_taken_once(
+    baselines_taken: List[client.Baseline],
+    rabbitmq_inprocess_proc: InProcessBroker,
+    rabbitmq_inprocess_purged: pika.BlockingConnection,
+    queue: str,
+) -> None:
+    """Purging client fixture takes baseline for the first test, and reuses it."""
+    if queue == "second":
+        assert not baselines_taken
+    assert rabbitmq_inprocess_proc.list_queues() == []
+    rabbitmq_inprocess_purged.channel().queue_declare(queue)
@@ -0,0 +1,60 @@
+"""Tests for keeping RabbitMQ node running between test runs."""
+
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+
+from pika import BlockingConnection
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.keepalive import _stop, watch
+
+
+def test_watch_stops_idle_node(tmp_path: Path) -> None:
+    """Watchdog stops node nobody used for longer than idle timeout."""
+    node = subprocess.Popen(["sleep", "60"], start_new_session=True)
+    state_path = tmp_path / "rabbitmq_proc-main.json"
+    state_path.write_text(
+        json.dumps(
+            {
+                "pid": node.pid,
+                "last_used": time.time() - 10,
+                "idle_timeout": 5,
+                "sessions": {},
+                "watchdog": os.getpid(),
+            }
+        )
+    )
+
+    watch(state_path, poll_interval=0)
+
+    assert node.wait(timeout=5) != 0
+    assert not state_path.exists()
+
+
+def test_stop_waits_for_node() -> None:
+    """Node ignoring SIGTERM gets killed, and is gone once stopping returns."""
+    node = subprocess.Popen(["sh", "-c", "trap '' TERM; sleep 60"], start_new_session=True)
+    time.sleep(0.2)
+
+    _stop(node.pid, timeout=0.5)
+
+    assert node.poll() == -9
+
+
+def test_watch_leaves_used_node(tmp_path: Path) -> None:
+    """Watchdog leaves node replaced by a new one to its own watchdog."""
+    state_path = tmp_path / "rabbitmq_proc-main.json"
+    state_path.write_text(json.dumps({"pid": os.getpid(), "watchdog": os.getppid()}))
+
+    watch(state_path, poll_interval=0)
+
+    assert state_path.exists()
+
+
+def test_keepalive(rabbitmq_kept: BlockingConnection, rabbitmq_kept_proc: RabbitMqExecutor) -> None:
+    """Node left running between runs accepts connections."""
+    assert rabbitmq_kept.channel().is_open
+    assert rabbitmq_kept_proc.pre_start_check()
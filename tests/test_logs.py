@@ -0,0 +1,83 @@
+"""Node log tailing tests."""
+
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+
+from pytest_rabbitmq import plugin
+from pytest_rabbitmq.logs import LogTailer, running_tailers
+
+
+def test_tailer_keeps_recent_lines(tmp_path: Path) -> None:
+    """Only most recent lines are kept, read since the mark returned."""
+    log_path = tmp_path / "rabbit@localhost.log"
+    log_path.write_text("".join(f"line {number}\n" for number in range(10)))
+    tailer = LogTailer(tmp_path, "rabbit@localhost", max_lines=3)
+    tailer.mark()
+    assert tailer.lines_since(0) == ["line 7", "line 8", "line 9"]
+
+    with log_path.open("a") as log_file:
+        log_file.write("refused\n")
+    assert tailer.lines_since_mark() == ["refused"]
+
+
+def test_tailer_follows_in_background(tmp_path: Path) -> None:
+    """Running tailer reads the log by itself, and is registered while running."""
+    log_path = tmp_path / "rabbit@localhost.log"
+    log_path.write_text("booted\n")
+    tailer = LogTailer(tmp_path, "rabbit@localhost", interval=0.01)
+    tailer.start()
+    assert tailer in running_tailers
+    with log_path.open("a") as log_file:
+        log_file.write("stopping\n")
+    tailer.stop()
+    assert tailer not in running_tailers
+    assert tailer.position == 2
+
+
+class _Report:
+    """Bare test report."""
+
+    def __init__(self, failed: bool) -> None:
+        self.failed = failed
+        self.when = "call"
+        self.sections: List[Tuple[str, str]] = []
+
+
+class _Outcome:
+    """Hook call outcome, as passed to hook wrappers."""
+
+    def __init__(self, report: _Report) -> None:
+        self.report = report
+
+    def get_result(self) -> _Report:
+        """Return report."""
+        return self.report
+
+
+@pytest.mark.parametrize("failed", [True, False])
+def test_failing_test_report(tmp_path: Path, failed: bool) -> None:
+    """Lines logged since the test started are added to the report of a failing test."""
+    log_path = tmp_path / "rabbit@localhost.log"
+    log_path.write_text("booted\n")
+    tailer = LogTailer(tmp_path, "rabbit@localhost")
+    tailer.start()
+    try:
+        tailer.mark()
+        with log_path.open("a") as log_file:
+            log_file.write("operation not permitted on the default exchange\n")
+        report = _Report(failed)
+        hook: Any = plugin.pytest_runtest_makereport(None)  # type: ignore[arg-type]
+        next(hook)
+        with pytest.raises(StopIteration):
+            hook.send(_Outcome(report))
+    finally:
+        tailer.stop()
+    expected = [
+        (
+            "Captured RabbitMQ log rabbit@localhost call",
+            "operation not permitted on the default exchange",
+        )
+    ]
+    assert report.sections == (expected if failed else [])
@@ -0,0 +1,80 @@
+"""Tests for RabbitMQ management API support."""
+
+from pathlib import Path
+
+import pytest
+from pika import BlockingConnection
+
+from pytest_rabbitmq.factories.client import clear_rabbitmq
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.management import enable_plugins, management_available
+
+
+def test_enable_plugins_keeps_enabled(tmp_path: Path) -> None:
+    """Management plugin gets appended to already enabled plugins, in node's own file."""
+    source = tmp_path / "plugins"
+    source.write_text("[rabbitmq_shovel].\n")
+    plugins_file = tmp_path / "node" / "enabled_plugins"
+    plugins_file.parent.mkdir()
+    enable_plugins(source, plugins_file, "rabbitmq_management")
+    assert plugins_file.read_text() == "[rabbitmq_shovel,rabbitmq_management].\n"
+    enable_plugins(source, plugins_file, "rabbitmq_management")
+    assert plugins_file.read_text() == "[rabbitmq_shovel,rabbitmq_management].\n"
+    assert source.read_text() == "[rabbitmq_shovel].\n"
+
+
+def test_management_plugins_file(tmp_path: Path) -> None:
+    """Node with management plugin reads its own plugins file, not the shared one."""
+    executor = RabbitMqExecutor(
+        "rabbitmq-server",
+        "127.0.0.1",
+        5672,
+        25672,
+        "rabbitmqctl",
+        logpath=tmp_path / "logs",
+        path=tmp_path,
+        plugin_path=tmp_path / "shared",
+        management_port=15672,
+    )
+    executor._prepare()  # pylint:disable=protected-access
+    assert executor._envvars["RABBITMQ_ENABLED_PLUGINS_FILE"] == str(tmp_path / "enabled_plugins")
+    assert (tmp_path / "enabled_plugins").read_text() == "[rabbitmq_management].\n"
+    assert not (tmp_path / "shared" / "plugins").exists()
+
+
+def test_management_available(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Management plugin is found next to the server script, linked to from elsewhere."""
+    monkeypatch.delenv("RABBITMQ_PLUGINS_DIR", raising=False)
+    home = tmp_path / "rabbitmq_server-3.13.0"
+    (home / "sbin").mkdir(parents=True)
+    (home / "plugins").mkdir()
+    server = home / "sbin" / "rabbitmq-server"
+    server.write_text("#!/bin/sh\n")
+    server.chmod(0o755)
+    (tmp_path / "bin").mkdir()
+    (tmp_path / "bin" / "rabbitmq-server").symlink_to(server)
+    assert not management_available(str(tmp_path / "bin" / "rabbitmq-server"))
+
+    (home / "plugins" / "rabbitmq_management-3.13.0.ez").touch()
+    assert management_available(str(tmp_path / "bin" / "rabbitmq-server"))
+    assert not management_available(str(tmp_path / "missing"))
+
+    monkeypatch.setenv("RABBITMQ_PLUGINS_DIR", str(tmp_path / "bin"))
+    assert not management_available(str(tmp_path / "bin" / "rabbitmq-server"))
+
+
+def test_management_clear(
+    rabbitmq_management: BlockingConnection, rabbitmq_management_proc: RabbitMqExecutor
+) -> None:
+    """Declare queue and exchange and clear them listing over management API."""
+    assert rabbitmq_management_proc.management
+    channel = rabbitmq_management.channel()
+    channel.exchange_declare("cache-in")
+    channel.queue_declare("fastlane")
+    assert "cache-in" in rabbitmq_management_proc.list_exchanges()
+    assert rabbitmq_management_proc.list_queues() == ["fastlane"]
+
+    clear_rabbitmq(rabbitmq_management_proc, rabbitmq_management)
+
+    assert "cache-in" not in rabbitmq_management_proc.list_exchanges()
+    assert not rabbitmq_management_proc.list_queues()
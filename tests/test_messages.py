@@ -0,0 +1,62 @@
+"""Message helper tests."""
+
+import pika
+import pytest
+
+from pytest_rabbitmq.messages import MessageHelper, PublishError
+
+
+def test_publish_many_and_drain(rabbitmq_inprocess_messages: MessageHelper) -> None:
+    """Published messages are all confirmed, and drained in order."""
+    rabbitmq_inprocess_messages.channel.queue_declare("test-messages")
+    bodies = [f"message-{number}".encode() for number in range(500)]
+
+    assert rabbitmq_inprocess_messages.publish_many("", "test-messages", bodies) == 500
+    assert rabbitmq_inprocess_messages.wait_for_queue_depth("test-messages", 500) == 500
+
+    messages = rabbitmq_inprocess_messages.drain("test-messages", prefetch=64)
+    assert [bytes(message.body or b"") for message in messages] == bodies
+    assert isinstance(messages[0].body, memoryview)
+    assert messages[0].routing_key == "test-messages"
+    assert rabbitmq_inprocess_messages.queue_depth("test-messages") == 0
+
+
+def test_drain_count(rabbitmq_inprocess_messages: MessageHelper) -> None:
+    """Messages beyond count, and their bodies, are left alone."""
+    rabbitmq_inprocess_messages.channel.queue_declare("test-messages")
+    rabbitmq_inprocess_messages.publish_many(
+        "",
+        "test-messages",
+        (b"x" for _ in range(10)),
+        properties=pika.BasicProperties(content_type="text/plain"),
+    )
+
+    messages = rabbitmq_inprocess_messages.drain("test-messages", 4, collect_bodies=False)
+    assert len(messages) == 4
+    assert messages[0].body is None
+    assert messages[0].properties.content_type == "text/plain"
+    rabbitmq_inprocess_messages.wait_for_queue_depth("test-messages", 6)
+
+
+def test_drain_timeout(rabbitmq_inprocess_messages: MessageHelper) -> None:
+    """Drain returns what arrived, once timeout passes."""
+    rabbitmq_inprocess_messages.channel.queue_declare("test-messages")
+    rabbitmq_inprocess_messages.publish_many("", "test-messages", [b"only"])
+
+    messages = rabbitmq_inprocess_messages.drain("test-messages", 2, timeout=0.2)
+    assert [bytes(message.body or b"") for message in messages] == [b"only"]
+
+
+def test_publish_many_unroutable(rabbitmq_inprocess_messages: MessageHelper) -> None:
+    """Mandatory messages nobody receives fail publishing."""
+    with pytest.raises(PublishError) as error:
+        rabbitmq_inprocess_messages.publish_many("", "nowhere", [b"1", b"2"], mandatory=True)
+    assert error.value.returned == 2
+
+
+def test_wait_for_queue_depth_timeout(rabbitmq_inprocess_messages: MessageHelper) -> None:
+    """Waiting for a missing queue times out, and the helper stays usable."""
+    with pytest.raises(TimeoutError):
+        rabbitmq_inprocess_messages.wait_for_queue_depth("missing", 1, timeout=0.1)
+    rabbitmq_inprocess_messages.channel.queue_declare("test-messages")
+    assert rabbitmq_inprocess_messages.queue_depth("test-messages") == 0
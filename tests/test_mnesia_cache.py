@@ -0,0 +1,67 @@
+"""Tests for cache of initialised RabbitMQ data directories."""
+
+import os
+from pathlib import Path
+from typing import cast
+
+import pytest
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.mnesia_cache import MnesiaCache
+from pytest_rabbitmq.factories.process import (
+    ProcessOptions,
+    RabbitMQConfig,
+    _stable_node_name,
+)
+
+
+def test_store_and_restore(tmp_path: Path) -> None:
+    """Stored data directory gets restored into a new location."""
+    mnesia = tmp_path / "first" / "mnesia"
+    (mnesia / "rabbit@localhost").mkdir(parents=True)
+    (mnesia / "rabbit@localhost" / "schema.DAT").write_text("schema")
+    cache = MnesiaCache(tmp_path / "cache")
+
+    assert not cache.restore("key", tmp_path / "second" / "mnesia")
+    cache.store("key", mnesia)
+    assert cache.restore("key", tmp_path / "second" / "mnesia")
+    assert (tmp_path / "second" / "mnesia" / "rabbit@localhost" / "schema.DAT").read_text() == (
+        "schema"
+    )
+
+
+def test_evict_least_recently_used(tmp_path: Path) -> None:
+    """Entries used least recently get evicted above the limit."""
+    mnesia = tmp_path / "mnesia"
+    mnesia.mkdir()
+    cache = MnesiaCache(tmp_path / "cache")
+    for age, key in enumerate(("newest", "middle", "oldest")):
+        cache.store(key, mnesia)
+        os.utime(cache.cache_dir / key, (1000 - age, 1000 - age))
+
+    cache.max_entries = 2
+    cache.evict()
+    assert sorted(entry.name for entry in cache.cache_dir.iterdir()) == ["middle", "newest"]
+
+
+def test_cached_process(rabbitmq_cached_proc: RabbitMqExecutor) -> None:
+    """Process started from cached data directory is running."""
+    assert rabbitmq_cached_proc.running()
+    assert rabbitmq_cached_proc.mnesia_base.exists()
+
+
+@pytest.mark.parametrize(
+    "options, config_port, stable",
+    [
+        ({"node": "cached"}, None, True),
+        ({"port": 5675}, None, True),
+        ({}, 5675, True),
+        ({"port": None}, 5675, False),
+        ({}, None, False),
+        ({"port": (5000, 6000)}, None, False),
+    ],
+)
+def test_stable_node_name(options: ProcessOptions, config_port: int, stable: bool) -> None:
+    """Cache is used only by nodes getting the same name in every run."""
+    config = cast(RabbitMQConfig, {"node": None, "port": config_port})
+    assert _stable_node_name(options, config) is stable
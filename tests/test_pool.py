@@ -0,0 +1,91 @@
+"""Tests for pooled client connections."""
+
+from typing import Any, List
+
+import pytest
+from pika.exceptions import StreamLostError
+
+from pytest_rabbitmq import factories
+from pytest_rabbitmq.pool import ConnectionPool, PooledConnection
+
+
+class _Channel:
+    """Stand-in for a channel."""
+
+    def __init__(self) -> None:
+        self.is_open = True
+
+    def close(self) -> None:
+        self.is_open = False
+
+
+class _Connection(PooledConnection):
+    """Stand-in for a connection, not talking to any broker."""
+
+    def __init__(self, *args: Any) -> None:  # pylint:disable=super-init-not-called
+        self._opened_channels: List[Any] = []
+        self.open = True
+        self.lost = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.open
+
+    def channel(self, channel_number: Any = None) -> Any:
+        channel = _Channel()
+        self._opened_channels.append(channel)
+        return channel
+
+    def process_data_events(self, time_limit: float = 0) -> None:
+        if self.lost:
+            self.open = False
+            raise StreamLostError("lost")
+
+    def close(self, reply_code: int = 200, reply_text: str = "Normal shutdown") -> None:
+        self.open = False
+
+
+def test_pool_reuses_connection() -> None:
+    """Released connection is handed out again, with its channels closed."""
+    pool = ConnectionPool(None, _Connection)
+    connection = pool.acquire()
+    channel = connection.channel()
+    pool.release(connection)
+    assert not channel.is_open
+    assert pool.acquire() is connection
+    assert pool.opened == 1
+
+
+def test_pool_discards_broken_connection() -> None:
+    """Connection found broken gets replaced with a new one."""
+    pool = ConnectionPool(None, _Connection)
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.lost = True
+    assert pool.acquire() is not connection
+    assert pool.opened == 2
+
+
+def test_pool_limits_idle_connections() -> None:
+    """Connections above the limit get closed when released."""
+    pool = ConnectionPool(None, _Connection, max_idle=1)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert not second.is_open
+    pool.close()
+    assert not first.is_open
+
+
+def test_pooled_isolated_not_allowed() -> None:
+    """Pooled connections can't serve a different virtual host each test."""
+    with pytest.raises(ValueError):
+        factories.rabbitmq("rabbitmq_proc", pooled=True, isolate_vhost=True)
+
+
+@pytest.mark.parametrize("attempt", [1, 2])
+def test_pooled_connection(rabbitmq_pooled: PooledConnection, attempt: int) -> None:
+    """Each test gets an open connection, without channels left by a previous one."""
+    channel = rabbitmq_pooled.channel()
+    assert channel.is_open
+    channel.queue_declare(f"pooled-{attempt}")
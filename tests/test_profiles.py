@@ -0,0 +1,124 @@
+"""Node configuration profile tests."""
+
+import sys
+from pathlib import Path
+
+import pytest
+from pika import BlockingConnection
+
+from pytest_rabbitmq import profiles
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.mnesia_cache import MnesiaCache
+
+
+def test_fast_config() -> None:
+    """Statistics and info logs are kept when something needs them."""
+    assert profiles.fast_config(False, "port")["collect_statistics"] == "none"
+    assert "collect_statistics" not in profiles.fast_config(True, "port")
+    assert profiles.fast_config(False, "log")["log.file.level"] == "info"
+
+
+def test_write_config(tmp_path: Path) -> None:
+    """Config is written in rabbitmq.conf format, advanced config only when given."""
+    config_file, advanced_config_file = profiles.write_config(tmp_path, {"a.b": "1"})
+    assert config_file.read_text() == "a.b = 1\n"
+    assert advanced_config_file is None
+
+    _, advanced_config_file = profiles.write_config(tmp_path, {}, profiles.FAST_ADVANCED_CONFIG)
+    assert advanced_config_file
+    assert advanced_config_file.read_text() == profiles.FAST_ADVANCED_CONFIG
+
+
+def test_ram_directory_missing(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """No directory is created without RAM backed file system."""
+    monkeypatch.setattr(profiles, "RAM_DIRECTORY", tmp_path / "missing")
+    assert profiles.ram_directory("test-") is None
+
+
+def test_fast_node(rabbitmq_fast_proc: RabbitMqExecutor, rabbitmq_fast: BlockingConnection) -> None:
+    """Fast node keeps its data in RAM, and reads the tuned config."""
+    env = rabbitmq_fast_proc._popen_kwargs["env"]  # pylint:disable=protected-access
+    assert Path(env["RABBITMQ_CONFIG_FILE"]).read_text().startswith("disk_free_limit")
+    assert "RABBITMQ_ADVANCED_CONFIG_FILE" in env
+    if profiles.RAM_DIRECTORY.is_dir():
+        assert rabbitmq_fast_proc.mnesia_base.is_relative_to(profiles.RAM_DIRECTORY)
+    rabbitmq_fast.channel().queue_declare("fast", durable=True)
+    assert "fast" in rabbitmq_fast_proc.list_queues()
+
+
+def test_node_resources() -> None:
+    """Small node preset gets overridden by options given along."""
+    assert profiles.node_resources(False) == {
+        "schedulers": None,
+        "async_threads": None,
+        "erl_args": "",
+        "memory_high_watermark": None,
+        "cpu_affinity": None,
+    }
+    resources = profiles.node_resources(True, schedulers=2, erl_args="+stbt db")
+    assert resources["schedulers"] == 2
+    assert resources["async_threads"] == profiles.SMALL_NODE["async_threads"]
+    assert resources["erl_args"] == f"{profiles.SMALL_NODE['erl_args']} +stbt db"
+    assert profiles.resources_erl_args(resources).startswith("+S 2:2 +A 4 +sbwt none")
+
+
+def test_node_resources_default_to_small() -> None:
+    """Resources given alone start from small node preset, unless it's turned off."""
+    assert profiles.node_resources(None) == profiles.node_resources(False)
+    resources = profiles.node_resources(None, schedulers=2)
+    assert resources == {**profiles.SMALL_NODE, "schedulers": 2}
+    assert profiles.node_resources(False, schedulers=2)["async_threads"] is None
+
+
+def test_resources_config() -> None:
+    """Memory high watermark is either relative or absolute."""
+    resources = profiles.node_resources(False, memory_high_watermark="0.2")
+    assert profiles.resources_config(resources) == {"vm_memory_high_watermark.relative": "0.2"}
+    resources = profiles.node_resources(False, memory_high_watermark="512MB")
+    assert profiles.resources_config(resources) == {"vm_memory_high_watermark.absolute": "512MB"}
+    assert profiles.resources_config(profiles.node_resources(False)) == {}
+
+
+def test_executor_erl_args(tmp_path: Path) -> None:
+    """Erlang VM arguments are passed along with management plugin's port."""
+    executor = RabbitMqExecutor(
+        "rabbitmq-server",
+        "127.0.0.1",
+        5690,
+        25690,
+        "rabbitmqctl",
+        logpath=tmp_path,
+        path=tmp_path,
+        plugin_path=tmp_path,
+        management_port=15690,
+        erl_args="+S 1:1",
+        cpu_affinity="0",
+    )
+    env = executor._popen_kwargs["env"]  # pylint:disable=protected-access
+    assert env["RABBITMQ_SERVER_ADDITIONAL_ERL_ARGS"] == (
+        "+S 1:1 -rabbitmq_management tcp_config [{port,15690}]"
+    )
+    assert executor.command_parts == ["taskset", "--cpu-list", "0", "rabbitmq-server"]
+    assert executor.server == "rabbitmq-server"
+
+
+def test_cpu_affinity_cache_key(tmp_path: Path) -> None:
+    """Mnesia cache key is computed from the server, not taskset's command line."""
+    executor = RabbitMqExecutor(
+        sys.executable,
+        "127.0.0.1",
+        5672,
+        25672,
+        "rabbitmqctl",
+        logpath=tmp_path,
+        path=tmp_path,
+        plugin_path=tmp_path,
+        cpu_affinity="0",
+    )
+    assert MnesiaCache.key(executor)
+
+
+def test_small_node(rabbitmq_small_proc: RabbitMqExecutor) -> None:
+    """Small node runs with a single scheduler."""
+    output = rabbitmq_small_proc.rabbitctl_output("eval", "erlang:system_info(schedulers_online).")
+    assert output.strip() == "1"
@@ -2,8 +2,14 @@
 
 from pika import BlockingConnection
 
-from pytest_rabbitmq.factories.client import clear_rabbitmq
+from pytest_rabbitmq.factories.client import (
+    clear_declared,
+    clear_rabbitmq,
+    purge_rabbitmq,
+    take_baseline,
+)
 from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.tracking import TrackingConnection
 
 
 def test_rabbitmq(rabbitmq: BlockingConnection) -> None:
@@ -71,6 +77,75 @@ def test_rabbitmq_clear_queues(
     assert no_queues == cleared_queues
 
 
+def test_rabbitmq_clear_declared(
+    rabbitmq_tracked: TrackingConnection, rabbitmq_proc: RabbitMqExecutor
+) -> None:
+    """Declare topology over tracked connection, and clear only that."""
+    no_exchanges = rabbitmq_proc.list_exchanges()
+    channel = rabbitmq_tracked.channel()
+    channel.exchange_declare("cache-in")
+    channel.queue_declare("fastlane")
+    channel.queue_bind("fastlane", "cache-in", "fast")
+    channel.queue_bind("fastlane", "amq.topic", "fast.#")
+    server_named = channel.queue_declare("", exclusive=True).method.queue
+    channel.exchange_declare("amq.direct", passive=True)
+
+    assert [declaration.name for declaration in rabbitmq_tracked.declarations] == [
+        "cache-in",
+        "fastlane",
+        "fastlane",
+        "fastlane",
+        server_named,
+    ]
+    clear_declared(rabbitmq_proc, rabbitmq_tracked)
+
+    assert not rabbitmq_tracked.declarations
+    assert rabbitmq_proc.list_exchanges() == no_exchanges
+    assert not rabbitmq_proc.list_queues()
+
+
+def test_rabbitmq_purge(rabbitmq: BlockingConnection, rabbitmq_proc: RabbitMqExecutor) -> None:
+    """Baseline queues get purged, and entities created after baseline get deleted."""
+    channel = rabbitmq.channel()
+    channel.queue_declare("baseline")
+    channel.basic_publish("", "baseline", b"stale")
+    baseline = take_baseline(rabbitmq_proc)
+    channel.exchange_declare("after-baseline")
+    channel.queue_declare("after-baseline")
+
+    purge_rabbitmq(rabbitmq_proc, rabbitmq, baseline)
+
+    assert "after-baseline" not in rabbitmq_proc.list_exchanges()
+    assert rabbitmq_proc.list_queues() == ["baseline"]
+    assert channel.queue_declare("baseline", passive=True).method.message_count == 0
+
+
+def test_rabbitmq_purge_fixture(
+    rabbitmq_purged: BlockingConnection, rabbitmq_proc: RabbitMqExecutor
+) -> None:
+    """Client fixture in purge mode takes baseline before the test."""
+    channel = rabbitmq_purged.channel()
+    channel.queue_declare("purged")
+    assert "purged" in rabbitmq_proc.list_queues()
+
+
+def test_rabbitmq_isolated_vhost(
+    rabbitmq_isolated: BlockingConnection, rabbitmq_proc: RabbitMqExecutor
+) -> None:
+    """Queues declared by isolated client do not show up in the default virtual host."""
+    channel = rabbitmq_isolated.channel()
+    channel.queue_declare("isolated")
+    assert "isolated" not in rabbitmq_proc.list_queues()
+
+
+def test_rabbitmq_vhost_lifecycle(rabbitmq_proc: RabbitMqExecutor) -> None:
+    """Virtual host can be created and deleted along with its queues."""
+    rabbitmq_proc.add_vhost("lifecycle")
+    assert not rabbitmq_proc.list_queues("lifecycle")
+    rabbitmq_proc.delete_vhost("lifecycle")
+    assert "lifecycle" not in rabbitmq_proc.rabbitctl_output("list_vhosts")
+
+
 def test_random_port(rabbitmq_rand: BlockingConnection) -> None:
     """Test if rabbit fixture can be started on random port."""
     channel = rabbitmq_rand.channel()
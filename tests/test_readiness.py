@@ -0,0 +1,70 @@
+"""Tests for RabbitMQ readiness detection."""
+
+from pathlib import Path
+
+import pytest
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.logs import LogFollower
+
+
+def test_log_follower_reads_only_new_lines(tmp_path: Path) -> None:
+    """Follower returns complete lines appended since previous read."""
+    follower = LogFollower(tmp_path)
+    assert follower.read_lines() == []
+
+    log_path = tmp_path / "rabbit@localhost.log"
+    log_path.write_text("first\nsec")
+    assert follower.read_lines() == ["first"]
+    with log_path.open("a") as log_file:
+        log_file.write("ond\nthird\n")
+    assert follower.read_lines() == ["second", "third"]
+    assert follower.read_lines() == []
+    follower.close()
+
+
+def test_log_readiness_skips_earlier_boot(tmp_path: Path) -> None:
+    """Startup logged by an earlier boot doesn't make node restarted since ready."""
+    executor = RabbitMqExecutor(
+        "rabbitmq-server",
+        "127.0.0.1",
+        5672,
+        25672,
+        "rabbitmqctl",
+        logpath=tmp_path,
+        path=tmp_path,
+        plugin_path=tmp_path,
+        readiness="log",
+    )
+    log_path = tmp_path / "rabbit-server.5672.log" / "rabbit@localhost.log"
+    log_path.parent.mkdir()
+    log_path.write_text("2024-01-01 [info] <0.1.0> Server startup complete; 3 plugins started.\n")
+    executor._reset_boot_phases()  # pylint:disable=protected-access
+    assert not executor.after_start_check()
+    with log_path.open("a") as log_file:
+        log_file.write("2024-01-02 [info] <0.1.0> Server startup complete; 3 plugins started.\n")
+    assert executor.after_start_check()
+
+
+def test_unknown_readiness(tmp_path: Path) -> None:
+    """Executor refuses unknown readiness strategy."""
+    with pytest.raises(ValueError):
+        RabbitMqExecutor(
+            "rabbitmq-server",
+            "127.0.0.1",
+            5672,
+            25672,
+            "rabbitmqctl",
+            logpath=tmp_path,
+            path=tmp_path,
+            plugin_path=tmp_path,
+            readiness="telepathy",
+        )
+
+
+@pytest.mark.parametrize("process_fixture", ["rabbitmq_log_ready_proc", "rabbitmq_amqp_ready_proc"])
+def test_boot_phases(process_fixture: str, request: pytest.FixtureRequest) -> None:
+    """Nodes started with log and amqp readiness record boot phases."""
+    process: RabbitMqExecutor = request.getfixturevalue(process_fixture)
+    assert "ready" in process.boot_phases
+    assert process.pre_start_check()
@@ -0,0 +1,57 @@
+"""Tests for sharing RabbitMQ node between xdist workers."""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.factories.shared import NodeAddress, share_executor
+
+
+def test_share_executor_attach(tmp_path: Path, rabbitmq_proc: RabbitMqExecutor) -> None:
+    """Worker attaches to node published by another worker, using its own vhost."""
+    state_path = tmp_path / "pytest-rabbitmq-shared.json"
+    state_path.write_text(
+        json.dumps(
+            {
+                "host": rabbitmq_proc.host,
+                "port": rabbitmq_proc.port,
+                "distribution_port": rabbitmq_proc.distribution_port,
+                "node": rabbitmq_proc.node_name,
+                "management_port": None,
+                # any live process other than this one
+                "owner": os.getppid(),
+                "workers": {},
+            }
+        )
+    )
+
+    def create(shared: Optional[NodeAddress]) -> RabbitMqExecutor:
+        assert shared
+        return RabbitMqExecutor(
+            rabbitmq_proc.command,
+            shared["host"],
+            shared["port"],
+            shared["distribution_port"],
+            rabbitmq_proc.rabbit_ctl,
+            logpath=tmp_path,
+            path=tmp_path,
+            plugin_path=tmp_path,
+            node_name=shared["node"],
+        )
+
+    sharing = share_executor(tmp_path, "shared", "gw7", create)
+    executor = next(sharing)
+    assert executor.port == rabbitmq_proc.port
+    assert executor.vhost == "pytest-gw7"
+    assert executor.snapshot_vhost == "pytest-gw7"
+    assert json.loads(state_path.read_text())["workers"] == {"gw7": os.getpid()}
+    assert "pytest-gw7" in rabbitmq_proc.rabbitctl_output("list_vhosts")
+
+    with pytest.raises(StopIteration):
+        next(sharing)
+    assert json.loads(state_path.read_text())["workers"] == {}
+    assert "pytest-gw7" not in rabbitmq_proc.rabbitctl_output("list_vhosts")
@@ -0,0 +1,130 @@
+"""Snapshot and rollback tests."""
+
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+from pika import BlockingConnection
+
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+from pytest_rabbitmq.snapshot import (
+    diff_definitions,
+    management_deletion,
+    rabbitmqctl_deletion,
+    vhost_scoped,
+)
+
+SNAPSHOT: Dict[str, Any] = {
+    "vhosts": [{"name": "/"}],
+    "users": [{"name": "guest", "tags": "administrator"}],
+    "permissions": [{"user": "guest", "vhost": "/", "configure": ".*"}],
+    "exchanges": [{"vhost": "/", "name": "orders", "type": "topic", "durable": True}],
+    "queues": [{"vhost": "/", "name": "orders.new", "durable": True, "arguments": {}}],
+    "bindings": [
+        {
+            "vhost": "/",
+            "source": "orders",
+            "destination": "orders.new",
+            "destination_type": "queue",
+            "routing_key": "new",
+            "arguments": {},
+        }
+    ],
+}
+
+
+def test_diff_unchanged() -> None:
+    """Nothing to revert when nothing changed."""
+    assert not diff_definitions(SNAPSHOT, SNAPSHOT)
+
+
+def test_diff_added_and_removed() -> None:
+    """Added entities get deleted, removed ones restored."""
+    current = dict(
+        SNAPSHOT,
+        users=[{"name": "guest", "tags": ""}, {"name": "intruder", "tags": ""}],
+        policies=[{"vhost": "/", "name": "ttl", "pattern": ".*", "definition": {}}],
+        bindings=[],
+    )
+    diff = diff_definitions(SNAPSHOT, current)
+    assert diff.delete["users"] == [{"name": "intruder", "tags": ""}]
+    assert diff.delete["policies"] == current["policies"]
+    assert diff.restore["users"] == SNAPSHOT["users"]
+    assert diff.restore["bindings"] == SNAPSHOT["bindings"]
+    assert not diff.delete["queues"]
+
+
+def test_diff_changed_queue() -> None:
+    """Changed queue gets recreated, along with its bindings."""
+    changed = {"vhost": "/", "name": "orders.new", "durable": False, "arguments": {}}
+    diff = diff_definitions(SNAPSHOT, dict(SNAPSHOT, queues=[changed]))
+    assert diff.delete["queues"] == [changed]
+    assert diff.restore["queues"] == SNAPSHOT["queues"]
+    assert diff.restore["bindings"] == SNAPSHOT["bindings"]
+
+
+def test_diff_vhost_scoped() -> None:
+    """Changes outside the snapshot's virtual host are not reverted."""
+    other_worker = {"vhost": "pytest-gw1", "name": "orders.new", "durable": True, "arguments": {}}
+    current = dict(
+        SNAPSHOT,
+        vhosts=[{"name": "/"}, {"name": "pytest-gw1"}],
+        users=[{"name": "guest", "tags": "administrator"}, {"name": "worker", "tags": ""}],
+        queues=[*SNAPSHOT["queues"], other_worker],
+    )
+    scoped = vhost_scoped(SNAPSHOT, "/")
+    assert "users" not in scoped
+    assert scoped["queues"] == SNAPSHOT["queues"]
+    assert not diff_definitions(scoped, vhost_scoped(current, "/"))
+    assert diff_definitions(
+        vhost_scoped(SNAPSHOT, "pytest-gw1"), vhost_scoped(current, "pytest-gw1")
+    )
+
+
+def test_deletions() -> None:
+    """Entities are deleted by names quoted for management API."""
+    parameter = {"vhost": "/", "component": "shovel", "name": "a b"}
+    assert management_deletion("parameters", parameter) == "parameters/shovel/%2F/a%20b"
+    assert rabbitmqctl_deletion("parameters", parameter) == (
+        "clear_parameter",
+        "-p",
+        "/",
+        "shovel",
+        "a b",
+    )
+    with pytest.raises(ValueError):
+        management_deletion("queues", {"vhost": "/", "name": "queue"})
+
+
+def test_rollback_without_snapshot(tmp_path: Path) -> None:
+    """Rolling back needs a snapshot."""
+    executor = RabbitMqExecutor(
+        "rabbitmq-server",
+        "127.0.0.1",
+        5691,
+        25691,
+        "rabbitmqctl",
+        logpath=tmp_path,
+        path=tmp_path,
+        plugin_path=tmp_path,
+    )
+    with pytest.raises(RuntimeError):
+        executor.rollback()
+
+
+def test_rollback(
+    rabbitmq_snapshot_proc: RabbitMqExecutor, rabbitmq_snapshot: BlockingConnection
+) -> None:
+    """Users, policies, virtual hosts and queues are brought back to snapshot."""
+    assert rabbitmq_snapshot_proc.snapshot
+    rabbitmq_snapshot_proc.rabbitctl_output("add_user", "intruder", "secret")
+    rabbitmq_snapshot_proc.rabbitctl_output("set_policy", "ttl", ".*", '{"message-ttl": 1000}')
+    rabbitmq_snapshot_proc.add_vhost("intruders")
+    rabbitmq_snapshot.channel().queue_declare("rolled-back", durable=True)
+
+    diff = rabbitmq_snapshot_proc.rollback()
+    assert [user["name"] for user in diff.delete["users"]] == ["intruder"]
+    assert not diff_definitions(
+        rabbitmq_snapshot_proc.snapshot, rabbitmq_snapshot_proc.export_definitions()
+    )
+    assert "rolled-back" not in rabbitmq_snapshot_proc.list_queues()
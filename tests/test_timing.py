@@ -0,0 +1,50 @@
+"""Timing instrumentation tests."""
+
+import json
+from pathlib import Path
+
+import pika
+import pytest
+
+from pytest_rabbitmq.timing import TimingRecorder, recorder
+
+
+def test_recorder_aggregates(tmp_path: Path) -> None:
+    """Timings get aggregated by phase and by test, and written to JSON."""
+    timings = TimingRecorder()
+    timings.current_test = "test_a"
+    timings.record("node.start", 2.0)
+    timings.record("teardown.clear", 0.5)
+    timings.current_test = "test_b"
+    timings.record("teardown.clear", 0.25)
+    with pytest.raises(RuntimeError):
+        with timings.measure("connection.open"):
+            raise RuntimeError
+
+    phases = timings.by_phase()
+    assert list(phases)[0] == "node.start"
+    assert phases["teardown.clear"].calls == 2
+    assert phases["teardown.clear"].total == 0.75
+    assert phases["teardown.clear"].mean == 0.375
+    assert phases["connection.open"].calls == 1
+    assert timings.by_test()["test_a"] == {"node.start": 2.0, "teardown.clear": 0.5}
+    assert [item["test"] for item in timings.slowest_tests(1)] == ["test_a"]
+
+    timings.write_json(tmp_path / "timings.json")
+    report = json.loads((tmp_path / "timings.json").read_text())
+    assert report["phases"]["node.start"]["total"] == 2.0
+    assert report["tests"]["test_b"]["teardown.clear"] == 0.25
+
+
+def test_client_fixture_phases(
+    request: pytest.FixtureRequest, rabbitmq_inprocess: pika.BlockingConnection
+) -> None:
+    """Client fixture records opening its connection, attributed to the test."""
+    assert "connection.open" in recorder.by_test()[request.node.nodeid]
+
+
+def test_previous_teardown_recorded() -> None:
+    """Client fixture recorded its teardown and closing of connection."""
+    phases = recorder.by_test()["tests/test_timing.py::test_client_fixture_phases"]
+    assert "teardown.clear" in phases
+    assert "connection.close" in phases
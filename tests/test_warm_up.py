@@ -0,0 +1,45 @@
+"""Background warm-up tests."""
+
+import time
+from inspect import signature
+from typing import Dict
+
+import pytest
+from pika import BlockingConnection
+
+from pytest_rabbitmq import factories
+from pytest_rabbitmq.factories.executor import RabbitMqExecutor
+
+TIMESTAMPS: Dict[str, float] = {"collected": time.monotonic()}
+
+
+def test_not_using_rabbitmq() -> None:
+    """Run before the warmed up node is requested."""
+    TIMESTAMPS["first_test"] = time.monotonic()
+
+
+def test_warmed_up(rabbitmq_warm_proc: RabbitMqExecutor) -> None:
+    """Node was spawned while tests were collected, and is ready once it's given."""
+    assert rabbitmq_warm_proc.running()
+    assert "ready" in rabbitmq_warm_proc.boot_phases
+    # pylint:disable=protected-access
+    assert rabbitmq_warm_proc._spawned_at < TIMESTAMPS["collected"]
+
+
+def test_client_depends_on_process() -> None:
+    """Client fixture declares its process fixture, so it's part of tests' fixture closure."""
+    assert (
+        "rabbitmq_warm_client_proc"
+        in signature(factories.rabbitmq("rabbitmq_warm_client_proc")).parameters
+    )
+
+
+def test_warmed_up_through_client(
+    rabbitmq_warm_client: BlockingConnection, request: pytest.FixtureRequest
+) -> None:
+    """Node requested only through a client fixture is warmed up, not discarded."""
+    assert "rabbitmq_warm_client_proc" in request.fixturenames
+    process: RabbitMqExecutor = request.getfixturevalue("rabbitmq_warm_client_proc")
+    assert rabbitmq_warm_client.is_open
+    # pylint:disable=protected-access
+    assert process._spawned_at < TIMESTAMPS["collected"]